@@ -1,5 +1,6 @@
+from http import HTTPStatus
 from http.server import BaseHTTPRequestHandler, HTTPServer
-import mimetypes
+import argparse
 import os
 from controllers.book_controller import BookController
 from router import Router
@@ -9,7 +10,12 @@ from controllers.student_controller import StudentController
 from controllers.borrow_controller import BorrowController
 from controllers.error_controller import ErrorController
 from controllers.user_controller import UserController
-from middleware.auth import check_auth
+from controllers.stats_controller import StatsController
+from middleware.auth import check_auth, _redirect_forbidden
+from server import (ThreadPoolHTTPServer, DEFAULT_WORKERS, DEFAULT_QUEUE_SIZE, serve_prefork, cpu_workers,
+                    KEEPALIVE_TIMEOUT, MAX_KEEPALIVE_REQUESTS, connection_stats)
+import session
+from static_files import static_cache, precompress, print_report, STATIC_PRECOMPRESS
 
 dashboard = DashboardController()
 auth = AuthController()
@@ -18,6 +24,7 @@ student = StudentController()
 borrow = BorrowController()
 errors = ErrorController()
 users = UserController()
+stats = StatsController()
 
 router = Router()
 
@@ -28,6 +35,7 @@ router.add_route('POST', '/logout', auth.logout)
 router.add_route('GET',  '/books', book.index)
 router.add_route('GET',  '/books/add', book.add_form)
 router.add_route('POST',  '/books/add', book.add_submit)
+router.add_route('POST', '/books/import', book.import_csv, roles=['admin', 'bookkeeper'])
 router.add_route('GET',  '/books/:id/edit', book.edit)
 router.add_route('POST', '/books/:id', book.update)
 router.add_route('POST', '/books/:id/delete', book.delete)
@@ -41,24 +49,177 @@ router.add_route('POST', '/students/:id/delete', student.delete)
 router.add_route('GET',  '/borrows', borrow.index)
 router.add_route('POST',  '/borrows', borrow.create)
 router.add_route('POST',  '/borrows/:id/return', borrow.return_book)
+router.add_route('POST',  '/borrows/bulk', borrow.bulk_create, roles=['admin', 'bookkeeper'])
+router.add_route('POST',  '/borrows/bulk-return', borrow.bulk_return, roles=['admin', 'bookkeeper'])
 router.add_route('GET', '/forbidden', errors.forbidden)
 router.add_route('GET', '/users', users.index)
 router.add_route('GET',  '/users/add', users.new)
 router.add_route('POST', '/users', users.create)
 router.add_route('GET',  '/students/:id', student.show)
 router.add_route('POST', '/students/:id/reset-password', student.reset_password)
+router.add_route('GET', '/stats', stats.index, roles=['admin'])
 
 HOST = '0.0.0.0'
 PORT = int(os.environ.get("PORT", 8000))
+WORKERS    = int(os.environ.get("WORKERS", DEFAULT_WORKERS))
+QUEUE_SIZE = int(os.environ.get("QUEUE_SIZE", DEFAULT_QUEUE_SIZE))
+PROCESSES  = os.environ.get("PROCESSES", "1")
+
+def dispatch(req, path, query_string):
+    """
+    Authentification + routage + controller.
+    `req` est un MainHandler ou tout objet qui expose la même interface
+    (command, path, headers, rfile, wfile, send_response, send_header, end_headers).
+    """
+    if not check_auth(req, path):
+        return
+
+    # HEAD = GET dont le corps est ignoré (req.end_headers, cf. HeadBody) :
+    # mêmes en-têtes, pour les sondes de supervision et les vérificateurs de liens
+    method        = 'GET' if req.command == 'HEAD' else req.command
+    route, params = router.match(method, path)
+
+    if route is None:
+        send_404(req)
+        return
+
+    # Rôles requis déclarés à l'enregistrement de la route (roles=[...])
+    roles = route.meta.get('roles')
+    if roles and getattr(req, 'session', {}).get('role') not in roles:
+        _redirect_forbidden(req)
+        return
+
+    route.handler(req, params, query_string)
+
+
+def send_404(req):
+    # Moteur partagé : le template compilé est réutilisé d'une requête à l'autre
+    from controllers.base_controller import engine
+    html = engine.render('errors/404.html', {"path": req.path})
+    body = html.encode('utf-8')
+    req.send_response(404)
+    req.send_header('Content-Type', 'text/html; charset=utf-8')
+    req.send_header('Content-Length', len(body))
+    req.end_headers()
+    req.wfile.write(body)
+
+
+# Corps de requête non lu au-delà duquel on ferme plutôt que de le vider
+MAX_DRAIN = 64 * 1024
+
+
+class HeadBody:
+    """wfile d'une réponse à HEAD une fois les en-têtes envoyés : le corps est ignoré."""
+
+    def __init__(self, wfile):
+        self.wfile = wfile
+
+    def write(self, data):
+        return len(data)
+
+    def flush(self):
+        self.wfile.flush()
+
 
 class MainHandler(BaseHTTPRequestHandler):
 
+    # HTTP/1.1 → connexions persistantes : la page et ses dizaines de
+    # fichiers /assets/ passent par la même connexion TCP.
+    protocol_version = 'HTTP/1.1'
+    timeout          = KEEPALIVE_TIMEOUT   # délai de lecture d'une requête commencée
+
     def do_GET(self):
         self._dispatch()
 
     def do_POST(self):
         self._dispatch()
 
+    def do_HEAD(self):
+        self._dispatch()
+
+    # ── Keep-alive ─────────────────────────────────────────────────────────────
+
+    # Avec ThreadPoolHTTPServer, une connexion sans requête en attente n'est
+    # pas gardée par le thread : idle = True, le serveur la surveille (park)
+    # et rappelle resume() à l'arrivée de la requête suivante.
+
+    def handle(self):
+        self.requests_served = 0
+        self.idle            = False
+        self.handle_one_request()
+        self._keep_alive()
+
+    def resume(self):
+        self.idle = False
+        try:
+            self.handle_one_request()
+            self._keep_alive()
+        finally:
+            self.finish()
+
+    def _keep_alive(self):
+        can_park = hasattr(self.server, 'park')
+        while not self.close_connection:
+            if can_park and not self._input_pending():
+                self.idle = True
+                return
+            self.handle_one_request()
+
+    def _input_pending(self) -> bool:
+        """Requête suivante déjà reçue (pipelining) : inutile de repasser par le sélecteur."""
+        self.connection.setblocking(False)
+        try:
+            return bool(self.rfile.peek(1))
+        except OSError:
+            return True         # l'erreur remontera dans handle_one_request
+        finally:
+            self.connection.settimeout(self.timeout)
+
+    def finish(self):
+        if self.idle:
+            self.wfile.flush()  # connexion conservée : rien n'est fermé
+            return
+        connection_stats.record(self.requests_served)
+        super().finish()
+
+    def parse_request(self):
+        ok = super().parse_request()
+        if ok:
+            self.requests_served += 1
+            self.body_consumed    = False
+            self._length_known    = False
+        return ok
+
+    def send_response(self, code, message=None):
+        super().send_response(code, message)
+        if self.requests_served >= MAX_KEEPALIVE_REQUESTS:
+            self.send_header('Connection', 'close')
+
+    def send_header(self, keyword, value):
+        if keyword.lower() in ('content-length', 'transfer-encoding'):
+            self._length_known = True
+        super().send_header(keyword, value)
+
+    def end_headers(self):
+        # Sans Content-Length, seule la fermeture délimite la réponse
+        if not getattr(self, '_length_known', True) and not self.close_connection:
+            self.send_header('Connection', 'close')
+        super().end_headers()
+        if self.command == 'HEAD':
+            self.wfile = HeadBody(self.wfile)
+
+    def _drain_body(self):
+        """Vide le corps non lu par le controller, sinon il polluerait la requête suivante."""
+        length = int(self.headers.get('Content-Length', 0) or 0)
+        if not length or self.body_consumed:
+            return
+        if length > MAX_DRAIN:
+            self.close_connection = True
+        else:
+            self.rfile.read(length)
+
+    # ── Dispatch ───────────────────────────────────────────────────────────────
+
     def _dispatch(self):
         # Séparer le path des query params (?page=1&q=python)
         path = self.path.split('?')[0]
@@ -66,60 +227,93 @@ class MainHandler(BaseHTTPRequestHandler):
 
         print(f"  >> {self.command} {path}") 
 
-        if path.startswith('/assets/'):
-            self._serve_static(path)
-            return
-        
-        if not check_auth(self, path):
-            return
+        try:
+            if path.startswith('/assets/'):
+                self._serve_static(path)
+            else:
+                dispatch(self, path, query_string)
+        finally:
+            if isinstance(self.wfile, HeadBody):
+                self.wfile = self.wfile.wfile
+        self._drain_body()
+
+    def _serve_static(self, path):
+        # Cache, validateurs, 304, Range : voir static_files.py
+        sendfile = static_cache.respond(self, path)
+        if sendfile is not None:
+            f, offset, count = sendfile
+            with f:
+                self.connection.sendfile(f, offset, count)
 
-        handler, params = router.resolve(self.command, path)
+    def log_request(self, code='-', size='-'):
+        # Formater les logs serveur
+        if isinstance(code, HTTPStatus):
+            code = code.value
+        print(f"  [{self.command}] {self.path}  >>  {code}")
 
-        if handler:
-            handler(self, params, query_string)
-        else:
-            self._send_404()
+    def log_message(self, format, *args):
+        # Autres messages (log_error : délai keep-alive dépassé, requête invalide...)
+        print(f"  [HTTP] {self.address_string()} {format % args}")
 
-    def _serve_static(self, path):
-        # /assets/css/app.css  →  assets/css/app.css  (chemin local)
-        file_path = path.lstrip('/')
+def parse_args():
+    parser = argparse.ArgumentParser(description="Bibliothèque Université de Douala")
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--workers', type=int, default=WORKERS,
+                        help="taille du pool de threads (0 = serveur mono-thread)")
+    parser.add_argument('--queue', type=int, default=QUEUE_SIZE,
+                        help="connexions en attente avant de répondre 503")
+    parser.add_argument('--processes', default=PROCESSES,
+                        help="nombre de processus workers (pré-fork) ; 'auto' = nombre de cœurs")
+    return parser.parse_args()
 
-        if not os.path.isfile(file_path):
-            self.send_response(404)
-            self.end_headers()
-            return
 
-        # Détecter le bon Content-Type (css, js, png, woff2...)
-        mime_type, _ = mimetypes.guess_type(file_path)
-        mime_type = mime_type or 'application/octet-stream'
-
-        with open(file_path, 'rb') as f:
-            content = f.read()
-
-        self.send_response(200)
-        self.send_header('Content-Type', mime_type)
-        self.send_header('Content-Length', len(content))
-        self.end_headers()
-        self.wfile.write(content)
-        
-    def _send_404(self):
-        from template_engine2 import TemplateEngine
-        engine = TemplateEngine()
-        html = engine.render('errors/404.html', {"path": self.path})
-        body = html.encode('utf-8')
-        self.send_response(404)
-        self.send_header('Content-Type', 'text/html; charset=utf-8')
-        self.send_header('Content-Length', len(body))
-        self.end_headers()
-        self.wfile.write(body)
+def warm_up():
+    """Précompile les templates, construit les bundles et les variantes .gz des assets (avant le fork)."""
+    import time
+    import asset_bundles
+    from controllers.base_controller import engine
+    start = time.perf_counter()
+    count = engine.warm_up()
+    print(f"  {count} templates compilés en {(time.perf_counter() - start) * 1000:.0f} ms")
+    start = time.perf_counter()
+    bundles = asset_bundles.build()
+    print(f"  {len(bundles)} bundles CSS/JS prêts en {(time.perf_counter() - start) * 1000:.0f} ms")
+    if STATIC_PRECOMPRESS:
+        start = time.perf_counter()
+        print_report(precompress())
+        print(f"  Précompression gzip en {(time.perf_counter() - start) * 1000:.0f} ms")
 
-    def log_message(self, format, *args):
-        # Formater les logs serveur
-        print(f"  [{self.command}] {self.path}  >>  {args[1]}")
 
+def make_server(args, bind_and_activate=True):
+    if args.workers > 0:
+        return ThreadPoolHTTPServer((HOST, args.port), MainHandler,
+                                    workers=args.workers, queue_size=args.queue,
+                                    bind_and_activate=bind_and_activate)
+    return HTTPServer((HOST, args.port), MainHandler, bind_and_activate)
+
+
+# Les pools bcrypt (services/crypto_pool.py, 'spawn') réimportent ce module
+# sous le nom __mp_main__ : tout ce qui lance le serveur reste ici.
 if __name__ == '__main__':
+    args = parse_args()
     print(f"\n  Bibliothèque Université de Douala")
-    server = HTTPServer((HOST, PORT), MainHandler)
+    if args.workers > 0:
+        print(f"  Pool de {args.workers} threads, file d'attente {args.queue}")
+    warm_up()
+
+    processes = cpu_workers(args.processes)
+    # Sessions partagées entre workers (manager ou SQLite selon SESSION_BACKEND)
+    close_sessions = session.configure_store(processes)
+    if processes > 1:
+        try:
+            serve_prefork(lambda bind_and_activate: make_server(args, bind_and_activate),
+                          (HOST, args.port), processes)
+        finally:
+            close_sessions()
+            print("\n  Serveur arrêté.")
+        raise SystemExit(0)
+
+    server = make_server(args)
     
     # print(f"Serveur démarré → http://localhost:{PORT}")
     # print(f"Ctrl+C pour arrêter\n")
@@ -127,4 +321,4 @@ if __name__ == '__main__':
         server.serve_forever()   # ← boucle d'écoute infinie
     except KeyboardInterrupt:
         print("\n  Serveur arrêté.")
-        server.server_close()
\ No newline at end of file
+        server.server_close()
@@ -0,0 +1,270 @@
+"""
+app_async.py — Point d'entrée asyncio
+Même Router et mêmes controllers que app.py, mais servis par un serveur
+asyncio (streams) au lieu de BaseHTTPRequestHandler :
+  - une connexion keep-alive inactive ne coûte qu'une coroutine, pas un thread ;
+  - les fichiers /assets/ sont envoyés de façon asynchrone (loop.sendfile) ;
+  - les controllers (bloquants : MySQL, bcrypt, mail) tournent dans un
+    ThreadPoolExecutor ; ils lisent le corps de la requête à la demande
+    (jamais chargé en entier en mémoire, cf. /books/import) ;
+  - les lectures disque des fichiers /assets/ (stat, chargement) passent
+    aussi par un thread : la boucle ne bloque jamais.
+AsyncRequest imite l'interface de MainHandler pour que render / redirect /
+send_json de BaseController fonctionnent sans modification.
+
+Lancement : python app_async.py [--port 8000] [--workers 16]
+"""
+
+import argparse
+import asyncio
+import email.utils
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from http.client import parse_headers
+
+import session
+from app import dispatch, warm_up, HOST, PORT, WORKERS, MAX_DRAIN, HeadBody
+from server import MAX_KEEPALIVE_REQUESTS, connection_stats
+from static_files import static_cache
+
+IDLE_TIMEOUT    = float(os.environ.get("IDLE_TIMEOUT", 15))
+MAX_HEADER_SIZE = 64 * 1024
+
+RESPONSE_400 = b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\nConnection: close\r\n\r\n"
+
+
+# ── Adaptateur requête ─────────────────────────────────────────────────────────
+
+class _StreamWriter:
+    """
+    wfile de AsyncRequest : chaque write() part vers le transport depuis la
+    boucle asyncio (les controllers écrivent depuis un thread de l'executor).
+    Depuis un thread, write() attend le drain() : une page envoyée en
+    streaming ne s'accumule pas dans le buffer du transport.
+    """
+
+    def __init__(self, loop, writer):
+        self._loop   = loop
+        self._writer = writer
+
+    def write(self, data):
+        try:
+            in_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            in_loop = False
+        if in_loop:
+            self._writer.write(bytes(data))
+        else:
+            asyncio.run_coroutine_threadsafe(self._write(bytes(data)), self._loop).result()
+        return len(data)
+
+    async def _write(self, data):
+        self._writer.write(data)
+        await self._writer.drain()
+
+    def flush(self):
+        pass
+
+
+class _BodyReader(io.RawIOBase):
+    """
+    rfile de AsyncRequest (derrière un io.BufferedReader) : le corps est lu
+    sur le StreamReader au fur et à mesure que le controller le demande,
+    depuis son thread de l'executor, au plus `length` octets.
+    """
+
+    def __init__(self, loop, reader, length):
+        self._loop     = loop
+        self._reader   = reader
+        self.remaining = length
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self.remaining <= 0:
+            return 0
+        read = asyncio.wait_for(self._reader.read(min(len(buffer), self.remaining)), IDLE_TIMEOUT)
+        data = asyncio.run_coroutine_threadsafe(read, self._loop).result()
+        if not data:                # client parti avant la fin du corps
+            self.remaining = 0
+            return 0
+        self.remaining -= len(data)
+        buffer[:len(data)] = data
+        return len(data)
+
+
+class AsyncRequest:
+    """Expose la même interface que BaseHTTPRequestHandler pour les controllers."""
+
+    server_version   = "BibliothequeAsync/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def __init__(self, loop, writer, command, path, request_version, headers, body, client_address,
+                 last_request=False):
+        self.command          = command
+        self.path             = path
+        self.request_version  = request_version
+        self.headers          = headers
+        self.body             = body            # _BodyReader : octets non lus
+        self.body_consumed    = False
+        self.rfile            = io.BufferedReader(body)
+        self.writer           = writer
+        self.wfile            = _StreamWriter(loop, writer)
+        self.client_address   = client_address
+        self.close_connection = request_version != 'HTTP/1.1'
+        self.status           = None
+        self.last_request     = last_request
+        self._headers_buffer  = []
+        self._has_length      = False
+
+        conn = headers.get('Connection', '').lower()
+        if conn == 'close':
+            self.close_connection = True
+        elif conn == 'keep-alive':
+            self.close_connection = False
+
+    def send_response(self, code, message=None):
+        self.status = code
+        if message is None:
+            try:
+                message = HTTPStatus(code).phrase
+            except ValueError:
+                message = ''
+        self._headers_buffer.append(f"{self.protocol_version} {code} {message}\r\n")
+        self.send_header('Server', self.server_version)
+        self.send_header('Date', email.utils.formatdate(usegmt=True))
+        if self.last_request:
+            self.send_header('Connection', 'close')
+
+    def send_header(self, keyword, value):
+        self._headers_buffer.append(f"{keyword}: {value}\r\n")
+        key = keyword.lower()
+        if key == 'connection':
+            if str(value).lower() == 'close':
+                self.close_connection = True
+            elif str(value).lower() == 'keep-alive':
+                self.close_connection = False
+        elif key in ('content-length', 'transfer-encoding'):
+            self._has_length = True
+
+    def end_headers(self):
+        # Sans longueur connue, seule la fermeture délimite la réponse
+        if not self._has_length:
+            self.close_connection = True
+        self._headers_buffer.append("\r\n")
+        self.wfile.write(''.join(self._headers_buffer).encode('latin-1', 'strict'))
+        self._headers_buffer = []
+        if self.command == 'HEAD':
+            self.wfile = HeadBody(self.wfile)
+
+
+# ── Serveur ────────────────────────────────────────────────────────────────────
+
+class AsyncServer:
+
+    def __init__(self, workers=WORKERS):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='controller')
+
+    async def handle_connection(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        peer = writer.get_extra_info('peername')
+        served = 0
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), IDLE_TIMEOUT)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                    break
+
+                request_line, _, raw_headers = head.partition(b'\r\n')
+                parts = request_line.decode('latin-1').split()
+                if len(parts) != 3:
+                    writer.write(RESPONSE_400)
+                    break
+                command, path, version = parts
+                headers = parse_headers(io.BytesIO(raw_headers))
+
+                # Entier positif uniquement : ni 'abc', ni '-1', ni '+5'
+                length = headers.get('Content-Length', '0').strip() or '0'
+                if not (length.isascii() and length.isdigit()):
+                    writer.write(RESPONSE_400)
+                    break
+                body = _BodyReader(loop, reader, int(length))
+
+                served += 1
+                req = AsyncRequest(loop, writer, command, path, version, headers, body, peer,
+                                   last_request=served >= MAX_KEEPALIVE_REQUESTS)
+                await self._handle_request(loop, req)
+                await writer.drain()
+
+                if req.close_connection:
+                    break
+                # Corps non lu par le controller : vidé, sinon il polluerait la requête suivante
+                if body.remaining > MAX_DRAIN:
+                    break
+                if body.remaining:
+                    await asyncio.wait_for(reader.readexactly(body.remaining), IDLE_TIMEOUT)
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+            pass
+        finally:
+            connection_stats.record(served)
+            writer.close()
+
+    async def _handle_request(self, loop, req):
+        path         = req.path.split('?')[0]
+        query_string = req.path.split('?')[1] if '?' in req.path else ''
+        print(f"  >> {req.command} {path}")
+
+        if path.startswith('/assets/'):
+            await self._serve_static(req, path)
+            return
+
+        try:
+            await loop.run_in_executor(self.executor, dispatch, req, path, query_string)
+        except Exception as e:
+            print(f"  [ERREUR] {type(e).__name__}: {e}")
+            if req.status is None:
+                req.send_response(500)
+                req.send_header('Content-Length', '0')
+                req.end_headers()
+            req.close_connection = True
+
+    async def _serve_static(self, req, path):
+        # Fichiers en cache écrits directement ; les autres partent en sendfile.
+        # respond() peut faire un stat ou lire le fichier : dans un thread.
+        loop     = asyncio.get_running_loop()
+        sendfile = await loop.run_in_executor(None, static_cache.respond, req, path)
+        if sendfile is not None:
+            f, offset, count = sendfile
+            with f:
+                await loop.sendfile(req.writer.transport, f, offset, count)
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle_connection, host, port,
+                                            limit=MAX_HEADER_SIZE)
+        async with server:
+            await server.serve_forever()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Bibliothèque Université de Douala (asyncio)")
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--workers', type=int, default=WORKERS,
+                        help="threads de l'executor pour les controllers")
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    print(f"\n  Bibliothèque Université de Douala (asyncio)")
+    warm_up()
+    close_sessions = session.configure_store()
+    try:
+        asyncio.run(AsyncServer(args.workers).serve(HOST, args.port))
+    except KeyboardInterrupt:
+        print("\n  Serveur arrêté.")
+    finally:
+        close_sessions()
@@ -0,0 +1,256 @@
+"""
+asset_bundles.py — Bundles CSS/JS du layout, empreintes et manifeste
+layouts/layout.html chargeait 4 feuilles de style et 7 scripts séparés, sous
+des URL fixes : un aller-retour chacun, et aucun cache long possible.
+  - build() concatène les fichiers de chaque bundle (BUNDLES) en un seul
+    fichier nommé d'après son contenu : assets/bundles/layout.<hash>.css ;
+  - le manifeste assets/bundles/manifest.json associe nom logique → fichier ;
+  - dans les templates, {% asset "layout.css" %} produit la balise <link> ou
+    <script> du bundle (ou des fichiers sources si le bundle n'est pas construit) ;
+  - static_files envoie Cache-Control: immutable pour ces fichiers : une
+    nouvelle version a une nouvelle URL.
+Minification : la version .min fournie par chaque bibliothèque est utilisée
+quand elle existe ; le CSS restant passe par minify_css (commentaires et
+espaces), le JS n'est jamais réécrit (seuls les commentaires sourceMappingURL
+sont retirés, les .map ne correspondent plus au bundle).
+
+    python asset_bundles.py          # construit les bundles (aussi fait au démarrage)
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+ASSETS_DIR    = 'assets'
+BUNDLES_DIR   = os.path.join(ASSETS_DIR, 'bundles')
+MANIFEST_PATH = os.path.join(BUNDLES_DIR, 'manifest.json')
+
+# Nom logique → fichiers sources (relatifs à assets/), dans l'ordre de chargement
+BUNDLES = {
+    'layout.css': [
+        'utils/overlayscrollbars.min.css',
+        'utils/bootstrap-icons.min.css',
+        'css/adminlte.css',
+        'plugins/datatables/css/dataTables.bootstrap5.min.css',
+    ],
+    'layout.js': [
+        'plugins/jquery/jquery.min.js',
+        'utils/overlayscrollbars.browser.es6.min.js',
+        'utils/popper.min.js',
+        'utils/bootstrap.min.js',
+        'js/adminlte.js',
+        'plugins/datatables/js/dataTables.min.js',
+        'plugins/datatables/js/dataTables.bootstrap5.min.js',
+    ],
+}
+
+# layout.3f9a1c2b7d4e.css (et sa variante .gz) : nom de fichier à empreinte
+FINGERPRINT_RE = re.compile(r'\.[0-9a-f]{12}\.(?:css|js)(?:\.gz)?$')
+
+
+# ── Minification ──────────────────────────────────────────────────────────────
+
+# Chaînes et commentaires en un seul passage : on ne touche jamais l'intérieur d'une chaîne
+CSS_TOKEN_RE   = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|/\*.*?\*/)', re.DOTALL)
+CSS_SPACE_RE   = re.compile(r'\s+')
+CSS_PUNCT_RE   = re.compile(r'\s*([{};,>])\s*')
+CSS_URL_RE     = re.compile(r'url\(\s*(["\']?)([^"\')]+)\1\s*\)')
+CSS_CHARSET_RE = re.compile(r'@charset\s+"[^"]*";\s*', re.IGNORECASE)
+SOURCEMAP_RE   = re.compile(r'^\s*(?://[#@]\s*sourceMappingURL=.*|/\*[#@]\s*sourceMappingURL=.*?\*/)\s*$',
+                            re.MULTILINE)
+
+
+def minify_css(css: str) -> str:
+    """
+    Retire commentaires (sauf /*! licences */) et espaces superflus. Prudent :
+    les espaces autour de ':' et des opérateurs de calc() sont conservés.
+    """
+    out = []
+    for i, part in enumerate(CSS_TOKEN_RE.split(css)):
+        if i % 2:                                   # chaîne ou commentaire
+            if part.startswith('/*') and not part.startswith('/*!'):
+                continue
+            out.append(part)
+        else:
+            part = CSS_SPACE_RE.sub(' ', part)
+            out.append(CSS_PUNCT_RE.sub(r'\1', part).replace(';}', '}'))
+    return ''.join(out).strip()
+
+
+def rewrite_css_urls(css: str, source_dir: str) -> str:
+    """url(fonts/x.woff2) relatif au fichier source → relatif au dossier des bundles."""
+    def rewrite(m):
+        quote, url = m.group(1), m.group(2).strip()
+        if url.startswith(('/', 'data:', 'http:', 'https:', '#')):
+            return m.group(0)
+        path, sep, suffix = url.partition('?')
+        if not sep:
+            path, sep, suffix = url.partition('#')
+        target = os.path.normpath(os.path.join(source_dir, path))
+        rel    = os.path.relpath(target, BUNDLES_DIR).replace(os.sep, '/')
+        return f'url({quote}{rel}{sep}{suffix}{quote})'
+    return CSS_URL_RE.sub(rewrite, css)
+
+
+def _minified_source(relative):
+    """Version .min fournie par la bibliothèque si elle existe (css/adminlte.css → adminlte.min.css)."""
+    base, ext = os.path.splitext(relative)
+    if not base.endswith('.min'):
+        candidate = base + '.min' + ext
+        if os.path.isfile(os.path.join(ASSETS_DIR, candidate)):
+            return candidate
+    return relative
+
+
+def _read(relative):
+    with open(os.path.join(ASSETS_DIR, relative), encoding='utf-8') as f:
+        return f.read()
+
+
+def bundle_content(name, sources) -> bytes:
+    parts = []
+    for relative in sources:
+        relative = _minified_source(relative)
+        text     = SOURCEMAP_RE.sub('', _read(relative))
+        if name.endswith('.css'):
+            text = CSS_CHARSET_RE.sub('', text)
+            text = rewrite_css_urls(text, os.path.dirname(os.path.join(ASSETS_DIR, relative)))
+            parts.append(f'/* {relative} */\n' + minify_css(text))
+        else:
+            parts.append(f'/* {relative} */\n' + text.strip())
+    if name.endswith('.css'):
+        # @charset n'est valide qu'en tout début de fichier
+        return ('@charset "UTF-8";\n' + '\n'.join(parts) + '\n').encode('utf-8')
+    # ';' : un script qui se termine sans point-virgule ne se colle pas au suivant
+    return ('\n;\n'.join(parts) + '\n').encode('utf-8')
+
+
+# ── Construction ──────────────────────────────────────────────────────────────
+
+def _load_manifest() -> dict:
+    try:
+        with open(MANIFEST_PATH, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _up_to_date(manifest) -> bool:
+    """Manifeste présent, mêmes sources, aucun fichier source plus récent que lui."""
+    if set(manifest) != set(BUNDLES):
+        return False
+    try:
+        built_at = os.stat(MANIFEST_PATH).st_mtime_ns
+        for name, sources in BUNDLES.items():
+            entry = manifest[name]
+            if entry['sources'] != sources or not os.path.isfile(os.path.join(ASSETS_DIR, entry['file'])):
+                return False
+            for relative in sources:
+                if os.stat(os.path.join(ASSETS_DIR, _minified_source(relative))).st_mtime_ns > built_at:
+                    return False
+    except (OSError, KeyError, TypeError):
+        return False
+    return True
+
+
+def build(force=False) -> dict:
+    """
+    Construit les bundles si une source a changé ; retourne le manifeste
+    { nom: {"file", "sources", "size"} }. Les anciennes empreintes sont supprimées.
+    """
+    manifest = _load_manifest()
+    if not force and _up_to_date(manifest):
+        return manifest
+
+    os.makedirs(BUNDLES_DIR, exist_ok=True)
+    manifest = {}
+    for name, sources in BUNDLES.items():
+        content  = bundle_content(name, sources)
+        stem, ext = os.path.splitext(name)
+        filename = f"{stem}.{hashlib.sha256(content).hexdigest()[:12]}{ext}"
+        path     = os.path.join(BUNDLES_DIR, filename)
+        if not os.path.exists(path):
+            tmp = path + '.tmp'
+            with open(tmp, 'wb') as f:
+                f.write(content)
+            os.replace(tmp, path)
+        manifest[name] = {"file": f"bundles/{filename}", "sources": sources, "size": len(content)}
+
+    current = {os.path.basename(entry["file"]) for entry in manifest.values()}
+    for filename in os.listdir(BUNDLES_DIR):
+        if FINGERPRINT_RE.search(filename) and filename.removesuffix('.gz') not in current:
+            os.remove(os.path.join(BUNDLES_DIR, filename))
+
+    tmp = MANIFEST_PATH + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, MANIFEST_PATH)
+    return manifest
+
+
+# ── Balises dans les templates ────────────────────────────────────────────────
+
+class AssetManifest:
+    """
+    Lecture du manifeste pour {% asset "..." %}. Relu si le fichier change
+    (vérifié au plus une fois par seconde) : un build pendant que le serveur
+    tourne est pris en compte sans redémarrage.
+    """
+
+    CHECK_INTERVAL = 1.0
+
+    def __init__(self, path=MANIFEST_PATH):
+        self.path        = path
+        self._entries    = {}
+        self._mtime      = None
+        self._next_check = 0.0
+        self._lock       = threading.Lock()
+
+    def _refresh(self):
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        with self._lock:
+            self._next_check = now + self.CHECK_INTERVAL
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError:
+                self._entries, self._mtime = {}, None
+                return
+            if mtime != self._mtime:
+                self._entries, self._mtime = _load_manifest(), mtime
+
+    def urls(self, name) -> list:
+        """URL du bundle ; à défaut (bundles non construits), celles des sources."""
+        self._refresh()
+        entry = self._entries.get(name)
+        if entry is not None:
+            return ['/assets/' + entry['file']]
+        return ['/assets/' + relative for relative in BUNDLES.get(name, [name])]
+
+    def tag(self, name) -> str:
+        """Balise(s) HTML pour {% asset "layout.css" %}."""
+        if name.endswith('.css'):
+            return '\n'.join(f'<link rel="stylesheet" href="{url}" />' for url in self.urls(name))
+        return '\n'.join(f'<script src="{url}"></script>' for url in self.urls(name))
+
+
+# ── Instance globale ──────────────────────────────────────────────────────────
+asset_manifest = AssetManifest()
+
+
+def main():
+    start    = time.perf_counter()
+    manifest = build(force='--force' in sys.argv[1:])
+    for name, entry in manifest.items():
+        print(f"  [BUNDLE] {name} → {entry['file']} ({entry['size']} o, {len(entry['sources'])} fichiers)")
+    print(f"  [BUNDLE] Terminé en {(time.perf_counter() - start) * 1000:.0f} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,37 @@
+"""
+benchmarks/bench_router.py — Temps de Router.resolve selon le nombre de routes
+Le chemin résolu correspond à la DERNIÈRE route enregistrée (pire cas
+de l'ancien parcours linéaire). Avec l'arbre de segments, le temps doit
+rester stable quand le nombre de routes augmente.
+
+Lancement : python benchmarks/bench_router.py
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from router import Router
+
+SIZES   = (10, 100, 1000, 10000)
+NUMBER  = 20000
+
+
+def build(n):
+    router = Router()
+    for i in range(n):
+        router.add_route('GET',  f'/section{i}/:id/edit', lambda *a: None)
+        router.add_route('POST', f'/section{i}/:id', lambda *a: None)
+    return router
+
+
+if __name__ == '__main__':
+    print(f"  {'routes':>8}  {'µs / resolve':>14}")
+    for n in SIZES:
+        router = build(n)
+        path   = f'/section{n - 1}/42/edit'
+        assert router.resolve('GET', path)[1] == {"id": "42"}
+        t = timeit.timeit(lambda: router.resolve('GET', path), number=NUMBER)
+        print(f"  {n * 2:>8}  {t / NUMBER * 1e6:>14.2f}")
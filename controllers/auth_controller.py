@@ -1,10 +1,12 @@
 import hashlib
+import math
 from pydoc import html
 
-import bcrypt
 from controllers.base_controller import BaseController
 from session import session_manager
 from models.database import db
+from services.crypto_pool import verify_password, CryptoPoolBusy
+from services.throttle import email_throttle, ip_throttle
 
 class AuthController(BaseController):
 
@@ -28,16 +30,36 @@ class AuthController(BaseController):
             })
             return
         
-        # ── 3. Vérification en base ────────────────────────────────────────────
-        user = self._check_credentials(email, password)
+        # ── 3. Anti force brute : trop d'échecs récents → pas de bcrypt ────────
+        ip       = req.client_address[0]
+        wait     = max(ip_throttle.retry_after(ip), email_throttle.retry_after(email.lower()))
+        if wait:
+            minutes = math.ceil(wait / 60)
+            self.render(req, 'login.html', {
+                "error": f"Trop de tentatives de connexion. Réessayez dans {minutes} minute(s).",
+            }, status=429, headers={'Retry-After': math.ceil(wait)})
+            return
+
+        # ── 4. Vérification en base ────────────────────────────────────────────
+        try:
+            user = self._check_credentials(email, password)
+        except CryptoPoolBusy:
+            self.render(req, 'login.html', {
+                "error": "Trop de connexions simultanées. Réessayez dans quelques secondes.",
+            }, status=503, headers={'Retry-After': 2})
+            return
 
         if not user:
+            ip_throttle.failure(ip)
+            email_throttle.failure(email.lower())
             # Message volontairement vague (ne pas indiquer lequel est faux)
             self.render(req, 'login.html', {
                 "error": "Adresse email ou mot de passe incorrect.",
             })
             return
-        # ── 4. Créer la session ────────────────────────────────────────────────
+        email_throttle.reset(email.lower())
+
+        # ── 5. Créer la session ────────────────────────────────────────────────
         session_id = session_manager.create({
             "user_id": user['id'],
             "firstname": user['firstname'],
@@ -46,7 +68,7 @@ class AuthController(BaseController):
             "role":    user['role'],
         })
 
-        # ── 5. Écrire le cookie et rediriger vers le dashboard ─────────────────
+        # ── 6. Écrire le cookie et rediriger vers le dashboard ─────────────────
         req.send_response(302)
         req.send_header('Location', '/')
         session_manager.set_cookie(req, session_id)
@@ -65,6 +87,8 @@ class AuthController(BaseController):
         """
         Recherche l'utilisateur par email puis compare le hash du mot de passe.
         La requête SQL utilise un paramètre %s → protection contre l'injection SQL.
+        bcrypt tourne sur le pool de login (CryptoPoolBusy si saturé),
+        pas sur le thread qui sert la requête.
         """
         user = db.fetch_one(
             "SELECT * FROM users WHERE email = %s ",
@@ -76,12 +100,12 @@ class AuthController(BaseController):
         
         hash_en_base = user['password']
 
-        if isinstance(hash_en_base, str):
-            hash_en_base = hash_en_base.encode('utf-8')
+        if isinstance(hash_en_base, bytes):
+            hash_en_base = hash_en_base.decode('utf-8')
 
         # Comparer le hash SHA-256 du mot de passe saisi
         # hash_saisi = hashlib.sha256(password.encode('utf-8')).hexdigest()
-        if not bcrypt.checkpw(password.encode('utf-8'), hash_en_base):
+        if not verify_password(password, hash_en_base):
             return None
 
         return user
\ No newline at end of file
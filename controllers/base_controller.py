@@ -4,19 +4,35 @@ Fournit les helpers : send_html, redirect, get_body, get_query_params
 Tous les controllers héritent de cette classe.
 """
 
+from asset_bundles import asset_manifest
 from template_engine2 import TemplateEngine
 from urllib.parse import parse_qs
+import io
+import itertools
 import json
 
-engine = TemplateEngine(templates_dir='templates')
+engine = TemplateEngine(templates_dir='templates', asset_tag=asset_manifest.tag)
 
 
 class BaseController:
 
     # ── Rendu HTML ─────────────────────────────────────────────────────────────
 
-    def render(self, req, template, context=None, status=200):
-        """Rend un template et envoie la réponse HTML."""
+    def render(self, req, template, context=None, status=200, stream=False, headers=None):
+        """
+        Rend un template et envoie la réponse HTML.
+        stream=True : la page part par morceaux (Transfer-Encoding: chunked)
+        au fil du rendu, sans jamais être entièrement en mémoire.
+        headers : en-têtes supplémentaires (ex: {'Retry-After': 60}).
+        """
+        ctx = self._context(req, context)
+        if stream and req.request_version == 'HTTP/1.1':
+            self._send_chunked(req, status, engine.render_stream(template, ctx), headers)
+            return
+        html = engine.render(template, ctx)
+        self._send_html(req, status, html, headers)
+
+    def _context(self, req, context):
         ctx = context or {}
         # Injecter automatiquement les infos de session dans tous les templates
         session = getattr(req, 'session', {})
@@ -28,20 +44,43 @@ class BaseController:
         # Variable calculée : is_admin = True si admin, False sinon (pour afficher les liens d'admin dans la navbar)
         ctx.setdefault('is_staff', role in ['admin', 'bookkeeper'])
         ctx.setdefault('is_admin', role == 'admin')
-        html = engine.render(template, ctx)
-        self._send_html(req, status, html)
+        return ctx
 
     # ── Réponses HTTP ──────────────────────────────────────────────────────────
 
-    def _send_html(self, req, status, html):
+    def _send_html(self, req, status, html, headers=None):
         body = html.encode('utf-8')
         req.send_response(status)
+        for key, value in (headers or {}).items():
+            req.send_header(key, value)
         req.send_header('Content-Type', 'text/html; charset=utf-8')
         req.send_header('Content-Length', len(body))
         req.end_headers()
         req.wfile.write(body)
 
-    
+    def _send_chunked(self, req, status, chunks, headers=None):
+        # Premier morceau calculé avant le statut : une erreur de template
+        # (compilation, layout) remonte encore comme une erreur normale.
+        first  = next(chunks, '')
+        chunks = itertools.chain((first,), chunks)
+        req.send_response(status)
+        for key, value in (headers or {}).items():
+            req.send_header(key, value)
+        req.send_header('Content-Type', 'text/html; charset=utf-8')
+        req.send_header('Transfer-Encoding', 'chunked')
+        req.end_headers()
+        try:
+            for chunk in chunks:
+                data = chunk.encode('utf-8')
+                if data:
+                    req.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+        except Exception:
+            # Statut déjà envoyé : sans chunk final, le navigateur voit une
+            # réponse incomplète. On ferme la connexion.
+            req.close_connection = True
+            raise
+        req.wfile.write(b'0\r\n\r\n')
+
     def redirect(self, req, location):
         """Redirection HTTP 302."""
         req.send_response(302)
@@ -69,13 +108,61 @@ class BaseController:
         if length == 0:
             return {}
         raw = req.rfile.read(length).decode('utf-8')
+        req.body_consumed = True   # keep-alive : rien à vider après le controller
         parsed = parse_qs(raw)
         # parse_qs retourne {key: [val]} → on simplifie en {key: val}
         return {k: v[0] for k, v in parsed.items()}
 
+    def get_body_stream(self, req):
+        """
+        Corps de requête sous forme de flux binaire limité à Content-Length,
+        pour les gros envois (import CSV) lus sans tout charger en mémoire.
+        """
+        return _BodyStream(req, int(req.headers.get('Content-Length', 0) or 0))
+
+    def get_json(self, req):
+        """
+        Lit et parse un body JSON (appels AJAX / scanners du comptoir).
+        Retourne l'objet décodé, ou None si le body est absent ou invalide.
+        """
+        length = int(req.headers.get('Content-Length', 0))
+        if length == 0:
+            return None
+        raw = req.rfile.read(length)
+        req.body_consumed = True
+        try:
+            return json.loads(raw.decode('utf-8'))
+        except (UnicodeDecodeError, ValueError):
+            return None
+
     def get_query_params(self, query_string):
         """Parse les query params d'une URL (?page=1&q=python)."""
         if not query_string:
             return {}
         parsed = parse_qs(query_string)
-        return {k: v[0] for k, v in parsed.items()}
\ No newline at end of file
+        return {k: v[0] for k, v in parsed.items()}
+
+
+class _BodyStream(io.RawIOBase):
+    """Lit au plus `length` octets de req.rfile (la suite appartient à la requête suivante)."""
+
+    def __init__(self, req, length):
+        self._req       = req
+        self._remaining = length
+        if length == 0:
+            req.body_consumed = True
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._remaining <= 0:
+            return 0
+        data = self._req.rfile.read(min(len(buffer), self._remaining))
+        self._remaining -= len(data)
+        if not data:
+            self._remaining = 0
+        if self._remaining == 0:
+            self._req.body_consumed = True
+        buffer[:len(data)] = data
+        return len(data)
@@ -1,7 +1,9 @@
 
 import html
+import io
 from controllers.base_controller import BaseController
 from models.book import BookModel
+from services.book_import import import_books
 
 class BookController(BaseController):
 
@@ -16,7 +18,7 @@ class BookController(BaseController):
                 'title': 'Books',
                 "page_active": "books",
                 "books": books
-            })
+            }, stream=True)
         
     def get(self):
         # Récupérer les données nécessaires pour la page des livres
@@ -120,6 +122,20 @@ class BookController(BaseController):
                 "erreurs":     ["Une erreur inattendue s'est produite."],
             })
 
+    # POST /books/import — import CSV (corps text/csv, réponse JSON)
+    # curl --data-binary @catalogue.csv -H 'Content-Type: text/csv' .../books/import
+    def import_csv(self, req, params, qs):
+        if not int(req.headers.get('Content-Length', 0) or 0):
+            self.send_json(req, 400, {"error": "Corps CSV attendu."})
+            return
+        # Décodage ligne par ligne dans import_books : une erreur d'encodage
+        # est rapportée avec son numéro de ligne
+        stream = io.BufferedReader(self.get_body_stream(req))
+        report = import_books(stream)
+        print(f"  [IMPORT] {report.inserted} livres ajoutés ({report.rows_per_second:.0f} lignes/s)")
+        # 400 : fichier illisible à partir de report.error (les paquets précédents restent insérés)
+        self.send_json(req, 400 if report.error else 200, report.to_dict())
+
     # GET /books/:id/edit
     def edit(self, req, params, qs):
         book = self.model.find_by_id(params['id'])
@@ -158,7 +174,18 @@ class BookController(BaseController):
             })
             return
         
-        self.model.update(params['id'], data)
+        try:
+            self.model.update(params['id'], data)
+        except ValueError as e:
+            # Exception levée par le model (moins d'exemplaires que d'emprunts en cours)
+            self.render(req, 'books/add.html', {
+                "page_active": "livres",
+                "book":        data,
+                "action":      f"/books/{params['id']}",
+                "titre":       "Modifier un livre",
+                "erreurs":     [str(e)],
+            })
+            return
         self.redirect(req, '/books')
 
     # POST /books/:id/delete — supprimer
@@ -198,7 +225,7 @@ class BookController(BaseController):
         from models.borrow import BorrowModel
         borrow_model    = BorrowModel()
         active_borrows  = borrow_model.find_active_by_book(params['id'])
-        available       = book['copies'] - len(active_borrows)
+        available       = book['available_copies']
         
         self.render(req, 'books/show.html', {
             "page_active":    "livres",
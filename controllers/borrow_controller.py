@@ -1,10 +1,14 @@
 import html
 from controllers.base_controller import BaseController
-from models.borrow import BorrowModel
+from models.borrow import (
+    BorrowModel, MAX_BORROWS, CHECKOUT_OK, CHECKOUT_LIMIT_REACHED,
+    CHECKOUT_ALREADY_BORROWED, CHECKOUT_BOOK_NOT_FOUND, CHECKOUT_STUDENT_NOT_FOUND,
+    RETURN_OK,
+)
 from models.book   import BookModel
 from models.user   import UserModel
 
-MAX_BORROWS = 3   # règle métier : max 3 emprunts par étudiant
+BULK_MAX_ITEMS = 200   # éléments max par requête groupée (file du comptoir)
 
 
 class BorrowController(BaseController):
@@ -16,69 +20,113 @@ class BorrowController(BaseController):
 
     # GET /borrows
     def index(self, req, params, qs):
-        borrows  = self.model.find_all_with_details()
-        students = self.student_model.find_students()
-        books    = self.book_model.find_all()
+        self.render(req, 'borrows/index.html', self._index_context(), stream=True)
 
-        # Enrichir chaque livre avec ses exemplaires disponibles
-        for book in books:
-            borrowed       = self.model.count_active_by_book(book['id'])
-            book['available'] = book['copies'] - borrowed
-
-        self.render(req, 'borrows/index.html', {
+    def _index_context(self, **extra):
+        """
+        Contexte de borrows/index.html. Les exemplaires disponibles sont lus
+        dans books.available_copies : le nombre de requêtes ne dépend pas de
+        la taille du catalogue.
+        """
+        borrows = self.model.find_all_with_details()
+        context = {
             "page_active": "emprunts",
             "borrows":     borrows,
-            "students":    students,
-            "books":       [b for b in books if b['available'] > 0],
+            "students":    self.student_model.find_students(),
+            "books":       self.book_model.find_all_with_availability(only_available=True),
             "total":       len(borrows),
-        })
+        }
+        context.update(extra)
+        return context
 
     # POST /borrows
     def create(self, req, params, qs):
         data       = self.get_body(req)
         user_id    = html.escape(data.get('user_id',  '').strip())
         book_id    = html.escape(data.get('book_id',  '').strip())
-        erreur     = None
-
-        # ── Règle 1 : max 3 emprunts actifs ───────────────────────────────────
-        active = self.model.count_active_by_student(user_id)
-        if active >= MAX_BORROWS:
-            erreur = f"Cet étudiant a déjà {MAX_BORROWS} emprunts en cours. Retour obligatoire avant nouvel emprunt."
-
-        # ── Règle 1b : déjà ce livre en emprunt ───────────────────────────────
-        elif self.model.student_already_has_book(user_id, book_id):
-            erreur = "Cet étudiant a déjà emprunté ce livre."
-
-        # ── Règle 3 : disponibilité du livre ──────────────────────────────────
-        else:
-            book    = self.book_model.find_by_id(book_id)
-            borrowed = self.model.count_active_by_book(book_id)
-            if not book:
-                erreur = "Livre introuvable."
-            elif borrowed >= book['copies']:
-                erreur = f"Aucun exemplaire disponible pour \"{book['title']}\"."
-
-        if erreur:
-            borrows  = self.model.find_all_with_details()
-            students = self.student_model.find_students()
-            books    = self.book_model.find_all()
-            for b in books:
-                b['available'] = b['copies'] - self.model.count_active_by_book(b['id'])
-            self.render(req, 'borrows/index.html', {
-                "page_active": "emprunts",
-                "borrows":     borrows,
-                "students":    students,
-                "books":       [b for b in books if b['available'] > 0],
-                "total":       len(borrows),
-                "erreur":      erreur,
-            })
+
+        # Règles 1, 1b et 3 vérifiées et emprunt créé en une transaction
+        result = self.model.checkout(user_id, book_id)
+        if result.status != CHECKOUT_OK:
+            erreur = self._checkout_error(result)
+            self.render(req, 'borrows/index.html', self._index_context(erreur=erreur))
             return
 
-        # ── Tout est OK → créer l'emprunt ─────────────────────────────────────
-        self.model.create_borrow(user_id, book_id)
         self.redirect(req, '/borrows')
 
+    @staticmethod
+    def _checkout_error(result) -> str:
+        """Message affiché pour un refus de checkout()."""
+        if result.status == CHECKOUT_LIMIT_REACHED:
+            return f"Cet étudiant a déjà {MAX_BORROWS} emprunts en cours. Retour obligatoire avant nouvel emprunt."
+        if result.status == CHECKOUT_ALREADY_BORROWED:
+            return "Cet étudiant a déjà emprunté ce livre."
+        if result.status == CHECKOUT_BOOK_NOT_FOUND:
+            return "Livre introuvable."
+        if result.status == CHECKOUT_STUDENT_NOT_FOUND:
+            return "Étudiant introuvable."
+        return f"Aucun exemplaire disponible pour \"{result.book['title']}\"."
+
     # POST /borrows/:id/return
     def return_book(self, req, params, qs):
         self.model.return_book(params['id'])
-        self.redirect(req, '/borrows')
\ No newline at end of file
+        self.redirect(req, '/borrows')
+
+    # ── Comptoir : traitements groupés (JSON) ─────────────────────────────────
+
+    # POST /borrows/bulk
+    # {"items": [{"user_id": 3, "book_id": 12}, ...]}
+    def bulk_create(self, req, params, qs):
+        data  = self.get_json(req)
+        items = data.get('items') if isinstance(data, dict) else None
+        pairs = self._bulk_ids(items, ('user_id', 'book_id'))
+        if pairs is None:
+            self.send_json(req, 400, {"error": f"'items' doit être une liste de 1 à {BULK_MAX_ITEMS} "
+                                               "objets {user_id, book_id} entiers."})
+            return
+
+        results = self.model.bulk_checkout(pairs)
+        self.send_json(req, 200, {
+            "ok":      sum(r.status == CHECKOUT_OK for r in results),
+            "failed":  sum(r.status != CHECKOUT_OK for r in results),
+            "results": [{
+                "user_id":   user_id,
+                "book_id":   book_id,
+                "status":    r.status,
+                "borrow_id": r.borrow_id,
+                "message":   None if r.status == CHECKOUT_OK else self._checkout_error(r),
+            } for (user_id, book_id), r in zip(pairs, results)],
+        })
+
+    # POST /borrows/bulk-return
+    # {"borrow_ids": [41, 42, 57]}
+    def bulk_return(self, req, params, qs):
+        data = self.get_json(req)
+        ids  = self._bulk_ids(data.get('borrow_ids') if isinstance(data, dict) else None)
+        if ids is None:
+            self.send_json(req, 400, {"error": f"'borrow_ids' doit être une liste de 1 à {BULK_MAX_ITEMS} entiers."})
+            return
+
+        results = self.model.bulk_return(ids)
+        self.send_json(req, 200, {
+            "ok":      sum(status == RETURN_OK for _, status in results),
+            "failed":  sum(status != RETURN_OK for _, status in results),
+            "results": [{"borrow_id": borrow_id, "status": status} for borrow_id, status in results],
+        })
+
+    @staticmethod
+    def _bulk_ids(items, keys=None):
+        """
+        Valide une liste JSON et la convertit en entiers :
+          keys=None         → [41, 42]                 (liste d'id)
+          keys=('a', 'b')   → [(a1, b1), (a2, b2)]     (liste d'objets)
+        Retourne None si la liste est invalide.
+        """
+        if not isinstance(items, list) or not 0 < len(items) <= BULK_MAX_ITEMS:
+            return None
+        try:
+            if keys is None:
+                return [int(item) for item in items]
+            return [tuple(int(item[k]) for k in keys) for item in items]
+        except (TypeError, KeyError, ValueError):
+            return None
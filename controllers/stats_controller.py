@@ -0,0 +1,25 @@
+from controllers.base_controller import BaseController
+from models.database import db
+from server import connection_stats
+from session import session_stats
+from services.crypto_pool import login_stats
+from services.mail_queue import mail_queue
+from services.throttle import email_throttle, ip_throttle
+from static_files import static_cache
+from template_engine2 import fragment_cache
+
+
+class StatsController(BaseController):
+
+    # GET /stats — compteurs du serveur (JSON, route réservée aux admins)
+    def index(self, req, params, qs):
+        self.send_json(req, 200, {
+            "connections": connection_stats.snapshot(),
+            "fragments":   fragment_cache.stats(),
+            "db_pool":     db.pool_stats(),
+            "mail_queue":  mail_queue.stats(),
+            "sessions":    session_stats(),
+            "static":      static_cache.stats(),
+            "login":       dict(login_stats(), throttled_ips=ip_throttle.stats(),
+                                throttled_emails=email_throttle.stats()),
+        })
@@ -0,0 +1,17 @@
+-- ============================================================
+-- 001_books_available_copies.sql — Compteur d'exemplaires disponibles
+-- mysql -u root -p python_miage < database/migrations/001_books_available_copies.sql
+-- ============================================================
+
+ALTER TABLE books
+    ADD COLUMN available_copies INT NOT NULL DEFAULT 0 AFTER available;
+
+-- Valeur initiale : exemplaires - emprunts en cours
+UPDATE books b
+LEFT JOIN (
+    SELECT book_id, COUNT(*) AS borrowed
+    FROM borrows
+    WHERE returned_at IS NULL
+    GROUP BY book_id
+) bo ON bo.book_id = b.id
+SET b.available_copies = b.copies - COALESCE(bo.borrowed, 0);
@@ -36,6 +36,8 @@ CREATE TABLE IF NOT EXISTS books (
     publisher       VARCHAR(100),
     copies INT NOT NULL DEFAULT 1,
     available BOOLEAN NOT NULL DEFAULT TRUE,
+    -- exemplaires non empruntés, tenu à jour avec les emprunts (même transaction)
+    available_copies INT NOT NULL DEFAULT 0,
     created_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 
     -- ADD CONSTRAINT chk_copies CHECK (copies >= 0),
@@ -65,4 +67,6 @@ INSERT INTO books (title, author, isbn, publised_year, publisher, copies) VALUES
     ('Introduction aux algorithmes',  'Cormen et al.',    '978-0-262-03384-8', 2009, 'MIT Press', 13),
     ('Python Fluent',                 'Luciano Ramalho',  '978-1-491-94600-8', 2022, 'O\"Reilly Media', 7),
     ('Analyse mathématique',          'Walter Rudin',     '978-0-070-54235-8', 1976, 'McGraw-Hill', 6),
-    ('Le Code da Vinci',              'Dan Brown',        '978-2-709-62568-5', 2004, 'L\"Harmattan',   5);
\ No newline at end of file
+    ('Le Code da Vinci',              'Dan Brown',        '978-2-709-62568-5', 2004, 'L\"Harmattan',   5);
+
+UPDATE books SET available_copies = copies;
@@ -12,11 +12,15 @@ PUBLIC_ROUTES = ['/login', '/static']
 # Routes réservées à certains rôles
 PROTECTED_ROUTES = {
     '/books/add':   ['admin', 'bookkeeper'],
+    '/books/import': ['admin', 'bookkeeper'],
     '/students': ['admin', 'bookkeeper'],
     '/students/add': ['admin', 'bookkeeper'],
     '/students/edit': ['admin', 'bookkeeper'],
     '/students/delete': ['admin', 'bookkeeper'],
     '/users':   ['admin'],
+    '/borrows/bulk':        ['admin', 'bookkeeper'],
+    '/borrows/bulk-return': ['admin', 'bookkeeper'],
+    '/stats':   ['admin'],
 }
 
 def auth_required(handler_func):
@@ -74,20 +78,21 @@ def check_auth(req, path: str) -> bool:
     return False
 
 
-def _redirect_login(req):
+def _redirect(req, location):
+    """
+    302 sans corps. Content-Length: 0 est indispensable en HTTP/1.1 :
+    sans lui le navigateur attendrait la fermeture de la connexion keep-alive.
+    """
     req.send_response(302)
-    req.send_header('Location', '/login')
+    req.send_header('Location', location)
     req.send_header('Content-Length', '0')
     req.end_headers()
 
+def _redirect_login(req):
+    _redirect(req, '/login')
+
 def _redirect_dashboard(req):
-    req.send_response(302)
-    req.send_header('Location', '/')
-    req.send_header('Content-Length', '0')
-    req.end_headers()
+    _redirect(req, '/')
 
 def _redirect_forbidden(req):
-    req.send_response(302)
-    req.send_header('Location', '/forbidden')
-    req.send_header('Content-Length', '0')
-    req.end_headers()
\ No newline at end of file
+    _redirect(req, '/forbidden')
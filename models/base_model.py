@@ -2,12 +2,20 @@
 models/base_model.py — Model de base
 Fournit les opérations CRUD communes à tous les models.
 Chaque model fils définit : table, fields, required_fields.
+Les écritures (create / update / delete) rejoignent la transaction ouverte
+par l'appelant (with db.transaction(): ...) ; hors transaction, chacune est
+validée immédiatement.
 """
 
+from itertools import islice
+import re
+from mysql.connector import Error
 from models.database import Database
 
 db = Database()
 
+DUPLICATE_KEY = 1062   # code MySQL : Duplicate entry for unique key
+
 class BaseModel:
 
     table           = ''      # nom de la table MySQL
@@ -64,13 +72,19 @@ class BaseModel:
         """
         from mysql.connector import Error
         
-        filtered = {k: v for k, v in data.items() if k in self.fields}
+        filtered = self._insert_values(data)
         columns  = ', '.join(filtered.keys())
         placeholders = ', '.join(['%s'] * len(filtered))
         sql = f"INSERT INTO {self.table} ({columns}) VALUES ({placeholders})"
         
         try:
-            return db.execute(sql, tuple(filtered.values()))
+            if not db.in_transaction():
+                # INSERT seul en autocommit : pas de START TRANSACTION / COMMIT
+                return db.execute(sql, tuple(filtered.values()))
+            # SAVEPOINT dans une transaction ouverte : un doublon n'annule
+            # pas le travail déjà fait par l'appelant
+            with db.transaction():
+                return db.execute(sql, tuple(filtered.values()))
         except Error as e:
             # Code 1062 = Duplicate entry for unique key
             if e.errno == 1062:
@@ -86,6 +100,94 @@ class BaseModel:
                 # Autre erreur MySQL
                 raise
 
+    def _insert_values(self, data: dict) -> dict:
+        """
+        Colonnes insérées pour data (create et bulk_create).
+        Un model fils peut la surcharger pour ajouter des colonnes dérivées.
+        """
+        return {k: v for k, v in data.items() if k in self.fields}
+
+    def bulk_create(self, rows, unique_fields=(), chunk_size=1000) -> dict:
+        """
+        Insère un grand nombre d'enregistrements (rows : itérable de dicts,
+        consommé au fur et à mesure, jamais chargé en entier).
+        Par paquet de chunk_size : une requête par champ unique pour écarter
+        les doublons, un INSERT multi-lignes (executemany) et un seul COMMIT.
+        Retourne {"inserted": n, "duplicates": [(index, champ, valeur), ...]}
+        où index est la position de la ligne dans rows (champ None et valeur =
+        message d'erreur si la contrainte violée n'est pas dans unique_fields).
+        """
+        result = {"inserted": 0, "duplicates": []}
+        rows   = enumerate(rows)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                return result
+            self._bulk_insert_chunk(chunk, unique_fields, result)
+
+    def _bulk_insert_chunk(self, chunk, unique_fields, result):
+        pending = [(index, self._insert_values(data)) for index, data in chunk]
+
+        # Doublons : valeurs déjà en base (y compris les paquets précédents,
+        # déjà validés) ou répétées plus haut dans ce paquet
+        for field in unique_fields:
+            values   = list({v[field] for _, v in pending if v.get(field)})
+            existing = set()
+            if values:
+                rows = db.fetch_all(f"""
+                    SELECT {field} FROM {self.table}
+                    WHERE {field} IN ({', '.join(['%s'] * len(values))})
+                """, tuple(values))
+                existing = {row[field] for row in rows}
+            kept = []
+            for index, v in pending:
+                value = v.get(field)
+                if value and value in existing:
+                    result["duplicates"].append((index, field, value))
+                    continue
+                existing.add(value)
+                kept.append((index, v))
+            pending = kept
+
+        # executemany exige les mêmes colonnes : un lot par jeu de colonnes
+        groups = {}
+        for index, v in pending:
+            groups.setdefault(tuple(v), []).append((index, v))
+
+        try:
+            with db.transaction():
+                for columns, items in groups.items():
+                    sql = (f"INSERT INTO {self.table} ({', '.join(columns)}) "
+                           f"VALUES ({', '.join(['%s'] * len(columns))})")
+                    db.executemany(sql, [tuple(v.values()) for _, v in items])
+            result["inserted"] += len(pending)
+        except Error as e:
+            if e.errno != DUPLICATE_KEY:
+                raise
+            # Insertion concurrente entre le contrôle et l'INSERT :
+            # on rejoue le paquet ligne par ligne pour isoler les doublons
+            with db.transaction():
+                for index, v in pending:
+                    try:
+                        self.create(v)
+                        result["inserted"] += 1
+                    except ValueError as dup:
+                        # Erreur MySQL d'origine : "Duplicate entry 'x' for key 'users.email'"
+                        field = self._duplicate_field(dup.__context__, unique_fields)
+                        if field:
+                            result["duplicates"].append((index, field, v.get(field)))
+                        else:
+                            result["duplicates"].append((index, None, str(dup)))
+
+    @staticmethod
+    def _duplicate_field(error, unique_fields):
+        """Champ de unique_fields cité par une erreur 1062, ou None."""
+        message = str(error or '')
+        for field in unique_fields:
+            if re.search(rf"for key '(?:\w+\.)?{re.escape(field)}'", message):
+                return field
+        return None
+
     def update(self, record_id, data: dict):
         """Met à jour un enregistrement existant."""
         filtered = {k: v for k, v in data.items() if k in self.fields}
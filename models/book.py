@@ -20,14 +20,96 @@ class BookModel(BaseModel):
         like = f"%{term}%"
         return db.fetch_all(sql, (like, like, like, like))
     
+    # ── Écriture : available_copies suit copies ───────────────────────────────
+
+    def _insert_values(self, data: dict) -> dict:
+        """Un nouveau livre n'a aucun emprunt : available_copies = copies."""
+        values = super()._insert_values(data)
+        copies = values.get('copies')
+        # copies absent → défaut de la colonne (1) ; 0 reste 0
+        values['available_copies'] = 1 if copies is None else copies
+        return values
+
+    def update(self, record_id, data: dict):
+        """
+        Changer copies recalcule available_copies = copies - emprunts en cours.
+        Lève ValueError si copies est inférieur au nombre d'exemplaires empruntés.
+        """
+        with db.transaction():
+            if data.get('copies') not in (None, ''):
+                try:
+                    copies = int(data['copies'])
+                except (TypeError, ValueError):
+                    raise ValueError("Le nombre d'exemplaires doit être un entier.")
+                db.fetch_one("SELECT id FROM books WHERE id = %s FOR UPDATE", (record_id,))
+                borrowed = self._count_borrowed(record_id)
+                if copies < borrowed:
+                    raise ValueError(f"Impossible de descendre à {copies} exemplaire(s) : "
+                                     f"{borrowed} sont actuellement empruntés.")
+                db.execute("UPDATE books SET available_copies = %s WHERE id = %s",
+                           (copies - borrowed, record_id))
+            super().update(record_id, data)
+
+    def _count_borrowed(self, book_id) -> int:
+        """
+        Emprunts en cours du livre, en lecture verrouillante (dans une
+        transaction, après le FOR UPDATE sur le livre) : dernière version
+        validée, jamais l'instantané de la transaction.
+        """
+        return db.fetch_one("""
+            SELECT COUNT(*) as total FROM borrows
+            WHERE book_id = %s AND returned_at IS NULL
+            LOCK IN SHARE MODE
+        """, (book_id,))['total']
+
+    # ── Disponibilité (lecture du compteur available_copies) ──────────────────
+
+    def find_all_with_availability(self, only_available=False, order_by='created_at DESC'):
+        """Livres avec leurs exemplaires disponibles (clé 'available')."""
+        where = "WHERE available_copies > 0" if only_available else ""
+        return db.fetch_all(f"""
+            SELECT *, available_copies AS available
+            FROM books
+            {where}
+            ORDER BY {order_by}
+        """)
+
     def count_available(self) -> int:
         """Nombre total d'exemplaires disponibles."""
-        result = db.fetch_one("""
-            SELECT SUM(b.copies) - COUNT(bo.id) as total
+        result = db.fetch_one("SELECT SUM(available_copies) as total FROM books")
+        return result['total'] if result and result['total'] else 0
+
+    def reconcile_available_copies(self) -> list:
+        """
+        Répare les écarts entre available_copies et copies - emprunts en cours
+        (modification manuelle en base, ancienne version de l'application...).
+        Chaque livre est corrigé sous verrou de ligne : un emprunt concurrent
+        ne peut pas s'intercaler entre le comptage et la correction.
+        Retourne la liste des livres corrigés.
+        """
+        drift = db.fetch_all("""
+            SELECT b.id
             FROM books b
             LEFT JOIN borrows bo ON bo.book_id = b.id AND bo.returned_at IS NULL
+            GROUP BY b.id
+            HAVING MAX(b.available_copies) <> MAX(b.copies) - COUNT(bo.id)
         """)
-        return result['total'] if result and result['total'] else 0
+        fixed = []
+        for row in drift:
+            with db.transaction():
+                book = db.fetch_one("""
+                    SELECT id, title, copies, available_copies FROM books
+                    WHERE id = %s FOR UPDATE
+                """, (row['id'],))
+                if not book:
+                    continue
+                borrowed = self._count_borrowed(book['id'])
+                expected = max(0, book['copies'] - borrowed)
+                if expected != book['available_copies']:
+                    db.execute("UPDATE books SET available_copies = %s WHERE id = %s",
+                               (expected, book['id']))
+                    fixed.append({**book, "expected": expected})
+        return fixed
 
     def find_recent(self, limit=5):
         """Derniers livres ajoutés."""
@@ -1,8 +1,33 @@
+from collections import namedtuple
 from models.base_model import BaseModel
 from models.database import Database
 
 db = Database()
 
+MAX_BORROWS = 3   # règle métier : max 3 emprunts par étudiant
+
+# ── Résultats de checkout() ───────────────────────────────────────────────────
+CHECKOUT_OK                = 'ok'
+CHECKOUT_LIMIT_REACHED     = 'limit_reached'      # Règle 1  : MAX_BORROWS atteint
+CHECKOUT_ALREADY_BORROWED  = 'already_borrowed'   # Règle 1b : déjà ce livre
+CHECKOUT_BOOK_NOT_FOUND    = 'book_not_found'
+CHECKOUT_STUDENT_NOT_FOUND = 'student_not_found'
+CHECKOUT_UNAVAILABLE       = 'unavailable'        # Règle 3  : plus d'exemplaire
+
+# status : un des CHECKOUT_* ; borrow_id si OK ; book (dict) si le livre existe
+CheckoutResult = namedtuple('CheckoutResult', ['status', 'borrow_id', 'book'])
+
+# ── Résultats de bulk_return() ────────────────────────────────────────────────
+RETURN_OK               = 'returned'
+RETURN_NOT_FOUND        = 'not_found'
+RETURN_ALREADY_RETURNED = 'already_returned'
+
+
+def _placeholders(values) -> str:
+    """[4, 8, 15] → '%s, %s, %s' (clause IN paramétrée)."""
+    return ', '.join(['%s'] * len(values))
+
+
 class BorrowModel(BaseModel):
     table           = 'borrows'
     fields          = ['user_id', 'book_id', 'borrowed_at', 'due_date', 'returned_at']
@@ -37,20 +62,215 @@ class BorrowModel(BaseModel):
 
     # ── Création d'un emprunt ─────────────────────────────────────────────────
 
+    def checkout(self, user_id, book_id, max_borrows=MAX_BORROWS) -> CheckoutResult:
+        """
+        Vérifie toutes les règles et crée l'emprunt dans une seule transaction.
+        1. SELECT ... FOR UPDATE sur les lignes books et users : deux emprunts
+           simultanés du dernier exemplaire (ou du même étudiant) sont
+           sérialisés ;
+        2. emprunts en cours de l'étudiant, lus APRÈS l'obtention des verrous
+           par une lecture simple : l'instantané InnoDB est pris à la
+           première lecture non verrouillante, donc après le FOR UPDATE —
+           le second emprunt voit celui du premier, déjà validé. Pas de
+           LOCK IN SHARE MODE : ses verrous de trou (gap) sur borrows
+           faisaient se bloquer (deadlock 1213) les INSERT de deux étudiants
+           voisins dans l'index ; le verrou de la ligne users suffit.
+        Doit ouvrir la transaction (ou l'appelant ne doit pas avoir lu avant).
+        """
+        with db.transaction():
+            row = db.fetch_one("""
+                SELECT bk.id, bk.title, bk.copies, bk.available_copies,
+                       u.id AS student_id
+                FROM books bk
+                LEFT JOIN users u ON u.id = %s
+                WHERE bk.id = %s
+                FOR UPDATE
+            """, (user_id, book_id))
+
+            if row is None:
+                return CheckoutResult(CHECKOUT_BOOK_NOT_FOUND, None, None)
+            book = {k: row[k] for k in ('id', 'title', 'copies', 'available_copies')}
+            if row['student_id'] is None:
+                return CheckoutResult(CHECKOUT_STUDENT_NOT_FOUND, None, book)
+
+            active = db.fetch_one("""
+                SELECT COUNT(*) AS active, COALESCE(SUM(book_id = %s), 0) AS same_book
+                FROM borrows
+                WHERE user_id = %s AND returned_at IS NULL
+            """, (book['id'], user_id))
+            if active['active'] >= max_borrows:
+                return CheckoutResult(CHECKOUT_LIMIT_REACHED, None, book)
+            if active['same_book']:
+                return CheckoutResult(CHECKOUT_ALREADY_BORROWED, None, book)
+            if row['available_copies'] <= 0:
+                return CheckoutResult(CHECKOUT_UNAVAILABLE, None, book)
+
+            # Lignes verrouillées : la décrémentation ne peut plus échouer
+            db.execute("""
+                UPDATE books SET available_copies = available_copies - 1
+                WHERE id = %s
+            """, (book['id'],))
+            borrow_id = db.execute("""
+                INSERT INTO borrows (user_id, book_id, borrowed_at, due_date)
+                VALUES (%s, %s, CURDATE(), DATE_ADD(CURDATE(), INTERVAL 7 DAY))
+            """, (user_id, book['id']))
+            return CheckoutResult(CHECKOUT_OK, borrow_id, book)
+
     def create_borrow(self, user_id, book_id) -> int:
-        """Crée un emprunt avec due_date = aujourd'hui + 7 jours."""
-        return db.execute("""
-            INSERT INTO borrows (user_id, book_id, borrowed_at, due_date)
-            VALUES (%s, %s, CURDATE(), DATE_ADD(CURDATE(), INTERVAL 7 DAY))
-        """, (user_id, book_id))
+        """
+        Crée un emprunt avec due_date = aujourd'hui + 7 jours et décrémente
+        books.available_copies dans la même transaction.
+        Lève ValueError si plus aucun exemplaire n'est disponible.
+        """
+        with db.transaction():
+            taken = db.execute_rowcount("""
+                UPDATE books SET available_copies = available_copies - 1
+                WHERE id = %s AND available_copies > 0
+            """, (book_id,))
+            if not taken:
+                raise ValueError("Aucun exemplaire disponible.")
+            return db.execute("""
+                INSERT INTO borrows (user_id, book_id, borrowed_at, due_date)
+                VALUES (%s, %s, CURDATE(), DATE_ADD(CURDATE(), INTERVAL 7 DAY))
+            """, (user_id, book_id))
+
+    def bulk_checkout(self, pairs, max_borrows=MAX_BORROWS) -> list:
+        """
+        checkout() pour une file d'emprunts [(user_id, book_id), ...] en une
+        seule transaction et un nombre fixe de requêtes :
+          1. verrou (FOR UPDATE, ordre des id) des livres puis des étudiants ;
+          2. emprunts en cours de ces étudiants (lecture simple après les
+             verrous : l'instantané est pris à ce moment, cf. checkout) ;
+          3. règles appliquées en mémoire, dans l'ordre de la file (un
+             étudiant qui prend 2 livres compte le 1er pour le 2e) ;
+          4. INSERT multi-lignes + mise à jour des compteurs.
+        Les éléments refusés n'empêchent pas les autres.
+        Retourne une CheckoutResult par paire, dans l'ordre.
+        """
+        pairs = list(pairs)
+        if not pairs:
+            return []
+        book_ids = sorted({book_id for _, book_id in pairs})
+        user_ids = sorted({user_id for user_id, _ in pairs})
+
+        with db.transaction():
+            books = {row['id']: row for row in db.fetch_all(f"""
+                SELECT id, title, copies, available_copies FROM books
+                WHERE id IN ({_placeholders(book_ids)})
+                ORDER BY id FOR UPDATE
+            """, tuple(book_ids))}
+            students = {row['id'] for row in db.fetch_all(f"""
+                SELECT id FROM users
+                WHERE id IN ({_placeholders(user_ids)})
+                ORDER BY id FOR UPDATE
+            """, tuple(user_ids))}
+            active = {}
+            for row in db.fetch_all(f"""
+                SELECT user_id, book_id FROM borrows
+                WHERE user_id IN ({_placeholders(user_ids)}) AND returned_at IS NULL
+            """, tuple(user_ids)):
+                active.setdefault(row['user_id'], set()).add(row['book_id'])
+
+            statuses, taken = [], {}
+            for user_id, book_id in pairs:
+                book   = books.get(book_id)
+                status = CHECKOUT_OK
+                if book is None:
+                    status = CHECKOUT_BOOK_NOT_FOUND
+                elif user_id not in students:
+                    status = CHECKOUT_STUDENT_NOT_FOUND
+                elif len(active.get(user_id, ())) >= max_borrows:
+                    status = CHECKOUT_LIMIT_REACHED
+                elif book_id in active.get(user_id, ()):
+                    status = CHECKOUT_ALREADY_BORROWED
+                elif book['available_copies'] <= 0:
+                    status = CHECKOUT_UNAVAILABLE
+                else:
+                    book['available_copies'] -= 1
+                    active.setdefault(user_id, set()).add(book_id)
+                    taken[book_id] = taken.get(book_id, 0) + 1
+                statuses.append(status)
+
+            accepted = [pair for pair, status in zip(pairs, statuses) if status == CHECKOUT_OK]
+            borrow_ids = {}
+            if accepted:
+                db.executemany("""
+                    INSERT INTO borrows (user_id, book_id, borrowed_at, due_date)
+                    VALUES (%s, %s, CURDATE(), DATE_ADD(CURDATE(), INTERVAL 7 DAY))
+                """, accepted)
+                db.executemany("""
+                    UPDATE books SET available_copies = available_copies - %s
+                    WHERE id = %s
+                """, [(count, book_id) for book_id, count in taken.items()])
+                # Un seul emprunt en cours par (étudiant, livre) : on retrouve les id
+                for row in db.fetch_all(f"""
+                    SELECT id, user_id, book_id FROM borrows
+                    WHERE user_id IN ({_placeholders(user_ids)}) AND returned_at IS NULL
+                """, tuple(user_ids)):
+                    borrow_ids[(row['user_id'], row['book_id'])] = row['id']
+
+        return [
+            CheckoutResult(status, borrow_ids.get(pair) if status == CHECKOUT_OK else None,
+                           books.get(pair[1]))
+            for pair, status in zip(pairs, statuses)
+        ]
 
     # ── Retour d'un livre ─────────────────────────────────────────────────────
 
     def return_book(self, borrow_id):
-        db.execute("""
-            UPDATE borrows SET returned_at = CURDATE()
-            WHERE id = %s AND returned_at IS NULL
-        """, (borrow_id,))
+        """Clôt l'emprunt et rend l'exemplaire (available_copies + 1), atomiquement."""
+        with db.transaction():
+            returned = db.execute_rowcount("""
+                UPDATE borrows SET returned_at = CURDATE()
+                WHERE id = %s AND returned_at IS NULL
+            """, (borrow_id,))
+            if returned:
+                db.execute("""
+                    UPDATE books SET available_copies = available_copies + 1
+                    WHERE id = (SELECT book_id FROM borrows WHERE id = %s)
+                """, (borrow_id,))
+
+    def bulk_return(self, borrow_ids) -> list:
+        """
+        Retour d'une pile de livres en une transaction : les emprunts sont
+        verrouillés et lus en une requête, clôturés en une autre, et chaque
+        livre concerné récupère ses exemplaires en une seule mise à jour.
+        Retourne [(borrow_id, RETURN_*), ...] dans l'ordre reçu.
+        """
+        borrow_ids = list(borrow_ids)
+        if not borrow_ids:
+            return []
+        unique = sorted(set(borrow_ids))
+
+        with db.transaction():
+            rows = {row['id']: row for row in db.fetch_all(f"""
+                SELECT id, book_id, returned_at FROM borrows
+                WHERE id IN ({_placeholders(unique)})
+                ORDER BY id FOR UPDATE
+            """, tuple(unique))}
+
+            results, to_return, given_back = [], [], {}
+            for borrow_id in borrow_ids:
+                row = rows.get(borrow_id)
+                if row is None:
+                    results.append((borrow_id, RETURN_NOT_FOUND))
+                elif row['returned_at'] is not None or borrow_id in to_return:
+                    results.append((borrow_id, RETURN_ALREADY_RETURNED))
+                else:
+                    results.append((borrow_id, RETURN_OK))
+                    to_return.append(borrow_id)
+                    given_back[row['book_id']] = given_back.get(row['book_id'], 0) + 1
+
+            if to_return:
+                db.execute(f"""
+                    UPDATE borrows SET returned_at = CURDATE()
+                    WHERE id IN ({_placeholders(to_return)})
+                """, tuple(to_return))
+                db.executemany("""
+                    UPDATE books SET available_copies = available_copies + %s
+                    WHERE id = %s
+                """, [(count, book_id) for book_id, count in sorted(given_back.items())])
+        return results
 
     # ── Liste complète avec détails ───────────────────────────────────────────
 
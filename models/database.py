@@ -1,20 +1,215 @@
 """
-database.py — Connexion MySQL (singleton)
+database.py — Connexion MySQL (singleton + pool de connexions)
 Utilise mysql-connector-python.
 Installation : pip install mysql-connector-python
 """
 from dotenv import load_dotenv
 import mysql.connector
 from mysql.connector import Error
+from collections import deque
+from contextlib import contextmanager
 import os
+import threading
+import time
 
 load_dotenv()
 
+# Codes MySQL « connexion perdue » : la connexion est jetée et recréée
+CONNECTION_LOST = {2006, 2013, 2055}
+
+
+class PoolTimeout(Error):
+    """Aucune connexion libérée dans le délai imparti (pool saturé)."""
+
+
+def _is_connection_lost(e):
+    return isinstance(e, mysql.connector.InterfaceError) or getattr(e, 'errno', None) in CONNECTION_LOST
+
+
+# ── Pool de connexions ─────────────────────────────────────────────────────────
+
+class _PooledConnection:
+    """Une connexion du pool et son état de santé."""
+
+    __slots__ = ('conn', 'created_at', 'last_used', 'uses', 'errors')
+
+    def __init__(self, conn):
+        self.conn       = conn
+        self.created_at = time.monotonic()
+        self.last_used  = self.created_at
+        self.uses       = 0
+        self.errors     = 0
+
+
+class ConnectionPool:
+    """
+    Pool borné de connexions MySQL partagé par les threads du serveur.
+    - min_size    : connexions ouvertes dès la première utilisation
+    - max_size    : au-delà, acquire() attend qu'une connexion se libère
+    - timeout     : attente maximale (PoolTimeout ensuite)
+    - idle_check  : une connexion inactive depuis plus longtemps est vérifiée
+                    (ping) avant d'être rendue ; les autres ne coûtent aucun
+                    aller-retour supplémentaire.
+    """
+
+    def __init__(self, config, min_size=1, max_size=10, timeout=5.0, idle_check=60.0):
+        self.config     = config
+        self.min_size   = min_size
+        self.max_size   = max(max_size, min_size, 1)
+        self.timeout    = timeout
+        self.idle_check = idle_check
+
+        self._cond   = threading.Condition()
+        self._idle   = deque()
+        self._size   = 0           # connexions ouvertes (libres + utilisées)
+        self._filled = False
+        self._pid    = os.getpid()
+        self._stats  = {"in_use": 0, "created": 0, "discarded": 0, "errors": 0,
+                        "waits": 0, "wait_time": 0.0, "timeouts": 0}
+
+    # ── Emprunt / restitution ──────────────────────────────────────────────────
+
+    def acquire(self) -> _PooledConnection:
+        self._check_fork()
+        if not self._filled:
+            self._fill()
+
+        start = None
+        with self._cond:
+            while True:
+                if self._idle:
+                    pooled = self._idle.pop()
+                    self._stats["in_use"] += 1
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    self._stats["in_use"] += 1
+                    pooled = None
+                    break
+                # Pool saturé → attendre une restitution
+                now = time.monotonic()
+                if start is None:
+                    start = now
+                    self._stats["waits"] += 1
+                remaining = self.timeout - (now - start)
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    self._stats["wait_time"] += now - start
+                    raise PoolTimeout(msg=f"Pool MySQL saturé ({self.max_size} connexions)")
+                self._cond.wait(remaining)
+            if start is not None:
+                self._stats["wait_time"] += time.monotonic() - start
+
+        try:
+            if pooled is None:
+                pooled = self._open()
+            elif time.monotonic() - pooled.last_used > self.idle_check and not pooled.conn.is_connected():
+                self._discard(pooled)
+                pooled = self._open()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._stats["in_use"] -= 1
+                self._cond.notify()
+            raise
+
+        pooled.uses += 1
+        return pooled
+
+    def release(self, pooled, broken=False):
+        """Rend la connexion ; broken=True → elle est fermée et remplacée plus tard."""
+        with self._cond:
+            self._stats["in_use"] -= 1
+            if broken:
+                pooled.errors += 1
+                self._size -= 1
+                self._stats["errors"]    += 1
+                self._stats["discarded"] += 1
+            else:
+                pooled.last_used = time.monotonic()
+                self._idle.append(pooled)
+            self._cond.notify()
+        if broken:
+            self._discard(pooled)
+
+    # ── Gestion ────────────────────────────────────────────────────────────────
+
+    def _open(self):
+        try:
+            conn = mysql.connector.connect(**self.config)
+        except Error as e:
+            print(f"  [DB] Erreur de connexion : {e}")
+            raise
+        with self._cond:
+            self._stats["created"] += 1
+        print("  [DB] Connexion MySQL établie.")
+        return _PooledConnection(conn)
+
+    def _discard(self, pooled):
+        try:
+            pooled.conn.close()
+        except Exception:
+            pass
+
+    def _fill(self):
+        """Ouvre min_size connexions (à la première utilisation, pas à l'import)."""
+        with self._cond:
+            if self._filled:
+                return
+            self._filled = True
+            missing      = max(0, self.min_size - self._size)
+            self._size  += missing
+        for _ in range(missing):
+            try:
+                pooled = self._open()
+            except Error:
+                with self._cond:
+                    self._size -= 1
+                continue
+            with self._cond:
+                self._idle.append(pooled)
+                self._cond.notify()
+
+    def _check_fork(self):
+        """Après un fork, les sockets du parent ne doivent pas être réutilisées."""
+        if self._pid != os.getpid():
+            with self._cond:
+                self._pid    = os.getpid()
+                self._idle   = deque()
+                self._size   = 0
+                self._filled = False
+                self._stats["in_use"] = 0
+
+    def close_all(self):
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+            self._size -= len(idle)
+        for pooled in idle:
+            self._discard(pooled)
+
+    def stats(self) -> dict:
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                "size":     self._size,
+                "idle":     len(self._idle),
+                "max_size": self.max_size,
+            })
+        stats["wait_time"] = round(stats["wait_time"], 4)
+        return stats
+
+
+# ── Façade ─────────────────────────────────────────────────────────────────────
+
 class Database:
     """
-    Singleton : une seule connexion partagée dans toute l'application.
+    Singleton : un seul objet Database partagé dans toute l'application.
+    Chaque requête SQL emprunte une connexion au pool puis la rend ;
+    une connexion n'est donc jamais utilisée par deux threads à la fois.
     """
     _instance = None
+    _lock     = threading.Lock()
+    _local    = threading.local()    # connexion réservée par transaction()
 
     # ── Config ─────────────────────────────────────────────────────────────────
     CONFIG = {
@@ -24,35 +219,130 @@ class Database:
         'user':     os.getenv('DB_USER'),
         'password': os.getenv('DB_PASSWORD'),
         'charset':  'utf8mb4',
-        'autocommit': False,
+        # Chaque requête hors transaction() est validée seule : une connexion
+        # rendue au pool ne garde ni transaction ouverte ni vue figée (snapshot
+        # REPEATABLE READ) — la lecture suivante voit les dernières écritures.
+        'autocommit': True,
     }
 
+    POOL_MIN     = int(os.getenv('DB_POOL_MIN', 1))
+    POOL_MAX     = int(os.getenv('DB_POOL_MAX', 10))
+    POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 5))
+
     def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-            cls._instance._connexion = None
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
+                cls._instance.pool = ConnectionPool(cls.CONFIG, cls.POOL_MIN,
+                                                    cls.POOL_MAX, cls.POOL_TIMEOUT)
         return cls._instance
 
     # ── Connexion ──────────────────────────────────────────────────────────────
 
-    def connect(self):
-        """Ouvre la connexion si elle n'est pas déjà ouverte."""
+    def close(self):
+        self.pool.close_all()
+        print("  [DB] Connexions MySQL fermées.")
+
+    def pool_stats(self) -> dict:
+        return self.pool.stats()
+
+    # ── Transactions ───────────────────────────────────────────────────────────
+
+    def in_transaction(self) -> bool:
+        return getattr(self._local, 'pooled', None) is not None
+
+    @contextmanager
+    def transaction(self):
+        """
+        Unité de travail : START TRANSACTION, puis les requêtes du bloc
+        partagent une connexion et un seul COMMIT :
+            with db.transaction():
+                db.execute(...)
+                db.execute(...)
+        ROLLBACK si une exception remonte.
+        Imbrication : un transaction() intérieur pose un SAVEPOINT ; son
+        échec n'annule que son propre travail si l'appelant rattrape l'erreur.
+        """
+        if self.in_transaction():
+            with self._savepoint():
+                yield
+            return
+
+        pooled = self.pool.acquire()
+        broken = False
         try:
-            if self._connexion is None or not self._connexion.is_connected():
-                self._connexion = mysql.connector.connect(**self.CONFIG)
-                print("  [DB] Connexion MySQL établie.")
+            pooled.conn.start_transaction()
         except Error as e:
-            print(f"  [DB] Erreur de connexion : {e}")
+            self.pool.release(pooled, broken=_is_connection_lost(e))
             raise
+        self._local.pooled = pooled
+        self._local.depth  = 0
+        try:
+            yield
+            pooled.conn.commit()
+        except BaseException as e:
+            broken = isinstance(e, Error) and _is_connection_lost(e)
+            if not broken:
+                try:
+                    pooled.conn.rollback()
+                except Error as rollback_error:
+                    broken = _is_connection_lost(rollback_error)
+            raise
+        finally:
+            self._local.pooled = None
+            self.pool.release(pooled, broken=broken)
 
-    def get_connection(self):
-        self.connect()
-        return self._connexion
+    @contextmanager
+    def _savepoint(self):
+        self._local.depth += 1
+        name   = f"sp_{self._local.depth}"
+        cursor = self._local.pooled.conn.cursor()
+        try:
+            cursor.execute(f"SAVEPOINT {name}")
+            try:
+                yield
+            except BaseException:
+                cursor.execute(f"ROLLBACK TO SAVEPOINT {name}")
+                raise
+            cursor.execute(f"RELEASE SAVEPOINT {name}")
+        finally:
+            cursor.close()
+            self._local.depth -= 1
 
-    def close(self):
-        if self._connexion and self._connexion.is_connected():
-            self._connexion.close()
-            print("  [DB] Connexion MySQL fermée.")
+    def _run(self, operation, label, retry):
+        """
+        Exécute operation(conn) sur une connexion du pool.
+        Connexion perdue (serveur redémarré, wait_timeout...) → la connexion
+        est jetée ; pour une lecture (retry=True) on rejoue une fois sur une
+        nouvelle connexion. Une écriture n'est jamais rejouée.
+        Dans une transaction, la connexion réservée est utilisée, sans rejeu.
+        """
+        pinned = getattr(self._local, 'pooled', None)
+        if pinned is not None:
+            try:
+                return operation(pinned.conn)
+            except Error as e:
+                print(f"  [DB] Erreur {label} : {e}")
+                raise
+
+        for attempt in (1, 2):
+            pooled = self.pool.acquire()
+            try:
+                result = operation(pooled.conn)
+            except Error as e:
+                lost = _is_connection_lost(e)
+                self.pool.release(pooled, broken=lost)
+                if lost:
+                    # Serveur redémarré ou wait_timeout : les connexions libres
+                    # ouvertes avant sont très probablement mortes elles aussi
+                    self.pool.close_all()
+                if lost and retry and attempt == 1:
+                    print(f"  [DB] Connexion perdue ({e}), nouvelle tentative.")
+                    continue
+                print(f"  [DB] Erreur {label} : {e}")
+                raise
+            self.pool.release(pooled)
+            return result
 
     # ── Exécution de requêtes ──────────────────────────────────────────────────
 
@@ -61,48 +351,70 @@ class Database:
         Exécute INSERT / UPDATE / DELETE.
         Retourne le lastrowid.
         """
-        conn   = self.get_connection()
-        cursor = conn.cursor()
-        try:
-            cursor.execute(query, params or ())
-            conn.commit()
-            return cursor.lastrowid
-        except Error as e:
-            conn.rollback()
-            print(f"  [DB] Erreur execute : {e}")
-            raise
-        finally:
-            cursor.close()
+        return self._write(query, params, lambda cursor: cursor.lastrowid)
+
+    def execute_rowcount(self, query, params=None) -> int:
+        """
+        Comme execute, mais retourne le nombre de lignes modifiées
+        (ex: UPDATE ... WHERE stock > 0 → 0 si la condition a échoué).
+        """
+        return self._write(query, params, lambda cursor: cursor.rowcount)
+
+    def executemany(self, query, seq_params) -> int:
+        """
+        Exécute la même requête d'écriture pour chaque jeu de paramètres
+        (les INSERT sont regroupés en un seul INSERT multi-lignes par le driver).
+        Retourne le nombre de lignes modifiées.
+        """
+        seq_params = list(seq_params)
+        if not seq_params:
+            return 0
+        return self._write(query, seq_params, lambda cursor: cursor.rowcount, many=True)
+
+    def _write(self, query, params, result, many=False):
+        # Hors transaction : validée immédiatement (autocommit) ; plusieurs
+        # requêtes (executemany) restent tout-ou-rien dans une transaction
+        if many and not self.in_transaction():
+            with self.transaction():
+                return self._write(query, params, result, many)
+
+        def operation(conn):
+            cursor = conn.cursor()
+            try:
+                if many:
+                    cursor.executemany(query, params)
+                else:
+                    cursor.execute(query, params or ())
+                return result(cursor)
+            finally:
+                cursor.close()
+        return self._run(operation, 'execute', retry=False)
 
     def fetch_one(self, query, params=None):
         """
         Exécute un SELECT et retourne une ligne sous forme de dict.
         """
-        conn   = self.get_connection()
-        cursor = conn.cursor(dictionary=True)
-        try:
-            cursor.execute(query, params or ())
-            return cursor.fetchone()
-        except Error as e:
-            print(f"  [DB] Erreur fetch_one : {e}")
-            raise
-        finally:
-            cursor.close()
+        def operation(conn):
+            cursor = conn.cursor(dictionary=True)
+            try:
+                cursor.execute(query, params or ())
+                return cursor.fetchone()
+            finally:
+                cursor.close()
+        return self._run(operation, 'fetch_one', retry=True)
 
     def fetch_all(self, query, params=None):
         """
         Exécute un SELECT et retourne toutes les lignes sous forme de liste de dicts.
         """
-        conn   = self.get_connection()
-        cursor = conn.cursor(dictionary=True)
-        try:
-            cursor.execute(query, params or ())
-            return cursor.fetchall()
-        except Error as e:
-            print(f"  [DB] Erreur fetch_all : {e}")
-            raise
-        finally:
-            cursor.close()
+        def operation(conn):
+            cursor = conn.cursor(dictionary=True)
+            try:
+                cursor.execute(query, params or ())
+                return cursor.fetchall()
+            finally:
+                cursor.close()
+        return self._run(operation, 'fetch_all', retry=True)
 
 # ── Instance globale ───────────────────────────────────────────────────────────
-db = Database()
\ No newline at end of file
+db = Database()
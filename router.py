@@ -1,44 +1,108 @@
+from collections import namedtuple
+
+# Une route enregistrée. meta : métadonnées libres (ex: roles=['admin'])
+Route = namedtuple('Route', ['method', 'pattern', 'handler', 'meta'])
+
+
+class _Node:
+    """Nœud de l'arbre : un segment de chemin."""
+
+    __slots__ = ('static', 'param', 'route', 'param_names')
+
+    def __init__(self):
+        self.static      = {}     # segment fixe → _Node  (lookup dict)
+        self.param       = None   # enfant ':param' (un seul par niveau)
+        self.route       = None   # Route si un pattern se termine ici
+        self.param_names = ()     # noms des ':param' du pattern, dans l'ordre
+
 
 class Router:
 
     def __init__(self):
-        # Liste de tuples (method, pattern, handler)
+        # Liste de Route (ordre d'enregistrement, pour l'introspection)
         self.routes = []
+        # Un arbre de segments par méthode HTTP : { 'GET': _Node, ... }
+        self._trees = {}
+
+    def add_route(self, method, pattern, handler, **meta):
+        """
+        Compile le pattern dans l'arbre de la méthode.
+        /books/:id/edit  →  racine → 'books' → :param → 'edit'
+        """
+        route = Route(method.upper(), pattern, handler, meta)
+        self.routes.append(route)
+
+        node  = self._trees.setdefault(route.method, _Node())
+        names = []
+        for segment in self._split(pattern):
+            if segment.startswith(':'):
+                names.append(segment[1:])
+                if node.param is None:
+                    node.param = _Node()
+                node = node.param
+            else:
+                node = node.static.setdefault(segment, _Node())
 
-    def add_route(self, method, pattern, handler):
-        self.routes.append((method.upper(), pattern, handler))
+        # Comme l'ancien parcours linéaire : la première route enregistrée gagne
+        if node.route is None:
+            node.route       = route
+            node.param_names = tuple(names)
 
     def resolve(self, method, path):
         """
         Cherche le handler correspondant à (method, path).
         Retourne (handler, params) ou (None, {}).
         """
-        for route_method, pattern, handler in self.routes:
-            if route_method != method.upper():
-                continue
-            params = self._match(pattern, path)
-            if params is not None:
-                return handler, params
-        return None, {}
-    
-    def _match(self, pattern, path):
-        """
-        Compare un pattern et un path segment par segment.
-        /livres/:id  vs  /livres/42  →  {"id": "42"}
-        /livres      vs  /livres     →  {}
-        /livres      vs  /etudiants  →  None
-        """
-        p_parts = pattern.rstrip('/').split('/')
-        r_parts = path.rstrip('/').split('/')
-
-        if len(p_parts) != len(r_parts):
-            return None
-
-        params = {}
-        for p, r in zip(p_parts, r_parts):
-            if p.startswith(':'):
-                params[p[1:]] = r       # segment dynamique
-            elif p != r:
-                return None             # segment fixe différent
-        return params
-    
\ No newline at end of file
+        route, params = self.match(method, path)
+        if route is None:
+            return None, {}
+        return route.handler, params
+
+    def match(self, method, path):
+        """
+        Comme resolve, mais retourne (Route, params) pour accéder aux
+        métadonnées de la route. (None, {}) si aucune route.
+        Coût : O(profondeur du chemin), indépendant du nombre de routes.
+        """
+        root = self._trees.get(method.upper())
+        if root is None:
+            return None, {}
+        values = []
+        node   = self._walk(root, self._split(path), 0, values)
+        if node is None:
+            return None, {}
+        return node.route, dict(zip(node.param_names, values))
+
+    def _walk(self, node, segments, i, values):
+        """
+        Descend l'arbre segment par segment.
+        Un segment fixe est prioritaire sur ':param' (/books/add avant /books/:id) ;
+        si la branche fixe n'aboutit pas, on retente via ':param'.
+        """
+        if i == len(segments):
+            return node if node.route is not None else None
+
+        segment = segments[i]
+        child   = node.static.get(segment)
+        if child is not None:
+            found = self._walk(child, segments, i + 1, values)
+            if found is not None:
+                return found
+
+        if node.param is not None:
+            values.append(segment)              # segment dynamique
+            found = self._walk(node.param, segments, i + 1, values)
+            if found is not None:
+                return found
+            values.pop()
+        return None
+
+    @staticmethod
+    def _split(path):
+        """
+        /livres/42  →  ['livres', '42']
+        /livres/    →  ['livres']
+        /           →  []
+        """
+        path = path.rstrip('/')
+        return path.split('/')[1:] if path else []
@@ -0,0 +1,339 @@
+"""
+server.py — Serveurs HTTP concurrents
+Le HTTPServer de la stdlib traite une requête à la fois : un login bcrypt
+ou un envoi de mail bloque tous les autres utilisateurs.
+ThreadPoolHTTPServer distribue les connexions sur un pool de threads borné,
+avec une file d'attente limitée (backpressure) et un 503 quand tout est plein.
+Une connexion n'occupe un thread que pendant une requête : entre deux
+requêtes (keep-alive), elle attend dans un sélecteur, pas dans un worker.
+serve_prefork lance N processus workers qui acceptent sur la même socket,
+pour que le rendu des templates (limité par le GIL) utilise tous les cœurs.
+"""
+
+import multiprocessing
+import multiprocessing.connection
+import os
+import queue
+import selectors
+import signal
+import socket
+import threading
+import time
+from http.server import HTTPServer
+
+DEFAULT_WORKERS    = 16
+DEFAULT_QUEUE_SIZE = 64
+
+# Keep-alive : délai d'inactivité avant fermeture d'une connexion persistante
+KEEPALIVE_TIMEOUT      = float(os.environ.get("KEEPALIVE_TIMEOUT", 5))
+MAX_KEEPALIVE_REQUESTS = int(os.environ.get("MAX_KEEPALIVE_REQUESTS", 100))
+
+# Réponse brute envoyée quand le pool est saturé (pas de thread disponible
+# pour passer par MainHandler → on écrit directement sur la socket).
+_BODY_503 = "Serveur surchargé, veuillez réessayer.".encode('utf-8')
+RESPONSE_503 = (
+    b"HTTP/1.1 503 Service Unavailable\r\n"
+    b"Content-Type: text/plain; charset=utf-8\r\n"
+    b"Retry-After: 1\r\n"
+    b"Connection: close\r\n"
+    b"Content-Length: " + str(len(_BODY_503)).encode() + b"\r\n"
+    b"\r\n" + _BODY_503
+)
+
+
+# ── Statistiques keep-alive ───────────────────────────────────────────────────
+
+class ConnectionStats:
+    """Compte les connexions et le nombre de requêtes portées par chacune."""
+
+    BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+    def __init__(self):
+        self._lock        = threading.Lock()
+        self.connections  = 0
+        self.requests     = 0
+        self.max_requests = 0
+        self.histogram    = {b: 0 for b in self.BUCKETS}
+        self.histogram['more'] = 0
+
+    def record(self, requests: int):
+        """Appelé à la fermeture d'une connexion."""
+        with self._lock:
+            self.connections  += 1
+            self.requests     += requests
+            self.max_requests  = max(self.max_requests, requests)
+            for b in self.BUCKETS:
+                if requests <= b:
+                    self.histogram[b] += 1
+                    break
+            else:
+                self.histogram['more'] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "pid":                     os.getpid(),
+                "connections":             self.connections,
+                "requests":                self.requests,
+                "requests_per_connection": round(self.requests / self.connections, 2) if self.connections else 0,
+                "max_requests":            self.max_requests,
+                "histogram":               {f"<={k}" if k != 'more' else f">{self.BUCKETS[-1]}": v
+                                            for k, v in self.histogram.items()},
+            }
+
+
+connection_stats = ConnectionStats()
+
+
+class ThreadPoolHTTPServer(HTTPServer):
+    """
+    HTTPServer dont les connexions sont traitées par un pool de threads.
+    - workers    : nombre de threads qui exécutent MainHandler
+    - queue_size : connexions prêtes en attente d'un thread libre
+    Au-delà, la connexion reçoit immédiatement un 503.
+
+    Une connexion sans requête en cours (nouvelle, ou keep-alive entre deux
+    requêtes) attend dans un sélecteur (thread keepalive) et ne passe dans la
+    file qu'une fois des données arrivées : des connexions inactives ne
+    bloquent jamais les workers. Sans activité pendant KEEPALIVE_TIMEOUT,
+    elle est fermée. Le handler rend sa connexion via park() quand il
+    positionne handler.idle (voir MainHandler).
+    """
+
+    daemon_threads = True
+
+    def __init__(self, server_address, handler_class,
+                 workers=DEFAULT_WORKERS, queue_size=DEFAULT_QUEUE_SIZE,
+                 bind_and_activate=True, keepalive_timeout=KEEPALIVE_TIMEOUT):
+        super().__init__(server_address, handler_class, bind_and_activate)
+        self.workers           = workers
+        self.keepalive_timeout = keepalive_timeout
+        self._queue   = queue.Queue(maxsize=queue_size)
+        self._threads = []
+        self._lock    = threading.Lock()
+        self.stats    = {"accepted": 0, "rejected": 0, "busy": 0, "idle": 0}
+
+        # Connexions inactives : (request, client_address, handler ou None)
+        self._selector    = selectors.DefaultSelector()
+        self._parking     = queue.SimpleQueue()     # à enregistrer par le thread keepalive
+        self._idle        = {}                      # socket → (item, échéance), par échéance croissante
+        self._closing     = False
+        self._wakeup_r, self._wakeup_w = socket.socketpair()
+        self._wakeup_w.setblocking(False)
+        self._selector.register(self._wakeup_r, selectors.EVENT_READ)
+
+        for i in range(workers):
+            t = threading.Thread(target=self._worker, name=f"http-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        self._watcher = threading.Thread(target=self._watch, name="http-keepalive", daemon=True)
+        self._watcher.start()
+
+    # ── Distribution des connexions ───────────────────────────────────────────
+
+    def process_request(self, request, client_address):
+        """Appelé par serve_forever() pour chaque connexion acceptée."""
+        with self._lock:
+            self.stats["accepted"] += 1
+        self._park_item((request, client_address, None))
+
+    def park(self, handler):
+        """Connexion keep-alive sans requête en attente : retour au sélecteur."""
+        self._park_item((handler.request, handler.client_address, handler))
+
+    def _park_item(self, item):
+        self._parking.put(item)
+        try:
+            self._wakeup_w.send(b'\0')
+        except (BlockingIOError, OSError):
+            pass                # réveil déjà en attente, ou serveur fermé
+
+    def _dispatch(self, item):
+        """Données arrivées : la connexion passe dans la file des workers."""
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self._reject(item)
+
+    def _reject(self, item):
+        """File pleine → 503 et fermeture, sans bloquer le thread keepalive."""
+        with self._lock:
+            self.stats["rejected"] += 1
+        try:
+            item[0].sendall(RESPONSE_503)
+        except OSError:
+            pass
+        self._close(item)
+
+    def _close(self, item):
+        request, client_address, handler = item
+        if handler is not None:
+            handler.idle = False
+            try:
+                handler.finish()
+            except OSError:
+                pass
+        self.shutdown_request(request)
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            request, client_address, handler = item
+            with self._lock:
+                self.stats["busy"] += 1
+            try:
+                if handler is None:
+                    handler = self.RequestHandlerClass(request, client_address, self)
+                else:
+                    handler.resume()
+            except Exception:
+                handler = None
+                self.handle_error(request, client_address)
+            finally:
+                if handler is not None and getattr(handler, 'idle', False):
+                    self.park(handler)
+                else:
+                    self.shutdown_request(request)
+                with self._lock:
+                    self.stats["busy"] -= 1
+
+    # ── Connexions inactives (thread keepalive) ───────────────────────────────
+
+    def _watch(self):
+        while not self._closing:
+            timeout = None
+            if self._idle:
+                deadline = next(iter(self._idle.values()))[1]
+                timeout  = max(0.0, deadline - time.monotonic())
+            for key, _ in self._selector.select(timeout):
+                if key.fileobj is self._wakeup_r:
+                    try:
+                        self._wakeup_r.recv(4096)
+                    except OSError:
+                        pass
+                    continue
+                self._selector.unregister(key.fileobj)
+                item, _ = self._idle.pop(key.fileobj)
+                self._dispatch(item)
+
+            # Connexions rendues par les workers ou tout juste acceptées
+            while True:
+                try:
+                    item = self._parking.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    self._selector.register(item[0], selectors.EVENT_READ)
+                except (ValueError, OSError):      # socket déjà fermée
+                    self._close(item)
+                    continue
+                self._idle[item[0]] = (item, time.monotonic() + self.keepalive_timeout)
+
+            # Échéances dans l'ordre d'insertion : on s'arrête à la première à venir
+            now = time.monotonic()
+            while self._idle:
+                sock, (item, deadline) = next(iter(self._idle.items()))
+                if deadline > now:
+                    break
+                del self._idle[sock]
+                self._selector.unregister(sock)
+                self._close(item)
+
+            with self._lock:
+                self.stats["idle"] = len(self._idle)
+
+    # ── Arrêt ─────────────────────────────────────────────────────────────────
+
+    def server_close(self):
+        super().server_close()
+        self._closing = True
+        try:
+            self._wakeup_w.send(b'\0')
+        except OSError:
+            pass
+        self._watcher.join(timeout=1)
+        for item, _ in list(self._idle.values()):
+            self._close(item)
+        self._idle.clear()
+        self._selector.close()
+        self._wakeup_r.close()
+        self._wakeup_w.close()
+        for _ in self._threads:
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                break
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+
+# ── Pré-fork multi-processus ──────────────────────────────────────────────────
+
+RESTART_DELAY = 1.0   # pause avant de relancer un worker mort trop vite
+
+
+def cpu_workers(value) -> int:
+    """'auto' ou 0 → nombre de cœurs ; sinon l'entier demandé."""
+    if value in (None, '', 'auto', '0', 0):
+        return os.cpu_count() or 1
+    return max(1, int(value))
+
+
+def _run_worker(make_server, sock):
+    """Point d'entrée d'un worker : sert sur la socket héritée du superviseur."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)    # Ctrl+C géré par le superviseur
+    signal.signal(signal.SIGTERM, lambda *_: os._exit(0))
+    server = make_server(bind_and_activate=False)
+    server.socket.close()
+    server.socket = sock
+    server.server_address = sock.getsockname()
+    print(f"  [WORKER {os.getpid()}] prêt")
+    server.serve_forever()
+
+
+def _raise_interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def serve_prefork(make_server, address, processes, backlog=128):
+    """
+    Superviseur : ouvre la socket d'écoute une seule fois, forke `processes`
+    workers qui font accept() dessus, et relance tout worker qui meurt.
+    make_server(bind_and_activate=False) doit construire le serveur d'un worker.
+    """
+    sock = socket.create_server(address, backlog=backlog)
+    ctx  = multiprocessing.get_context('fork')
+
+    def spawn():
+        p = ctx.Process(target=_run_worker, args=(make_server, sock))
+        p.start()
+        p.started_at = time.monotonic()
+        return p
+
+    # SIGTERM sur le superviseur → même arrêt propre que Ctrl+C
+    signal.signal(signal.SIGTERM, _raise_interrupt)
+    workers = [spawn() for _ in range(processes)]
+    print(f"  [SUPERVISEUR {os.getpid()}] {processes} workers sur {address[0]}:{address[1]}")
+
+    try:
+        while True:
+            multiprocessing.connection.wait([p.sentinel for p in workers])
+            for i, p in enumerate(workers):
+                if p.is_alive():
+                    continue
+                print(f"  [SUPERVISEUR] worker {p.pid} arrêté (code {p.exitcode}), relance")
+                if time.monotonic() - p.started_at < RESTART_DELAY:
+                    time.sleep(RESTART_DELAY)
+                workers[i] = spawn()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        for p in workers:
+            p.terminate()
+        for p in workers:
+            p.join(timeout=5)
+        sock.close()
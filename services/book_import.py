@@ -0,0 +1,187 @@
+"""
+services/book_import.py — Import du catalogue depuis un fichier CSV
+Le fichier est lu ligne à ligne (csv.DictReader sur un flux) et inséré par
+paquets via BookModel.bulk_create : la mémoire utilisée ne dépend pas de la
+taille du fichier (dons de plusieurs dizaines de milliers de titres).
+Un fichier mal encodé (UTF-8 attendu) ou un CSV illisible interrompt
+l'import : les paquets déjà insérés restent, le rapport indique la ligne
+fautive (report.error).
+
+Colonnes reconnues (en-tête obligatoire) :
+    title, author, isbn, published_year, genre, publisher, copies
+
+Ligne de commande :
+    python -m services.book_import catalogue.csv [--chunk 1000]
+Depuis l'application : POST /books/import (corps text/csv).
+"""
+
+import argparse
+import codecs
+import csv
+import sys
+import time
+
+from models.book import BookModel
+
+CHUNK_SIZE        = 1000
+MAX_REPORTED_ROWS = 100     # lignes rejetées détaillées dans le rapport
+COLUMNS           = ('title', 'author', 'isbn', 'published_year', 'genre', 'publisher', 'copies')
+
+
+class ImportReport:
+    """Compteurs d'un import, mis à jour au fil du flux."""
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.rows       = 0
+        self.inserted   = 0
+        self.duplicates = 0
+        self.invalid    = 0
+        self.rejected   = []    # (ligne, message) — limité à MAX_REPORTED_ROWS
+        self.error      = None  # (ligne, message) si la lecture a été interrompue
+
+    def reject(self, line, message):
+        if len(self.rejected) < MAX_REPORTED_ROWS:
+            self.rejected.append((line, message))
+
+    def abort(self, line, message):
+        self.error = (line, message)
+        print(f"  [IMPORT] Interrompu ligne {line} : {message}")
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "rows":            self.rows,
+            "inserted":        self.inserted,
+            "duplicates":      self.duplicates,
+            "invalid":         self.invalid,
+            "elapsed":         round(self.elapsed, 3),
+            "rows_per_second": round(self.rows_per_second, 1),
+            "rejected":        [{"line": line, "message": message} for line, message in self.rejected],
+            "error":           {"line": self.error[0], "message": self.error[1]} if self.error else None,
+        }
+
+
+class _DecodedLines:
+    """
+    Lignes d'un flux binaire décodées une par une (UTF-8, BOM accepté) : une
+    erreur d'encodage est rattachée à sa ligne du fichier (self.line), ce que
+    ne permet pas io.TextIOWrapper qui décode par blocs de 8 Ko.
+    """
+
+    def __init__(self, stream, encoding='utf-8-sig'):
+        self.stream  = stream
+        self.decoder = codecs.getincrementaldecoder(encoding)()
+        self.line    = 0      # dernière ligne lue dans le fichier
+
+    def __iter__(self):
+        for raw in self.stream:
+            self.line += 1
+            yield self.decoder.decode(raw)
+        tail = self.decoder.decode(b'', final=True)
+        if tail:
+            yield tail
+
+
+def _clean(row) -> dict:
+    """Ligne CSV → dict de BookModel (chaînes nettoyées, champs vides retirés)."""
+    data = {k: (row.get(k) or '').strip() for k in COLUMNS}
+    return {k: v for k, v in data.items() if v or k in BookModel.required_fields}
+
+
+def _validate(data):
+    """Message d'erreur de la ligne, ou None si elle est valide."""
+    erreurs = BookModel().validate(data)
+    if erreurs:
+        return ' '.join(erreurs)
+    for field in ('copies', 'published_year'):
+        if field in data and not data[field].isdigit():
+            return f"Le champ '{field}' doit être un entier positif."
+    return None
+
+
+def import_books(stream, chunk_size=CHUNK_SIZE, progress=None) -> ImportReport:
+    """
+    Importe les livres d'un flux binaire CSV (UTF-8, ouvert en 'rb').
+    progress(report) est appelé après chaque paquet inséré.
+    """
+    report = ImportReport()
+    source = _DecodedLines(stream)
+    reader = csv.DictReader(source)
+    model  = BookModel()
+
+    # Numéro de ligne du fichier pour chaque ligne envoyée à bulk_create
+    lines = []
+
+    def valid_rows():
+        while True:
+            try:
+                row = next(reader)
+            except StopIteration:
+                return
+            except UnicodeDecodeError:
+                report.abort(source.line, "Encodage invalide (UTF-8 attendu).")
+                return
+            except csv.Error as e:
+                report.abort(source.line, f"CSV invalide : {e}.")
+                return
+            report.rows += 1
+            data  = _clean(row)
+            error = _validate(data)
+            if error:
+                report.invalid += 1
+                report.reject(reader.line_num, error)
+                continue
+            lines.append(reader.line_num)
+            yield data
+
+    rows = valid_rows()
+    while True:
+        # Un paquet à la fois : bulk_create ne voit jamais tout le fichier
+        del lines[:]
+        chunk = [row for _, row in zip(range(chunk_size), rows)]
+        if not chunk:
+            break
+        result = model.bulk_create(chunk, unique_fields=('isbn',), chunk_size=chunk_size)
+        report.inserted += result["inserted"]
+        for index, field, value in result["duplicates"]:
+            report.duplicates += 1
+            report.reject(lines[index], f"ISBN déjà présent : {value}" if field else value)
+        if progress:
+            progress(report)
+    return report
+
+
+# ── Ligne de commande ──────────────────────────────────────────────────────────
+
+def _print_progress(report):
+    print(f"  [IMPORT] {report.rows} lignes lues, {report.inserted} insérées "
+          f"({report.rows_per_second:.0f} lignes/s)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import du catalogue depuis un CSV")
+    parser.add_argument('file', help="fichier CSV (UTF-8, avec en-tête)")
+    parser.add_argument('--chunk', type=int, default=CHUNK_SIZE, help="lignes par paquet inséré")
+    args = parser.parse_args(argv)
+
+    with open(args.file, 'rb') as f:
+        report = import_books(f, args.chunk, progress=_print_progress)
+
+    for line, message in report.rejected:
+        print(f"  [IMPORT] ligne {line} : {message}")
+    print(f"  [IMPORT] Terminé : {report.inserted} livres ajoutés, {report.duplicates} doublons, "
+          f"{report.invalid} lignes invalides en {report.elapsed:.1f}s "
+          f"({report.rows_per_second:.0f} lignes/s)")
+    return 1 if report.error else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
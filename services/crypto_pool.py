@@ -0,0 +1,159 @@
+"""
+services/crypto_pool.py — bcrypt sur des pools de processus
+bcrypt est volontairement lent (~0,25 s par mot de passe au coût 12) et
+tient le GIL pendant le calcul : exécuté dans un thread du serveur, il
+ralentit toutes les autres requêtes.
+  - hash_passwords  : hachage en masse (inscriptions), réparti sur tous les cœurs ;
+  - verify_password : vérification au login, sur un pool dédié et borné —
+    au-delà de LOGIN_WORKERS + LOGIN_QUEUE vérifications en cours,
+    CryptoPoolBusy est levée (le controller répond 503) au lieu d'empiler.
+Un processus du pool qui meurt (OOM, kill) rend tout le pool inutilisable
+(BrokenProcessPool) : il est alors remplacé et le calcul relancé une fois.
+Les processus sont lancés en 'spawn' : ils n'héritent pas des threads ni
+des connexions MySQL du serveur. Ils réimportent en revanche le module
+principal sous le nom __mp_main__ (app.py, ou le script lancé : ses imports
+et son code de niveau module — controllers, routes — s'exécutent dans chaque
+processus, ~0,1 s au démarrage du pool). Ce code ne doit donc ouvrir ni
+socket ni connexion : le démarrage du serveur reste sous
+if __name__ == '__main__'.
+Avec le pré-fork, chaque processus serveur a ses propres pools.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import bcrypt
+
+BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', 12))     # 12 = défaut de bcrypt.gensalt()
+HASH_WORKERS  = int(os.getenv('HASH_WORKERS', 0)) or os.cpu_count() or 1
+
+LOGIN_WORKERS = int(os.getenv('LOGIN_WORKERS', 0)) or max(1, (os.cpu_count() or 2) // 2)
+LOGIN_QUEUE   = int(os.getenv('LOGIN_QUEUE', 32))       # vérifications en attente d'un processus
+LOGIN_TIMEOUT = float(os.getenv('LOGIN_TIMEOUT', 10))
+
+_pools      = {}
+_pools_lock = threading.Lock()
+
+
+class CryptoPoolBusy(Exception):
+    """Trop de vérifications en cours : réessayer plus tard (503)."""
+
+
+def _hash(password: str, rounds: int) -> str:
+    """Exécuté dans un processus du pool."""
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def _check(password: str, hashed: str) -> bool:
+    """Exécuté dans un processus du pool."""
+    try:
+        return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+    except ValueError:          # hash invalide en base
+        return False
+
+
+def get_pool(name='hash', workers=HASH_WORKERS) -> ProcessPoolExecutor:
+    """Pool créé à la première utilisation (le serveur web n'en paie pas le coût sinon)."""
+    with _pools_lock:
+        if name not in _pools:
+            _pools[name] = ProcessPoolExecutor(max_workers=workers,
+                                               mp_context=multiprocessing.get_context('spawn'))
+        return _pools[name]
+
+
+def _discard_pool(name, pool):
+    """Pool cassé : retiré, le prochain get_pool() en crée un neuf."""
+    with _pools_lock:
+        if _pools.get(name) is pool:
+            del _pools[name]
+            print(f"  [CRYPTO] pool '{name}' cassé (processus mort), recréé")
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+# ── Hachage en masse ───────────────────────────────────────────────────────────
+
+def hash_passwords(passwords, rounds=BCRYPT_ROUNDS) -> list:
+    """Hache une liste de mots de passe en parallèle ; résultats dans le même ordre."""
+    passwords = list(passwords)
+    if not passwords:
+        return []
+    chunksize = max(1, len(passwords) // (HASH_WORKERS * 4))
+    for attempt in range(2):
+        pool = get_pool()
+        try:
+            return list(pool.map(_hash, passwords, [rounds] * len(passwords), chunksize=chunksize))
+        except BrokenProcessPool:
+            _discard_pool('hash', pool)
+            if attempt:
+                raise
+
+
+# ── Vérification au login ──────────────────────────────────────────────────────
+
+_login_slots = threading.BoundedSemaphore(LOGIN_WORKERS + LOGIN_QUEUE)
+_login_lock  = threading.Lock()
+_login_stats = {"verified": 0, "rejected": 0, "failed": 0, "in_flight": 0}
+
+
+def verify_password(password: str, hashed: str) -> bool:
+    """
+    bcrypt.checkpw sur le pool de login. Bloque le thread appelant (sans
+    tenir le GIL) jusqu'au résultat. Lève CryptoPoolBusy si le pool est
+    saturé, ou encore cassé après avoir été recréé.
+    """
+    for attempt in range(2):
+        pool = get_pool('login', LOGIN_WORKERS)
+        try:
+            return _verify_on(pool, password, hashed)
+        except BrokenProcessPool:
+            _discard_pool('login', pool)
+    raise CryptoPoolBusy()
+
+
+def _verify_on(pool, password, hashed):
+    if not _login_slots.acquire(blocking=False):
+        with _login_lock:
+            _login_stats["rejected"] += 1
+        raise CryptoPoolBusy()
+    with _login_lock:
+        _login_stats["in_flight"] += 1
+
+    try:
+        future = pool.submit(_check, password, hashed)
+    except BaseException:
+        _release_login_slot()       # jamais soumise : ni vérifiée ni échouée
+        raise
+    # La place est rendue quand le calcul se termine, même après un timeout
+    future.add_done_callback(_login_done)
+    try:
+        return future.result(timeout=LOGIN_TIMEOUT)
+    except TimeoutError:
+        raise CryptoPoolBusy()
+
+
+def _login_done(future):
+    failed = future.cancelled() or future.exception() is not None
+    with _login_lock:
+        _login_stats["failed" if failed else "verified"] += 1
+    _release_login_slot()
+
+
+def _release_login_slot():
+    with _login_lock:
+        _login_stats["in_flight"] -= 1
+    _login_slots.release()
+
+
+def login_stats() -> dict:
+    with _login_lock:
+        return dict(_login_stats, workers=LOGIN_WORKERS, queue=LOGIN_QUEUE)
+
+
+def shutdown():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown()
+        _pools.clear()
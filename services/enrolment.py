@@ -0,0 +1,216 @@
+"""
+services/enrolment.py — Inscription en masse des étudiants depuis un CSV
+Pour chaque paquet de lignes :
+  1. validation (UserModel.validate) et génération des mots de passe ;
+  2. hachage bcrypt en parallèle (services.crypto_pool) ;
+  3. insertion groupée (UserModel.bulk_create, emails déjà inscrits écartés) ;
+  4. identifiants déposés dans la file d'envoi (services.mail_queue) ;
+  5. point de reprise écrit sur disque.
+Après une interruption, relancer la même commande reprend après la dernière
+ligne validée ; les étudiants insérés dont le mail n'est pas parti reçoivent
+un nouveau mot de passe.
+
+Colonnes reconnues (en-tête obligatoire) :
+    firstname, lastname, email, matricule, field_study, phone_number, speciality, level
+
+    python -m services.enrolment etudiants.csv [--chunk 200] [--restart]
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import threading
+import time
+
+from models.user import UserModel
+from services.crypto_pool import hash_passwords, shutdown as shutdown_crypto_pool
+from services.mail_queue import mail_queue
+from services.mail_service import mail_service
+
+CHUNK_SIZE = 200
+COLUMNS    = ('firstname', 'lastname', 'email', 'matricule',
+              'field_study', 'phone_number', 'speciality', 'level')
+
+
+# ── Point de reprise ───────────────────────────────────────────────────────────
+
+class Checkpoint:
+    """
+    État de l'inscription, réécrit (atomiquement) après chaque paquet :
+      line     : dernière ligne du CSV traitée et validée en base
+      unmailed : emails des comptes créés dont le mail n'est pas encore parti
+    """
+
+    def __init__(self, path):
+        self.path     = path
+        self.line     = 0
+        self.counts   = {"inserted": 0, "duplicates": 0, "invalid": 0}
+        self.unmailed = set()
+        self._lock    = threading.Lock()    # les threads de la file d'envoi y écrivent
+
+    def load(self):
+        if os.path.exists(self.path):
+            with open(self.path, encoding='utf-8') as f:
+                state = json.load(f)
+            self.line     = state["line"]
+            self.counts   = state["counts"]
+            self.unmailed = set(state["unmailed"])
+        return self
+
+    def expect_mails(self, emails):
+        with self._lock:
+            self.unmailed.update(emails)
+
+    def mailed(self, email):
+        with self._lock:
+            self.unmailed.discard(email)
+
+    def save(self):
+        with self._lock:
+            state = {"line": self.line, "counts": self.counts, "unmailed": sorted(self.unmailed)}
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp, self.path)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+# ── Pipeline ───────────────────────────────────────────────────────────────────
+
+class Enrolment:
+
+    def __init__(self, checkpoint, chunk_size=CHUNK_SIZE):
+        self.model      = UserModel()
+        self.checkpoint = checkpoint
+        self.chunk_size = chunk_size
+        self.started_at = time.monotonic()
+        self.rows       = 0      # lignes traitées pendant cette exécution
+
+    def run(self, stream):
+        self._resend_unmailed()
+
+        reader = csv.DictReader(stream)
+        chunk  = []
+        for row in reader:
+            if reader.line_num <= self.checkpoint.line:
+                continue                      # déjà traité lors d'une exécution précédente
+            chunk.append((reader.line_num, row))
+            if len(chunk) >= self.chunk_size:
+                self._process(chunk)
+                chunk = []
+        if chunk:
+            self._process(chunk)
+
+        print(f"  [INSCRIPTION] Envoi des mails en cours ({mail_queue.pending()} restants)...")
+        mail_queue.join()
+        self.checkpoint.save()
+
+    def _process(self, chunk):
+        students = []
+        for line, row in chunk:
+            data = {k: (row.get(k) or '').strip() for k in COLUMNS}
+            data = {k: v for k, v in data.items() if v or k in self.model.required_fields}
+            erreurs = self.model.validate(data)
+            if erreurs:
+                self.checkpoint.counts["invalid"] += 1
+                print(f"  [INSCRIPTION] ligne {line} ignorée : {' '.join(erreurs)}")
+                continue
+            data['role'] = 'student'
+            students.append(data)
+
+        plain  = [self.model.generate_password() for _ in students]
+        hashes = hash_passwords(plain)
+        for data, hashed in zip(students, hashes):
+            data['password'] = hashed
+
+        # Emails notés AVANT l'insertion : si le processus meurt entre le
+        # COMMIT et la sauvegarde suivante, la reprise retrouve ces comptes
+        # et leur envoie un nouveau mot de passe.
+        pending = {data['email'] for data in students} - self.checkpoint.unmailed
+        self.checkpoint.expect_mails(pending)
+        self.checkpoint.save()
+
+        result   = self.model.bulk_create(students, unique_fields=('email',), chunk_size=len(students) or 1)
+        rejected = {index for index, _, _ in result["duplicates"]}
+        inserted = {data['email'] for index, data in enumerate(students) if index not in rejected}
+        for index, _, value in result["duplicates"]:
+            print(f"  [INSCRIPTION] déjà inscrit : {value}")
+            # Compte déjà en base avant ce paquet : pas de mail. Un email répété
+            # dans le paquet reste attendu : sa première ligne vient d'être insérée.
+            if value in pending and value not in inserted:
+                self.checkpoint.mailed(value)
+
+        for index, (data, password) in enumerate(zip(students, plain)):
+            if index not in rejected:
+                self._queue_mail(data, password)
+
+        self.checkpoint.line = chunk[-1][0]
+        self.checkpoint.counts["inserted"]   += result["inserted"]
+        self.checkpoint.counts["duplicates"] += len(result["duplicates"])
+        self.checkpoint.save()
+
+        self.rows += len(chunk)
+        elapsed = time.monotonic() - self.started_at
+        print(f"  [INSCRIPTION] ligne {self.checkpoint.line} : {self.checkpoint.counts['inserted']} inscrits, "
+              f"{self.rows / elapsed:.0f} lignes/s, {mail_queue.pending()} mails en attente")
+
+    def _queue_mail(self, user, password):
+        email = user['email']
+        def on_done(ok):
+            if ok:
+                self.checkpoint.mailed(email)
+            else:
+                print(f"  [INSCRIPTION] mail non envoyé à {email} (renvoyé à la reprise)")
+        mail_queue.submit(mail_service.send_password, user, password, on_done=on_done)
+
+    def _resend_unmailed(self):
+        """Comptes créés avant l'interruption sans mail : nouveau mot de passe + mail."""
+        for email in sorted(self.checkpoint.unmailed):
+            users = self.model.find_where({"email": email})
+            if not users:
+                self.checkpoint.mailed(email)
+                continue
+            password = self.model.reset_password(users[0]['id'])
+            self._queue_mail(users[0], password)
+        if self.checkpoint.unmailed:
+            print(f"  [INSCRIPTION] {len(self.checkpoint.unmailed)} mail(s) de la session précédente renvoyé(s)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inscription en masse des étudiants")
+    parser.add_argument('file', help="fichier CSV (UTF-8, avec en-tête)")
+    parser.add_argument('--chunk', type=int, default=CHUNK_SIZE, help="étudiants par paquet")
+    parser.add_argument('--checkpoint', help="fichier de reprise (défaut : <file>.checkpoint)")
+    parser.add_argument('--restart', action='store_true', help="ignorer le point de reprise existant")
+    args = parser.parse_args(argv)
+
+    checkpoint = Checkpoint(args.checkpoint or args.file + '.checkpoint')
+    if args.restart:
+        checkpoint.remove()
+    checkpoint.load()
+    if checkpoint.line:
+        print(f"  [INSCRIPTION] Reprise après la ligne {checkpoint.line}")
+
+    try:
+        with open(args.file, newline='', encoding='utf-8-sig') as f:
+            Enrolment(checkpoint, args.chunk).run(f)
+    finally:
+        shutdown_crypto_pool()
+
+    counts = checkpoint.counts
+    print(f"  [INSCRIPTION] Terminé : {counts['inserted']} inscrits, {counts['duplicates']} déjà inscrits, "
+          f"{counts['invalid']} lignes invalides")
+    if checkpoint.unmailed:
+        print(f"  [INSCRIPTION] {len(checkpoint.unmailed)} mail(s) en échec : relancer la commande pour les renvoyer")
+        return 1
+    checkpoint.remove()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""
+services/mail_queue.py — File d'envoi des emails en arrière-plan
+Un appel Mailjet prend plusieurs centaines de millisecondes : envoyer les
+identifiants de 3 000 étudiants dans la boucle d'inscription la ralentirait
+d'autant. Les envois sont déposés dans une file et traités par des threads,
+avec nouvelles tentatives espacées en cas d'échec.
+"""
+
+import queue
+import threading
+import time
+
+MAX_ATTEMPTS = 3
+RETRY_DELAY  = 2.0     # secondes, doublé à chaque nouvelle tentative
+
+
+class MailQueue:
+
+    def __init__(self, workers=2, max_attempts=MAX_ATTEMPTS):
+        self.workers      = workers
+        self.max_attempts = max_attempts
+        self._queue       = queue.Queue()
+        self._lock        = threading.Lock()
+        self._threads     = []
+        self._stats       = {"queued": 0, "sent": 0, "failed": 0, "retries": 0}
+
+    def submit(self, send, *args, on_done=None):
+        """
+        Dépose un envoi : send(*args) doit retourner True si le mail est parti
+        (ex: mail_service.send_password, user, password).
+        on_done(ok) est appelé une fois l'envoi réussi ou abandonné.
+        """
+        self._start()
+        with self._lock:
+            self._stats["queued"] += 1
+        self._queue.put((send, args, on_done))
+
+    def join(self):
+        """Attend que tous les envois déposés soient terminés."""
+        self._queue.join()
+
+    def pending(self) -> int:
+        return self._queue.unfinished_tasks
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, pending=self.pending())
+
+    # ── Envoi ──────────────────────────────────────────────────────────────────
+
+    def _start(self):
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                t = threading.Thread(target=self._worker, name=f"mail-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def _worker(self):
+        while True:
+            send, args, on_done = self._queue.get()
+            try:
+                ok = self._send(send, args)
+                with self._lock:
+                    self._stats["sent" if ok else "failed"] += 1
+                if on_done:
+                    on_done(ok)
+            except Exception as e:
+                print(f"  [MAIL] Exception dans la file : {e}")
+            finally:
+                self._queue.task_done()
+
+    def _send(self, send, args) -> bool:
+        delay = RETRY_DELAY
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                if send(*args):
+                    return True
+            except Exception as e:
+                print(f"  [MAIL] Exception : {e}")
+            if attempt < self.max_attempts:
+                with self._lock:
+                    self._stats["retries"] += 1
+                time.sleep(delay)
+                delay *= 2
+        return False
+
+
+# ── Instance globale ──────────────────────────────────────────────────────────
+mail_queue = MailQueue()
@@ -0,0 +1,21 @@
+"""
+services/reconcile_availability.py — Réparation de books.available_copies
+Recalcule le compteur (copies - emprunts en cours) et corrige les écarts.
+À lancer après une modification manuelle de la base, ou périodiquement (cron) :
+    python -m services.reconcile_availability
+"""
+
+from models.book import BookModel
+
+
+def reconcile() -> int:
+    fixed = BookModel().reconcile_available_copies()
+    for book in fixed:
+        print(f"  [RECONCILE] #{book['id']} {book['title']} : "
+              f"{book['available_copies']} → {book['expected']}")
+    print(f"  [RECONCILE] {len(fixed)} livre(s) corrigé(s).")
+    return len(fixed)
+
+
+if __name__ == '__main__':
+    reconcile()
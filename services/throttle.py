@@ -0,0 +1,82 @@
+"""
+services/throttle.py — Limitation des tentatives de connexion
+Compte les échecs récents par clé (adresse IP, email) sur une fenêtre
+glissante. Au-delà du seuil, la clé est bloquée jusqu'à ce que ses plus
+anciens échecs sortent de la fenêtre : une attaque par force brute ne
+consomme plus de vérification bcrypt.
+Les compteurs sont en mémoire, propres à chaque processus serveur, et
+bornés à MAX_KEYS clés : au-delà, la clé dont le dernier échec est le plus
+ancien est oubliée (LRU) — coût constant par échec, même sous un flot
+d'emails inexistants.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+LOGIN_WINDOW       = float(os.getenv('LOGIN_WINDOW', 900))      # 15 minutes
+MAX_FAILS_EMAIL    = int(os.getenv('LOGIN_MAX_FAILS_EMAIL', 5))
+MAX_FAILS_IP       = int(os.getenv('LOGIN_MAX_FAILS_IP', 20))
+MAX_KEYS           = int(os.getenv('LOGIN_MAX_KEYS', 100_000))   # au-delà, éviction LRU
+
+
+class Throttle:
+
+    def __init__(self, max_failures, window=LOGIN_WINDOW, max_keys=MAX_KEYS):
+        self.max_failures = max_failures
+        self.window       = window
+        self.max_keys     = max_keys
+        self._failures    = OrderedDict()   # clé → deque de dates d'échec, du plus ancien au plus récent
+        self._lock        = threading.Lock()
+        self.blocked_hits = 0
+        self.evicted      = 0
+
+    def retry_after(self, key) -> float:
+        """0 si la clé peut tenter ; sinon secondes avant la prochaine tentative."""
+        now = time.monotonic()
+        with self._lock:
+            failures = self._failures.get(key)
+            if not failures:
+                return 0
+            self._expire(failures, now)
+            if not failures:
+                del self._failures[key]
+                return 0
+            if len(failures) < self.max_failures:
+                return 0
+            self.blocked_hits += 1
+            return failures[0] + self.window - now
+
+    def failure(self, key):
+        now = time.monotonic()
+        with self._lock:
+            failures = self._failures.get(key)
+            if failures is None:
+                failures = self._failures[key] = deque()
+                if len(self._failures) > self.max_keys:
+                    self._failures.popitem(last=False)
+                    self.evicted += 1
+            else:
+                self._failures.move_to_end(key)
+            self._expire(failures, now)
+            failures.append(now)
+            if len(failures) > self.max_failures:
+                failures.popleft()
+
+    def reset(self, key):
+        with self._lock:
+            self._failures.pop(key, None)
+
+    def _expire(self, failures, now):
+        while failures and failures[0] <= now - self.window:
+            failures.popleft()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"keys": len(self._failures), "blocked": self.blocked_hits, "evicted": self.evicted}
+
+
+# ── Instances globales (login) ─────────────────────────────────────────────────
+email_throttle = Throttle(MAX_FAILS_EMAIL)
+ip_throttle    = Throttle(MAX_FAILS_IP)
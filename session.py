@@ -1,18 +1,634 @@
 """
 session.py — Gestionnaire de sessions maison
-Les sessions sont stockées en mémoire (dict).
 Chaque session est identifiée par un cookie "session_id".
+Le stockage est interchangeable (SessionBackend), choisi par SESSION_BACKEND :
+  - memory : en mémoire (SessionStore) ; en mode multi-processus, hébergé
+             par un processus manager partagé entre les workers ;
+  - sqlite : table SQLite (SQLiteSessionStore), partagée par tous les
+             processus qui ouvrent le même fichier, sans service externe ;
+  - cookie : aucune donnée côté serveur, la session voyage dans un cookie
+             signé HMAC (SignedCookieSessions).
 """
 
+from abc import ABC, abstractmethod
+from dotenv import load_dotenv
+from multiprocessing.managers import BaseManager
+import base64
+import fcntl
+import hashlib
+import heapq
+import hmac
+import json
+import os
+import secrets
+import sqlite3
+import threading
 import uuid
 import time
 
-# ── Stockage en mémoire ────────────────────────────────────────────────────────
-# { session_id: { "user_id": 1, "nom": "Alice", "expires_at": 1234567890 } }
-_sessions = {}
+load_dotenv()
 
 SESSION_DURATION = 3600   # 1 heure en secondes
 COOKIE_NAME      = "session_id"
+MAX_SESSIONS     = int(os.environ.get("MAX_SESSIONS", 100_000))
+SWEEP_INTERVAL   = float(os.environ.get("SESSION_SWEEP_INTERVAL", 60))
+
+SESSION_BACKEND  = os.environ.get("SESSION_BACKEND", "memory")
+SESSION_DB       = os.environ.get("SESSION_DB", "sessions.db")
+
+# Mode cookie : clés HMAC "id:secret,id2:secret2" — la première signe, toutes
+# vérifient (rotation : ajouter la nouvelle en tête, retirer l'ancienne
+# une fois SESSION_DURATION écoulée). À défaut : SECRET_KEY.
+SESSION_KEYS             = os.environ.get("SESSION_KEYS", "")
+SESSION_REVOCATION_FILE  = os.environ.get("SESSION_REVOCATION_FILE", "")
+
+# Expiration glissante : chaque requête repousse l'expiration, mais au plus
+# une écriture par session toutes les TOUCH_INTERVAL secondes
+SESSION_SLIDING  = os.environ.get("SESSION_SLIDING", "0") == "1"
+TOUCH_INTERVAL   = 60
+
+
+# ── Interface des backends ────────────────────────────────────────────────────
+
+class SessionBackend(ABC):
+    """
+    Stockage des sessions : { session_id: {..., "expires_at": timestamp} }.
+    get() retourne None pour une session absente ou expirée.
+    Un backend incomplet échoue dès son instanciation (TypeError).
+    """
+
+    @abstractmethod
+    def get(self, session_id):
+        ...
+
+    @abstractmethod
+    def set(self, session_id, data: dict):
+        ...
+
+    @abstractmethod
+    def delete(self, session_id):
+        ...
+
+    @abstractmethod
+    def touch(self, session_id, expires_at):
+        """Repousse l'expiration (expiration glissante)."""
+
+    def stats(self) -> dict:
+        return {}
+
+
+# ── Stockage en mémoire ────────────────────────────────────────────────────────
+
+class SessionStore(SessionBackend):
+    """
+    { session_id: { "user_id": 1, "nom": "Alice", "expires_at": 1234567890 } }
+    Le serveur traite les requêtes sur plusieurs threads : tout accès au
+    dict passe par un verrou.
+    Les sessions abandonnées ne reviennent jamais : un tas trié par
+    expires_at permet à un thread de ménage (toutes les `sweep_interval`
+    secondes) de les retirer sans parcourir tout le dict. Au-delà de
+    `max_sessions`, la session qui expire le plus tôt est évincée.
+    """
+
+    def __init__(self, max_sessions=MAX_SESSIONS, sweep_interval=SWEEP_INTERVAL):
+        self._sessions      = {}
+        self._expiry        = []      # tas de (expires_at, session_id)
+        self._lock          = threading.Lock()
+        self.max_sessions   = max_sessions
+        self.sweep_interval = sweep_interval
+        self._sweeper_pid   = None
+        self._counters      = {"expired": 0, "evicted": 0}
+
+    def get(self, session_id):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session and session["expires_at"] < time.time():
+                del self._sessions[session_id]
+                self._counters["expired"] += 1
+                return None
+            return session
+
+    def set(self, session_id, data: dict):
+        self._start_sweeper()
+        with self._lock:
+            self._sessions[session_id] = data
+            # Une entrée périmée (session supprimée ou prolongée) reste dans
+            # le tas : elle est ignorée quand elle en sort
+            heapq.heappush(self._expiry, (data["expires_at"], session_id))
+            now = time.time()
+            while len(self._sessions) > self.max_sessions:
+                # Les sessions déjà expirées partent d'abord (elles sont en tête)
+                self._pop_soonest("expired" if self._expiry[0][0] < now else "evicted")
+            if len(self._expiry) > 2 * len(self._sessions) + 1024:
+                self._rebuild_index()
+
+    def delete(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def touch(self, session_id, expires_at):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session["expires_at"] = expires_at
+                heapq.heappush(self._expiry, (expires_at, session_id))
+
+    # ── Expiration ─────────────────────────────────────────────────────────────
+
+    def sweep(self, now=None) -> int:
+        """Retire les sessions expirées ; retourne leur nombre."""
+        now     = now or time.time()
+        removed = 0
+        with self._lock:
+            while self._expiry and self._expiry[0][0] < now:
+                if self._pop_soonest("expired"):
+                    removed += 1
+        return removed
+
+    def _pop_soonest(self, counter) -> bool:
+        """Retire la session en tête du tas si l'entrée est encore valable."""
+        expires_at, session_id = heapq.heappop(self._expiry)
+        session = self._sessions.get(session_id)
+        if session is None or session["expires_at"] != expires_at:
+            return False
+        del self._sessions[session_id]
+        self._counters[counter] += 1
+        return True
+
+    def _rebuild_index(self):
+        self._expiry = [(data["expires_at"], sid) for sid, data in self._sessions.items()]
+        heapq.heapify(self._expiry)
+
+    def _start_sweeper(self):
+        # Un thread par processus : après un fork, le thread du parent n'existe plus
+        if self._sweeper_pid == os.getpid():
+            return
+        self._sweeper_pid = os.getpid()
+        threading.Thread(target=self._sweep_loop, name="session-sweeper", daemon=True).start()
+
+    def _sweep_loop(self):
+        while True:
+            time.sleep(self.sweep_interval)
+            removed = self.sweep()
+            if removed:
+                print(f"  [SESSION] {removed} session(s) expirée(s) supprimée(s)")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "live":         len(self._sessions),
+                "expired":      self._counters["expired"],
+                "evicted":      self._counters["evicted"],
+                "max_sessions": self.max_sessions,
+                "index_size":   len(self._expiry),
+            }
+
+
+# ── Stockage SQLite (partagé entre processus) ─────────────────────────────────
+
+class SQLiteSessionStore(SessionBackend):
+    """
+    Sessions dans une table SQLite (mode WAL : lectures concurrentes entre
+    processus, une écriture à la fois).
+    - cache local : une session lue reste en mémoire `cache_ttl` secondes ;
+      la plupart des requêtes ne touchent pas au fichier. Une déconnexion
+      faite par un autre processus y est donc visible après `cache_ttl` au plus.
+    - touch() n'écrit pas tout de suite : les prolongations sont regroupées
+      et écrites toutes les `flush_interval` secondes en une transaction.
+    - un thread de ménage (un par processus) supprime les sessions expirées
+      et applique max_sessions.
+    """
+
+    CACHE_MAX = 10_000
+
+    def __init__(self, path=SESSION_DB, cache_ttl=2.0, flush_interval=5.0,
+                 max_sessions=MAX_SESSIONS, sweep_interval=SWEEP_INTERVAL):
+        self.path           = path
+        self.cache_ttl      = cache_ttl
+        self.flush_interval = flush_interval
+        self.max_sessions   = max_sessions
+        self.sweep_interval = sweep_interval
+        self._local         = threading.local()
+        self._lock          = threading.Lock()
+        self._cache         = {}      # session_id → (lu_à, data)
+        self._touches       = {}      # session_id → expires_at (pas encore écrit)
+        self._pid           = None
+        self._counters      = {"hits": 0, "misses": 0, "expired": 0,
+                               "evicted": 0, "flushed_touches": 0}
+
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                id          TEXT PRIMARY KEY,
+                data        TEXT NOT NULL,
+                expires_at  REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS sessions_expires_at ON sessions (expires_at)")
+
+    def _conn(self):
+        """Une connexion par thread et par processus (jamais héritée d'un fork)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid  = os.getpid()
+        return conn
+
+    def _check_process(self):
+        """Premier accès dans ce processus : cache vide et thread de ménage propre."""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid     = os.getpid()
+            self._cache   = {}
+            self._touches = {}
+        threading.Thread(target=self._background, name="session-sweeper", daemon=True).start()
+
+    # ── Lecture / écriture ─────────────────────────────────────────────────────
+
+    def get(self, session_id):
+        self._check_process()
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(session_id)
+            if cached and now - cached[0] < self.cache_ttl:
+                self._counters["hits"] += 1
+                session = cached[1]
+            else:
+                session = None
+                self._counters["misses"] += 1
+
+        if session is None:
+            row = self._conn().execute(
+                "SELECT data, expires_at FROM sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            session = json.loads(row[0])
+            with self._lock:
+                session["expires_at"] = self._touches.get(session_id, row[1])
+                if len(self._cache) >= self.CACHE_MAX:
+                    self._cache.clear()
+                self._cache[session_id] = (now, session)
+
+        if session["expires_at"] < time.time():
+            self.delete(session_id)
+            with self._lock:
+                self._counters["expired"] += 1
+            return None
+        return session
+
+    def set(self, session_id, data: dict):
+        self._check_process()
+        self._conn().execute(
+            "INSERT OR REPLACE INTO sessions (id, data, expires_at) VALUES (?, ?, ?)",
+            (session_id, json.dumps(data), data["expires_at"]),
+        )
+        with self._lock:
+            self._touches.pop(session_id, None)
+            self._cache[session_id] = (time.monotonic(), data)
+
+    def delete(self, session_id):
+        self._check_process()
+        with self._lock:
+            self._touches.pop(session_id, None)
+            self._cache.pop(session_id, None)
+        self._conn().execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def touch(self, session_id, expires_at):
+        self._check_process()
+        with self._lock:
+            self._touches[session_id] = expires_at
+            cached = self._cache.get(session_id)
+            if cached:
+                cached[1]["expires_at"] = expires_at
+
+    # ── Tâches de fond ─────────────────────────────────────────────────────────
+
+    def flush(self) -> int:
+        """Écrit les prolongations en attente (une transaction)."""
+        with self._lock:
+            touches, self._touches = self._touches, {}
+        if not touches:
+            return 0
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN")
+            conn.executemany("UPDATE sessions SET expires_at = ? WHERE id = ?",
+                             [(expires_at, sid) for sid, expires_at in touches.items()])
+        with self._lock:
+            self._counters["flushed_touches"] += len(touches)
+        return len(touches)
+
+    def sweep(self, now=None) -> int:
+        """Supprime les sessions expirées, puis les plus anciennes au-delà de max_sessions."""
+        self.flush()
+        conn    = self._conn()
+        expired = conn.execute("DELETE FROM sessions WHERE expires_at < ?",
+                               (now or time.time(),)).rowcount
+        extra   = conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0] - self.max_sessions
+        evicted = 0
+        if extra > 0:
+            evicted = conn.execute("""
+                DELETE FROM sessions WHERE id IN (
+                    SELECT id FROM sessions ORDER BY expires_at LIMIT ?
+                )
+            """, (extra,)).rowcount
+        with self._lock:
+            self._counters["expired"] += expired
+            self._counters["evicted"] += evicted
+        return expired + evicted
+
+    def _background(self):
+        last_sweep = time.monotonic()
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+                if time.monotonic() - last_sweep >= self.sweep_interval:
+                    last_sweep = time.monotonic()
+                    removed = self.sweep()
+                    if removed:
+                        print(f"  [SESSION] {removed} session(s) supprimée(s)")
+            except sqlite3.Error as e:
+                print(f"  [SESSION] Erreur SQLite : {e}")
+
+    def stats(self) -> dict:
+        live = self._conn().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        with self._lock:
+            return dict(self._counters, live=live, cached=len(self._cache),
+                        pending_touches=len(self._touches), max_sessions=self.max_sessions)
+
+
+# ── Sessions dans un cookie signé ─────────────────────────────────────────────
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+class SignedCookieSessions:
+    """
+    La session entière voyage dans le cookie :
+        <payload base64url>.<id de clé>.<HMAC-SHA256 base64url>
+    Aucune lecture côté serveur : seulement un HMAC et un json.loads.
+    - rotation : `keys` = [(id, secret), ...] ; la première signe, toutes
+      sont acceptées, le cookie indique laquelle a servi ;
+    - déconnexion : le jti de la session est ajouté à un petit ensemble de
+      révocation, purgé à l'expiration de chaque session (tas d'échéances,
+      fichier ou non). Avec plusieurs processus, SESSION_REVOCATION_FILE
+      partage cet ensemble (obligatoire, cf. configure_store) : chaque
+      processus relit la fin du fichier au plus une fois par seconde, et le
+      réécrit sans les entrées expirées quand elles y sont majoritaires.
+    """
+
+    REFRESH_INTERVAL = 1.0
+    COMPACT_MIN      = 1000     # lignes du fichier avant d'envisager de le compacter
+
+    def __init__(self, keys, revocation_file=''):
+        if not keys:
+            raise ValueError("SESSION_BACKEND=cookie exige SESSION_KEYS ou SECRET_KEY")
+        self.signing_kid     = keys[0][0]
+        self.keys            = {kid: secret.encode('utf-8') for kid, secret in keys}
+        self.revocation_file = revocation_file
+        self._revoked        = {}     # jti → expires_at
+        self._expiry         = []     # tas (expires_at, jti) : purge sans parcours
+        self._lock           = threading.Lock()
+        self._file_id        = None   # (st_dev, st_ino) : fichier remplacé par un compactage ?
+        self._file_offset    = 0
+        self._file_lines     = 0
+        self._next_refresh   = 0.0
+        self._counters       = {"issued": 0, "verified": 0, "rejected": 0, "revoked": 0}
+
+    @classmethod
+    def from_env(cls):
+        keys = [tuple(item.split(':', 1)) for item in SESSION_KEYS.split(',') if ':' in item]
+        if not keys and os.environ.get('SECRET_KEY'):
+            keys = [('k0', os.environ['SECRET_KEY'])]
+        return cls(keys, SESSION_REVOCATION_FILE)
+
+    def _sign(self, kid, payload: str) -> str:
+        digest = hmac.new(self.keys[kid], f"{payload}.{kid}".encode('ascii'), hashlib.sha256).digest()
+        return _b64encode(digest)
+
+    # ── Émission / vérification ────────────────────────────────────────────────
+
+    def encode(self, data: dict) -> str:
+        data    = {**data, "jti": secrets.token_hex(8)}
+        payload = _b64encode(json.dumps(data, separators=(',', ':')).encode('utf-8'))
+        with self._lock:
+            self._counters["issued"] += 1
+        return f"{payload}.{self.signing_kid}.{self._sign(self.signing_kid, payload)}"
+
+    def decode(self, token: str):
+        """Retourne la session si la signature est valide et la session active, sinon None."""
+        session = self._verify(token)
+        with self._lock:
+            self._counters["verified" if session else "rejected"] += 1
+        return session
+
+    def _verify(self, token):
+        # Cookie fourni par le client : tout jeton mal formé est refusé, sans exception
+        if not isinstance(token, str) or not token.isascii():
+            return None
+        try:
+            payload, kid, signature = token.split('.')
+        except ValueError:
+            return None
+        if kid not in self.keys or not hmac.compare_digest(signature.encode('ascii'),
+                                                           self._sign(kid, payload).encode('ascii')):
+            return None
+        try:
+            session = json.loads(_b64decode(payload))
+        except ValueError:
+            return None
+        if not isinstance(session, dict):
+            return None
+        if session.get("expires_at", 0) < time.time() or self.is_revoked(session.get("jti")):
+            return None
+        return session
+
+    # ── Révocation (logout) ────────────────────────────────────────────────────
+
+    def revoke(self, token: str):
+        session = self._verify(token)
+        if not session:
+            return
+        jti, expires_at = session["jti"], session["expires_at"]
+        with self._lock:
+            self._add_revoked(jti, expires_at)
+            self._prune()
+            self._counters["revoked"] += 1
+        if self.revocation_file:
+            # Verrou partagé : un compactage (exclusif) ne perd pas cette ligne
+            with self._file_lock(fcntl.LOCK_SH), \
+                 open(self.revocation_file, 'a', encoding='ascii') as f:
+                f.write(f"{jti} {expires_at}\n")
+
+    def is_revoked(self, jti) -> bool:
+        if time.monotonic() >= self._next_refresh:
+            self._refresh()
+        return jti in self._revoked
+
+    def _add_revoked(self, jti, expires_at):
+        if jti not in self._revoked:
+            heapq.heappush(self._expiry, (expires_at, jti))
+        self._revoked[jti] = expires_at
+
+    def _prune(self):
+        """Retire les révocations de sessions expirées (appelant : self._lock)."""
+        now = time.time()
+        while self._expiry and self._expiry[0][0] < now:
+            expires_at, jti = heapq.heappop(self._expiry)
+            if self._revoked.get(jti) == expires_at:
+                del self._revoked[jti]
+
+    def _refresh(self):
+        """Purge, et lit les révocations ajoutées au fichier par les autres processus."""
+        with self._lock:
+            self._next_refresh = time.monotonic() + self.REFRESH_INTERVAL
+            if self.revocation_file:
+                try:
+                    self._read_file()
+                except (OSError, ValueError):
+                    pass
+            self._prune()
+            if self.revocation_file and self._file_lines > max(self.COMPACT_MIN, 2 * len(self._revoked)):
+                try:
+                    self._compact()
+                except (OSError, ValueError):
+                    pass
+
+    def _read_file(self):
+        st = os.stat(self.revocation_file)
+        if (st.st_dev, st.st_ino) != self._file_id or st.st_size < self._file_offset:
+            # Fichier compacté par un autre processus : relu depuis le début
+            self._file_id, self._file_offset, self._file_lines = (st.st_dev, st.st_ino), 0, 0
+        if st.st_size <= self._file_offset:
+            return
+        with open(self.revocation_file, encoding='ascii') as f:
+            f.seek(self._file_offset)
+            lines = f.readlines()
+        if lines and not lines[-1].endswith('\n'):
+            lines.pop()                  # ligne en cours d'écriture
+        for line in lines:
+            self._file_offset += len(line)
+            self._file_lines  += 1
+            jti, expires_at = line.split()
+            self._add_revoked(jti, float(expires_at))
+
+    def _compact(self):
+        """Réécrit le fichier sans les entrées expirées (appelant : self._lock)."""
+        with self._file_lock(fcntl.LOCK_EX):
+            self._read_file()            # lignes ajoutées depuis la dernière lecture
+            self._prune()
+            tmp = f"{self.revocation_file}.{os.getpid()}.tmp"
+            with open(tmp, 'w', encoding='ascii') as f:
+                f.writelines(f"{jti} {expires_at}\n" for jti, expires_at in self._revoked.items())
+            os.replace(tmp, self.revocation_file)
+            st = os.stat(self.revocation_file)
+            self._file_id     = (st.st_dev, st.st_ino)
+            self._file_offset = st.st_size
+            self._file_lines  = len(self._revoked)
+
+    def _file_lock(self, mode):
+        """Verrou inter-processus du fichier de révocation (fichier .lock voisin)."""
+        return _FileLock(self.revocation_file + '.lock', mode)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._counters, revocations=len(self._revoked),
+                        signing_key=self.signing_kid, keys=len(self.keys))
+
+
+class _FileLock:
+    """flock() sur un fichier, le temps d'un bloc with."""
+
+    def __init__(self, path, mode):
+        self.path = path
+        self.mode = mode
+
+    def __enter__(self):
+        self._f = open(self.path, 'a')
+        fcntl.flock(self._f, self.mode)
+        return self
+
+    def __exit__(self, *exc):
+        fcntl.flock(self._f, fcntl.LOCK_UN)
+        self._f.close()
+
+
+_store  = SessionStore()
+_signer = None      # SignedCookieSessions en mode cookie
+
+
+def use_store(store):
+    """Remplace le store du processus courant (ex: proxy partagé)."""
+    global _store
+    _store = store
+
+
+def use_signed_cookies(signer):
+    """Active le mode cookie signé (None pour revenir au store)."""
+    global _signer
+    _signer = signer
+
+
+def session_stats() -> dict:
+    if _signer is not None:
+        return dict(_signer.stats(), backend="cookie")
+    return dict(_store.stats(), backend=SESSION_BACKEND)
+
+
+# ── Store partagé entre processus ─────────────────────────────────────────────
+
+class _StoreManager(BaseManager):
+    pass
+
+_StoreManager.register('SessionStore', SessionStore, exposed=('get', 'set', 'delete', 'touch', 'stats'))
+
+
+def start_shared_store():
+    """
+    Démarre un processus manager qui héberge un SessionStore unique.
+    Retourne (manager, proxy) : le proxy s'utilise comme un SessionStore
+    et reste valable dans les processus forkés ensuite.
+    """
+    manager = _StoreManager()
+    manager.start()
+    return manager, manager.SessionStore()
+
+
+def configure_store(processes=1):
+    """
+    Installe le backend choisi par SESSION_BACKEND, avant le fork des workers.
+    Retourne la fonction à appeler à l'arrêt du serveur.
+    """
+    if SESSION_BACKEND == "cookie":
+        if processes > 1 and not SESSION_REVOCATION_FILE:
+            # Sinon une déconnexion ne révoque le cookie que dans le worker qui l'a traitée
+            raise ValueError("SESSION_BACKEND=cookie avec plusieurs processus exige SESSION_REVOCATION_FILE")
+        use_signed_cookies(SignedCookieSessions.from_env())
+        print("  Sessions : cookies signés (HMAC)")
+        return lambda: None
+    if SESSION_BACKEND == "sqlite":
+        use_store(SQLiteSessionStore(SESSION_DB))
+        print(f"  Sessions : SQLite ({SESSION_DB})")
+        return lambda: None
+    if processes > 1:
+        manager, store = start_shared_store()
+        use_store(store)
+        print("  Sessions : mémoire, processus manager partagé")
+        return manager.shutdown
+    return lambda: None
 
 
 class SessionManager:
@@ -24,11 +640,14 @@ class SessionManager:
         Crée une nouvelle session avec les données utilisateur.
         Retourne le session_id à placer dans le cookie.
         """
+        if _signer is not None:
+            # Mode cookie : la valeur du cookie est la session signée
+            return _signer.encode({**data, "expires_at": time.time() + SESSION_DURATION})
         session_id = str(uuid.uuid4())
-        _sessions[session_id] = {
+        _store.set(session_id, {
             **data,
             "expires_at": time.time() + SESSION_DURATION
-        }
+        })
         return session_id
 
     # ── Lire une session ───────────────────────────────────────────────────────
@@ -42,22 +661,33 @@ class SessionManager:
         if not session_id:
             return None
 
-        session = _sessions.get(session_id)
+        if _signer is not None:
+            return _signer.decode(session_id)
+
+        session = _store.get(session_id)
         if not session:
             return None
 
         # Session expirée ?
-        if time.time() > session["expires_at"]:
+        now = time.time()
+        if now > session["expires_at"]:
             self.destroy(session_id)
             return None
 
+        # Expiration glissante : prolongation au plus toutes les TOUCH_INTERVAL s
+        if SESSION_SLIDING and session["expires_at"] - now < SESSION_DURATION - TOUCH_INTERVAL:
+            _store.touch(session_id, now + SESSION_DURATION)
+
         return session
 
     # ── Détruire une session ───────────────────────────────────────────────────
 
     def destroy(self, session_id: str):
         """Supprime la session (logout)."""
-        _sessions.pop(session_id, None)
+        if _signer is not None:
+            _signer.revoke(session_id)
+            return
+        _store.delete(session_id)
 
     def destroy_from_req(self, req):
         """Détruit la session de la requête courante."""
@@ -69,9 +699,12 @@ class SessionManager:
 
     def set_cookie(self, req, session_id: str):
         """Écrit le cookie Set-Cookie dans la réponse HTTP."""
+        # Expiration glissante : c'est le serveur qui décide, cookie de session
+        # (le mode cookie signé a une expiration fixe, inscrite dans le cookie)
+        max_age = "" if SESSION_SLIDING and _signer is None else f"; Max-Age={SESSION_DURATION}"
         req.send_header(
             'Set-Cookie',
-            f"{COOKIE_NAME}={session_id}; HttpOnly; Path=/; Max-Age={SESSION_DURATION}"
+            f"{COOKIE_NAME}={session_id}; HttpOnly; Path=/{max_age}"
         )
 
     def clear_cookie(self, req):
@@ -0,0 +1,428 @@
+"""
+static_files.py — Service des fichiers /assets/ (commun à app.py et app_async.py)
+Sans cache, chaque requête relisait le fichier sur disque et le renvoyait en
+entier : adminlte.css, jquery.js, dataTables.js étaient retéléchargés à
+chaque navigation.
+  - cache LRU en mémoire, borné en octets (STATIC_CACHE_SIZE) ; les fichiers
+    plus gros que STATIC_MAX_FILE sont envoyés depuis le disque en sendfile ;
+  - validateurs ETag (fort) et Last-Modified → 304 Not Modified sur
+    If-None-Match / If-Modified-Since ;
+  - invalidation : taille et date du fichier revérifiées (os.stat) au plus
+    toutes les STATIC_CHECK_INTERVAL secondes ;
+  - garde anti-traversée : seul ce qui est réellement sous assets/ est servi ;
+  - Range / 206 Partial Content (téléchargements repris), HEAD ;
+  - bundles à empreinte (asset_bundles) : Cache-Control immutable, un an ;
+  - variantes .gz précompressées (precompress, une fois au démarrage ou via
+    `python static_files.py`) servies avec Content-Encoding: gzip aux
+    navigateurs qui l'acceptent — rien n'est compressé pendant une requête.
+"""
+
+import argparse
+import email.utils
+import gzip
+import hashlib
+import mimetypes
+import os
+import stat
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import unquote
+
+from asset_bundles import FINGERPRINT_RE
+
+STATIC_ROOT           = os.path.realpath('assets')
+STATIC_CACHE_SIZE     = int(os.environ.get("STATIC_CACHE_SIZE", 32 * 1024 * 1024))
+STATIC_MAX_FILE       = int(os.environ.get("STATIC_MAX_FILE", 1024 * 1024))
+STATIC_CHECK_INTERVAL = float(os.environ.get("STATIC_CHECK_INTERVAL", 1))
+# 0 : le navigateur revalide à chaque fois (304 si rien n'a changé)
+STATIC_MAX_AGE        = int(os.environ.get("STATIC_MAX_AGE", 0))
+# Bundles à empreinte (asset_bundles) : leur contenu ne change jamais
+IMMUTABLE_CACHE       = 'public, max-age=31536000, immutable'
+BUNDLES_ROOT          = os.path.join(STATIC_ROOT, 'bundles') + os.sep
+# 1 : les variantes .gz manquantes ou périmées sont produites au démarrage
+STATIC_PRECOMPRESS    = os.environ.get("STATIC_PRECOMPRESS", "1") == "1"
+
+# Formats texte qui se compressent bien (les images et polices le sont déjà)
+COMPRESSIBLE  = ('.css', '.js', '.mjs', '.map', '.json', '.svg', '.txt', '.html', '.ts', '.scss', '.md')
+GZIP_MIN_SIZE = 1024      # en dessous, l'en-tête gzip mange le gain
+GZIP_MIN_GAIN = 0.1       # variante gardée seulement si elle économise 10 %
+
+
+class StaticAsset:
+    """Un fichier servi : métadonnées, validateurs et contenu s'il est en cache."""
+
+    __slots__ = ('path', 'mime_type', 'size', 'mtime_ns', 'etag', 'last_modified', 'body', 'checked_at',
+                 'compressible')
+
+    def __init__(self, path, st, body=None):
+        mime_type, _ = mimetypes.guess_type(path)
+        self.path          = path
+        self.mime_type     = mime_type or 'application/octet-stream'
+        self.size          = st.st_size
+        self.mtime_ns      = st.st_mtime_ns
+        self.last_modified = email.utils.formatdate(st.st_mtime, usegmt=True)
+        self.body          = body
+        self.checked_at    = time.monotonic()
+        self.compressible  = path.endswith(COMPRESSIBLE)
+        if body is not None:
+            self.etag = '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+        else:
+            self.etag = f'"{st.st_size:x}-{st.st_mtime_ns:x}"'
+
+    def changed(self, st) -> bool:
+        return st.st_size != self.size or st.st_mtime_ns != self.mtime_ns
+
+    def not_modified(self, headers) -> bool:
+        """Requête conditionnelle satisfaite ? If-None-Match prime sur If-Modified-Since."""
+        if_none_match = headers.get('If-None-Match')
+        if if_none_match:
+            tags = [t.strip() for t in if_none_match.split(',')]
+            return '*' in tags or self.etag in tags or 'W/' + self.etag in tags
+        if_modified_since = headers.get('If-Modified-Since')
+        if if_modified_since:
+            try:
+                since = email.utils.parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return self.mtime_ns // 1_000_000_000 <= since
+        return False
+
+
+class StaticCache:
+
+    def __init__(self, root=STATIC_ROOT, max_bytes=STATIC_CACHE_SIZE, max_file_size=STATIC_MAX_FILE,
+                 check_interval=STATIC_CHECK_INTERVAL):
+        self.root           = root
+        self.max_bytes      = max_bytes
+        self.max_file_size  = max_file_size
+        self.check_interval = check_interval
+        self._entries       = OrderedDict()   # chemin → StaticAsset, du moins au plus récent
+        self._bytes         = 0
+        self._missing       = {}              # variante .gz absente → date de vérification
+        self._lock          = threading.Lock()
+        self._stats         = {"hits": 0, "misses": 0, "not_modified": 0, "evictions": 0, "uncached": 0,
+                               "gzip": 0, "partial": 0, "sendfile": 0}
+
+    def resolve(self, url_path):
+        """/assets/css/app.css → chemin absolu sous root, ou None (traversée, fichier absent)."""
+        relative = unquote(url_path)[len('/assets/'):]
+        try:
+            file_path = os.path.realpath(os.path.join(self.root, relative))
+        except ValueError:          # octet nul dans le chemin
+            return None
+        if not file_path.startswith(self.root + os.sep):
+            return None
+        return file_path
+
+    def lookup(self, url_path):
+        """StaticAsset à jour pour ce chemin, ou None si rien à servir."""
+        file_path = self.resolve(url_path)
+        if file_path is None:
+            return None
+        return self._get(file_path)
+
+    def _get(self, file_path):
+        now = time.monotonic()
+        with self._lock:
+            asset = self._entries.get(file_path)
+            if asset is not None and now - asset.checked_at < self.check_interval:
+                self._entries.move_to_end(file_path)
+                self._stats["hits"] += 1
+                return asset
+
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            self._forget(file_path)
+            return None
+        if not stat.S_ISREG(st.st_mode):
+            return None
+
+        if asset is not None and not asset.changed(st):
+            with self._lock:
+                asset.checked_at = now
+                if file_path in self._entries:
+                    self._entries.move_to_end(file_path)
+                self._stats["hits"] += 1
+            return asset
+
+        if st.st_size > self.max_file_size:
+            self._forget(file_path)
+            with self._lock:
+                self._stats["uncached"] += 1
+            return StaticAsset(file_path, st)
+        return self._load(file_path)
+
+    def _variant(self, asset):
+        """Variante .gz à jour de l'asset, ou None."""
+        gz_path = asset.path + '.gz'
+        now     = time.monotonic()
+        with self._lock:
+            if now - self._missing.get(gz_path, -self.check_interval) < self.check_interval:
+                return None
+        variant = self._get(gz_path)
+        if variant is None or variant.mtime_ns < asset.mtime_ns:
+            with self._lock:
+                self._missing[gz_path] = now     # chemins issus de vrais fichiers : ensemble borné
+            return None
+        return variant
+
+    def _load(self, file_path):
+        try:
+            with open(file_path, 'rb') as f:
+                st   = os.fstat(f.fileno())
+                body = f.read()
+        except OSError:
+            return None
+        asset = StaticAsset(file_path, st, body)
+        with self._lock:
+            self._stats["misses"] += 1
+            old = self._entries.pop(file_path, None)
+            if old is not None:
+                self._bytes -= old.size
+            self._entries[file_path] = asset
+            self._bytes += asset.size
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self._stats["evictions"] += 1
+        return asset
+
+    def _forget(self, file_path):
+        with self._lock:
+            old = self._entries.pop(file_path, None)
+            if old is not None:
+                self._bytes -= old.size
+
+    # ── Réponse HTTP ───────────────────────────────────────────────────────────
+
+    def respond(self, req, url_path):
+        """
+        Répond à une requête /assets/ via l'interface de BaseHTTPRequestHandler
+        (MainHandler ou AsyncRequest) : 404, 304, 416, ou 200/206 avec le
+        contenu en cache ; HEAD n'envoie que les en-têtes.
+        Pour un fichier non caché, les en-têtes sont envoyés et (fichier ouvert,
+        offset, octets) est retourné : à l'appelant de l'envoyer en sendfile
+        (copie noyau, sans passer par Python) puis de le fermer.
+        """
+        asset = self.lookup(url_path)
+        if asset is None:
+            req.send_response(404)
+            req.send_header('Content-Length', '0')
+            req.end_headers()
+            return None
+
+        mime_type, encoding = asset.mime_type, None
+        if asset.compressible and accepts_gzip(req.headers.get('Accept-Encoding', '')):
+            variant = self._variant(asset)
+            if variant is not None:
+                asset, encoding = variant, 'gzip'
+                with self._lock:
+                    self._stats["gzip"] += 1
+
+        if asset.not_modified(req.headers):
+            with self._lock:
+                self._stats["not_modified"] += 1
+            req.send_response(304)
+            # Même Content-Length qu'un 200 : la connexion reste réutilisable
+            req.send_header('Content-Length', asset.size)
+            self._send_validators(req, asset)
+            req.end_headers()
+            return None
+
+        size       = asset.size
+        byte_range = None
+        if 'Range' in req.headers and self._if_range(req.headers, asset):
+            byte_range = parse_range(req.headers['Range'], size)
+            if byte_range is False:
+                req.send_response(416)
+                req.send_header('Content-Range', f'bytes */{size}')
+                req.send_header('Content-Length', '0')
+                req.end_headers()
+                return None
+
+        f = None
+        if asset.body is None and req.command != 'HEAD':
+            try:
+                f = open(asset.path, 'rb')
+            except OSError:
+                req.send_response(404)
+                req.send_header('Content-Length', '0')
+                req.end_headers()
+                return None
+            if asset.changed(os.fstat(f.fileno())):
+                # Remplacé entre le stat et l'ouverture : on recommence avec la nouvelle version
+                f.close()
+                return self.respond(req, url_path)
+
+        offset, count = 0, size
+        if byte_range is not None:
+            offset, count = byte_range[0], byte_range[1] - byte_range[0] + 1
+            with self._lock:
+                self._stats["partial"] += 1
+            req.send_response(206)
+            req.send_header('Content-Range', f'bytes {byte_range[0]}-{byte_range[1]}/{size}')
+        else:
+            req.send_response(200)
+        req.send_header('Content-Type', mime_type)
+        if encoding:
+            req.send_header('Content-Encoding', encoding)
+        req.send_header('Content-Length', count)
+        req.send_header('Accept-Ranges', 'bytes')
+        self._send_validators(req, asset)
+        req.end_headers()
+        if f is None:
+            if asset.body is not None and req.command != 'HEAD':
+                req.wfile.write(memoryview(asset.body)[offset:offset + count])
+            return None
+        with self._lock:
+            self._stats["sendfile"] += 1
+        return f, offset, count
+
+    @staticmethod
+    def _if_range(headers, asset) -> bool:
+        """If-Range : la plage ne vaut que si le client a encore cette version."""
+        if_range = headers.get('If-Range')
+        return not if_range or if_range.strip() in (asset.etag, asset.last_modified)
+
+    def _send_validators(self, req, asset):
+        if asset.compressible or asset.path.endswith('.gz'):
+            req.send_header('Vary', 'Accept-Encoding')
+        req.send_header('ETag', asset.etag)
+        req.send_header('Last-Modified', asset.last_modified)
+        if asset.path.startswith(BUNDLES_ROOT) and FINGERPRINT_RE.search(asset.path):
+            req.send_header('Cache-Control', IMMUTABLE_CACHE)
+        elif STATIC_MAX_AGE:
+            req.send_header('Cache-Control', f'public, max-age={STATIC_MAX_AGE}')
+        else:
+            req.send_header('Cache-Control', 'no-cache')
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries), bytes=self._bytes,
+                        max_bytes=self.max_bytes)
+
+
+def parse_range(header: str, size: int):
+    """
+    En-tête Range → (premier, dernier) octet inclus ; None si l'en-tête est
+    ignoré (autre unité, plusieurs plages → réponse complète) ; False si la
+    plage est hors du fichier (416).
+    """
+    unit, _, spec = header.partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in spec:
+        return None
+    first, sep, last = spec.strip().partition('-')
+    if not sep:
+        return None
+    try:
+        if not first:                           # bytes=-500 : les 500 derniers octets
+            length = int(last)
+            if length <= 0 or size == 0:
+                return False
+            return max(0, size - length), size - 1
+        first = int(first)
+        last  = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if first >= size:
+        return False
+    if first > last:
+        return None
+    return first, min(last, size - 1)
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """Accept-Encoding autorise-t-il gzip ? (gzip;q=0 le refuse, * l'accepte)"""
+    qualities = {}
+    for item in accept_encoding.lower().split(','):
+        name, _, params = item.partition(';')
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        qualities[name.strip()] = q
+    return qualities.get('gzip', qualities.get('*', 0)) > 0
+
+
+# ── Précompression ────────────────────────────────────────────────────────────
+
+def precompress(root=STATIC_ROOT, level=9) -> list:
+    """
+    Écrit <fichier>.gz à côté de chaque asset texte dont la variante manque ou
+    est plus ancienne que la source. Une variante qui n'économise pas
+    GZIP_MIN_GAIN est supprimée (le fichier est alors servi tel quel).
+    Retourne le rapport : [(chemin relatif, octets, octets gzip ou None, recompressé)].
+    """
+    report = []
+    for dirpath, _, filenames in os.walk(root):
+        for name in sorted(filenames):
+            if not name.endswith(COMPRESSIBLE):
+                continue
+            path    = os.path.join(dirpath, name)
+            gz_path = path + '.gz'
+            st      = os.stat(path)
+            if st.st_size < GZIP_MIN_SIZE:
+                continue
+            relative = os.path.relpath(path, root)
+            try:
+                gz_st = os.stat(gz_path)
+                if gz_st.st_mtime_ns >= st.st_mtime_ns:
+                    report.append((relative, st.st_size, gz_st.st_size, False))
+                    continue
+            except OSError:
+                pass
+
+            with open(path, 'rb') as f:
+                data = f.read()
+            # mtime=0 : même source → même .gz, donc même ETag sur chaque serveur
+            compressed = gzip.compress(data, compresslevel=level, mtime=0)
+            if len(compressed) > len(data) * (1 - GZIP_MIN_GAIN):
+                if os.path.exists(gz_path):
+                    os.remove(gz_path)
+                report.append((relative, st.st_size, None, True))
+                continue
+            tmp = gz_path + '.tmp'
+            with open(tmp, 'wb') as f:
+                f.write(compressed)
+            os.replace(tmp, gz_path)
+            report.append((relative, st.st_size, len(compressed), True))
+    return report
+
+
+def print_report(report, verbose=False):
+    written = [r for r in report if r[3] and r[2] is not None]
+    kept    = [r for r in report if r[2] is not None]
+    if verbose:
+        for relative, size, gz_size, fresh in report:
+            if gz_size is None:
+                print(f"  [GZIP] {relative} : {size} o, non compressé (gain trop faible)")
+            else:
+                print(f"  [GZIP] {relative} : {size} → {gz_size} o (-{100 - gz_size * 100 // size} %)"
+                      f"{'' if fresh else ' (déjà à jour)'}")
+    total    = sum(size for _, size, _, _ in kept)
+    total_gz = sum(gz_size for _, _, gz_size, _ in kept)
+    if total:
+        print(f"  [GZIP] {len(kept)} assets précompressés ({len(written)} nouveaux) : "
+              f"{total / 1e6:.1f} Mo → {total_gz / 1e6:.1f} Mo (-{100 - total_gz * 100 // total} %)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Précompression gzip des fichiers /assets/")
+    parser.add_argument('--root', default=STATIC_ROOT, help="dossier des assets")
+    parser.add_argument('--level', type=int, default=9, help="niveau de compression gzip (1-9)")
+    args = parser.parse_args(argv)
+    print_report(precompress(os.path.realpath(args.root), args.level), verbose=True)
+    return 0
+
+
+# ── Instance globale ──────────────────────────────────────────────────────────
+static_cache = StaticCache()
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
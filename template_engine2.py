@@ -6,211 +6,582 @@ Supporte :
   {% extends "base.html" %}     — héritage de template
   {% block nom %}...{% endblock %}
   {% for item in liste %}...{% endfor %}
-  {% if condition %}...{% endif %}
+  {% if condition %}...{% else %}...{% endif %}
   {% include "partial.html" %}
+  {% cache nom var1 var2 ttl=300 %}...{% endcache %}  — fragment mis en cache
+  {% asset "layout.css" %}      — balise <link>/<script> d'un bundle (asset_tag)
+
+Chaque template est analysé UNE fois en arbre (nœuds ci-dessous), l'héritage
+extends/block et les includes sont résolus sur l'arbre, puis l'arbre est
+traduit en une fonction Python compilée, gardée dans un cache partagé
+(TemplateCache). Au rendu : pas de regex, pas de copie du contexte à chaque
+tour de boucle (contexte chaîné ChainMap), sortie accumulée dans une liste.
 """
 
-from ast import pattern
-from multiprocessing import context
+from collections import ChainMap, OrderedDict
 import re
 import os
+import threading
+import time
+
+
+class TemplateError(Exception):
+    """Template mal formé (balise non fermée, endfor orphelin...)."""
+
+
+# ── Arbre syntaxique ───────────────────────────────────────────────────────────
+
+class Text:
+    def __init__(self, text):
+        self.text = text
+
+class Var:
+    def __init__(self, key):
+        self.key = key
+
+class If:
+    def __init__(self, key, operator, comparator):
+        self.key        = key
+        self.operator   = operator     # '==', '!=' ou None
+        self.comparator = comparator   # valeur littérale comparée
+        self.body       = []
+        self.else_body  = []
+
+class For:
+    def __init__(self, item, key):
+        self.item = item
+        self.key  = key
+        self.body = []
+
+class Block:
+    def __init__(self, name, body=None):
+        self.name = name
+        self.body = body if body is not None else []
+
+class Include:
+    def __init__(self, name):
+        self.name = name
+
+class Extends:
+    def __init__(self, name):
+        self.name = name
+
+class Asset:
+    def __init__(self, name):
+        self.name = name
+
+class Cache:
+    def __init__(self, name, keys, ttl):
+        self.name = name
+        self.keys = keys           # variables dont dépend le fragment
+        self.ttl  = ttl
+        self.body = []
+
+
+# ── Analyse ────────────────────────────────────────────────────────────────────
+
+TOKEN_RE   = re.compile(r'(\{\{.*?\}\}|\{%.*?%\})', re.DOTALL)
+VAR_RE     = re.compile(r'\{\{\s*([\w.]+)\s*\}\}$')
+EXTENDS_RE = re.compile(r'\{%\s*extends\s+"([^"]+)"\s*%\}$')
+INCLUDE_RE = re.compile(r'\{%\s*include\s+"([^"]+)"\s*%\}$')
+ASSET_RE   = re.compile(r'\{%\s*asset\s+"([^"]+)"\s*%\}$')
+BLOCK_RE   = re.compile(r'\{%\s*block\s+(\w+)\s*%\}$')
+FOR_RE     = re.compile(r'\{%\s*for\s+(\w+)\s+in\s+([\w.]+)\s*%\}$')
+IF_RE      = re.compile(r'\{%\s*if\s+([\w.]+)(?:\s*(==|!=)\s*([\w.]+))?\s*%\}$')
+CACHE_RE   = re.compile(r'\{%\s*cache\s+(\w+)((?:\s+[\w.=]+)*)\s*%\}$')
+END_RE     = re.compile(r'\{%\s*(endblock|endfor|endif|endcache|else)(?:\s+\w+)?\s*%\}$')
+
+
+def parse(source, name='<template>'):
+    """Transforme le source d'un template en liste de nœuds."""
+    root  = []
+    stack = []          # balises ouvertes : (nœud, liste qui reçoit les enfants)
+    body  = root
+
+    for token in TOKEN_RE.split(source):
+        if not token:
+            continue
+
+        if token.startswith('{{'):
+            m = VAR_RE.match(token)
+            body.append(Var(m.group(1)) if m else Text(token))
+            continue
+
+        if not token.startswith('{%'):
+            body.append(Text(token))
+            continue
+
+        if m := EXTENDS_RE.match(token):
+            body.append(Extends(m.group(1)))
+            continue
+        if m := INCLUDE_RE.match(token):
+            body.append(Include(m.group(1)))
+            continue
+        if m := ASSET_RE.match(token):
+            body.append(Asset(m.group(1)))
+            continue
+
+        if m := BLOCK_RE.match(token):
+            node = Block(m.group(1))
+        elif m := FOR_RE.match(token):
+            node = For(m.group(1), m.group(2))
+        elif m := IF_RE.match(token):
+            node = If(m.group(1), m.group(2), m.group(3))
+        elif m := CACHE_RE.match(token):
+            node = _cache_node(m.group(1), m.group(2).split(), name)
+        elif m := END_RE.match(token):
+            tag = m.group(1)
+            expected = {'endblock': Block, 'endfor': For, 'endif': If, 'endcache': Cache, 'else': If}[tag]
+            if not stack or not isinstance(stack[-1][0], expected):
+                raise TemplateError(f"{name} : {{% {tag} %}} inattendu")
+            if tag == 'else':
+                node = stack[-1][0]
+                stack[-1] = (node, node.else_body)
+                body = node.else_body
+            else:
+                stack.pop()
+                body = stack[-1][1] if stack else root
+            continue
+        else:
+            print(f"  [TEMPLATE] Balise non traitée dans {name} : {token}")
+            body.append(Text(token))
+            continue
+
+        # Balise ouvrante : les nœuds suivants vont dans son corps
+        body.append(node)
+        stack.append((node, node.body))
+        body = node.body
+
+    if stack:
+        raise TemplateError(f"{name} : balise {type(stack[-1][0]).__name__.lower()} non fermée")
+    return root
+
+
+def _cache_node(fragment, args, name):
+    """{% cache sidebar user_role is_staff ttl=600 %} → Cache('sidebar', [...], 600)"""
+    keys, ttl = [], FragmentCache.DEFAULT_TTL
+    for arg in args:
+        if arg.startswith('ttl='):
+            if not arg[4:].isdigit():
+                raise TemplateError(f"{name} : ttl invalide dans {{% cache {fragment} %}}")
+            ttl = int(arg[4:])
+        else:
+            keys.append(arg)
+    return Cache(fragment, keys, ttl)
+
+
+# ── Cache de fragments ─────────────────────────────────────────────────────────
+
+class FragmentCache:
+    """
+    HTML déjà rendu d'un {% cache %}, indexé par (nom, valeurs des variables
+    déclarées). Ex : la sidebar du layout ne dépend que du rôle et de la page
+    active → rendue une fois par combinaison, pas à chaque requête.
+    Borné à max_entries (les plus anciennes entrées sont évincées).
+    """
+
+    DEFAULT_TTL = 300
+
+    def __init__(self, max_entries=1000):
+        self.max_entries = max_entries
+        self._entries    = OrderedDict()     # { clé: (expire_à, html) }
+        self._lock       = threading.Lock()
+        self.hits        = 0
+        self.misses      = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def set(self, key, html, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, html)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, name=None):
+        """Supprime un fragment (toutes ses variantes) ou tout le cache."""
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+                return
+            for key in [k for k in self._entries if k[0] == name]:
+                del self._entries[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+fragment_cache = FragmentCache()
+
+
+# ── Héritage ───────────────────────────────────────────────────────────────────
+
+def _collect_blocks(nodes, blocks):
+    """{nom_bloc: nœud Block} pour tous les blocs (même imbriqués)."""
+    for node in nodes:
+        if isinstance(node, Block):
+            blocks.setdefault(node.name, node)
+            _collect_blocks(node.body, blocks)
+        elif isinstance(node, If):
+            _collect_blocks(node.body, blocks)
+            _collect_blocks(node.else_body, blocks)
+        elif isinstance(node, (For, Cache)):
+            _collect_blocks(node.body, blocks)
+    return blocks
+
+
+def _strip_body(body):
+    """Comme avant : le contenu d'un bloc enfant est injecté sans espaces autour."""
+    body = list(body)
+    if body and isinstance(body[0], Text):
+        body[0] = Text(body[0].text.lstrip())
+    if body and isinstance(body[-1], Text):
+        body[-1] = Text(body[-1].text.rstrip())
+    return body
+
+
+def _replace_blocks(nodes, blocks):
+    """Remplace dans l'arbre parent les blocs redéfinis par l'enfant."""
+    result = []
+    for node in nodes:
+        if isinstance(node, Block):
+            if node.name in blocks:
+                result.append(Block(node.name, _strip_body(blocks[node.name].body)))
+            else:
+                result.append(Block(node.name, _replace_blocks(node.body, blocks)))
+        elif isinstance(node, If):
+            copy = If(node.key, node.operator, node.comparator)
+            copy.body      = _replace_blocks(node.body, blocks)
+            copy.else_body = _replace_blocks(node.else_body, blocks)
+            result.append(copy)
+        elif isinstance(node, For):
+            copy = For(node.item, node.key)
+            copy.body = _replace_blocks(node.body, blocks)
+            result.append(copy)
+        elif isinstance(node, Cache):
+            copy = Cache(node.name, node.keys, node.ttl)
+            copy.body = _replace_blocks(node.body, blocks)
+            result.append(copy)
+        else:
+            result.append(node)
+    return result
+
+
+# ── Génération de code ─────────────────────────────────────────────────────────
+
+# Nombre de morceaux accumulés au-delà duquel une boucle rend la main (streaming)
+FLUSH_PIECES = 512
+
+
+class _CodeGen:
+    """
+    Traduit un arbre en source Python d'un générateur render(ctx) qui produit
+    la page par morceaux : au début de chaque bloc, et pendant les boucles dès
+    que FLUSH_PIECES morceaux sont accumulés.
+    """
+
+    def __init__(self):
+        self.lines    = []
+        self.count    = 0
+        self.in_cache = 0     # pas de flush dans un {% cache %} : on capture sa sortie
+
+    def emit(self, line, depth):
+        self.lines.append('    ' * depth + line)
+
+    def new_id(self):
+        self.count += 1
+        return self.count
+
+    def generate(self, nodes):
+        self.emit('def render(_ctx):', 0)
+        self.emit('c0 = _ctx if isinstance(_ctx, ChainMap) else ChainMap(_ctx)', 1)
+        self.emit('_o = []', 1)
+        self.emit('_a = _o.append', 1)
+        self.nodes(nodes, 1, 'c0')
+        self.emit("yield ''.join(_o)", 1)
+        return '\n'.join(self.lines)
+
+    def flush(self, depth, threshold=0):
+        if self.in_cache:
+            return
+        self.emit(f'if len(_o) > {threshold}:', depth)
+        self.emit("yield ''.join(_o)", depth + 1)
+        self.emit('_o.clear()', depth + 1)
+
+    def nodes(self, nodes, depth, ctx):
+        start = len(self.lines)
+        pending = []                         # textes consécutifs fusionnés
+        for node in nodes:
+            if isinstance(node, Text):
+                pending.append(node.text)
+                continue
+            if pending:
+                self.emit(f'_a({"".join(pending)!r})', depth)
+                pending = []
+            self.node(node, depth, ctx)
+        if pending:
+            self.emit(f'_a({"".join(pending)!r})', depth)
+        if len(self.lines) == start:
+            self.emit('pass', depth)
+
+    def lookup(self, key, ctx):
+        parts = key.split('.')
+        if len(parts) == 1:
+            return f'{ctx}.get({key!r})'
+        return f'_lookup({ctx}, {tuple(parts)!r})'
+
+    def node(self, node, depth, ctx):
+        if isinstance(node, Var):
+            n = self.new_id()
+            self.emit(f'_v{n} = {self.lookup(node.key, ctx)}', depth)
+            self.emit(f"_a('' if _v{n} is None else str(_v{n}))", depth)
+
+        elif isinstance(node, Block):
+            # Ex: tout le <head> part avant le contenu → le navigateur charge
+            # les CSS/JS du layout pendant le rendu du tableau
+            self.flush(depth)
+            self.nodes(node.body, depth, ctx)
+
+        elif isinstance(node, Asset):
+            # Résolu au rendu : un nouveau build change l'URL sans recompiler
+            self.emit(f'_a(_asset({node.name!r}))', depth)
+
+        elif isinstance(node, Include):
+            pass                             # remplacé par l'arbre inclus
+
+        elif isinstance(node, Extends):
+            pass                             # déjà résolu par l'héritage
+
+        elif isinstance(node, If):
+            value = self.lookup(node.key, ctx)
+            if node.operator is None:
+                test = value
+            else:
+                test = f'str({value}) {node.operator} {node.comparator!r}'
+            self.emit(f'if {test}:', depth)
+            self.nodes(node.body, depth + 1, ctx)
+            if node.else_body:
+                self.emit('else:', depth)
+                self.nodes(node.else_body, depth + 1, ctx)
+
+        elif isinstance(node, For):
+            n     = self.new_id()
+            inner = f'c{n}'
+            # Une seule couche de contexte par boucle, mise à jour à chaque tour
+            self.emit(f'_items{n} = {self.lookup(node.key, ctx)} or []', depth)
+            self.emit(f'_last{n} = len(_items{n}) - 1', depth)
+            self.emit(f'_d{n} = {{}}', depth)
+            self.emit(f'{inner} = {ctx}.new_child(_d{n})', depth)
+            self.emit(f'for _i{n}, _item{n} in enumerate(_items{n}):', depth)
+            self.emit(f'_d{n}[{node.item!r}] = _item{n}', depth + 1)
+            self.emit(f"_d{n}['loop_index'] = _i{n} + 1", depth + 1)
+            self.emit(f"_d{n}['loop_first'] = _i{n} == 0", depth + 1)
+            self.emit(f"_d{n}['loop_last'] = _i{n} == _last{n}", depth + 1)
+            self.nodes(node.body, depth + 1, inner)
+            self.flush(depth + 1, FLUSH_PIECES)
+
+        elif isinstance(node, Cache):
+            n    = self.new_id()
+            keys = ', '.join(f'str({self.lookup(k, ctx)})' for k in node.keys)
+            self.emit(f'_k{n} = ({node.name!r}, {keys})', depth)
+            self.emit(f'_f{n} = _fragments.get(_k{n})', depth)
+            self.emit(f'if _f{n} is None:', depth)
+            self.emit(f'_s{n} = len(_o)', depth + 1)
+            self.in_cache += 1
+            self.nodes(node.body, depth + 1, ctx)
+            self.in_cache -= 1
+            self.emit(f"_f{n} = ''.join(_o[_s{n}:])", depth + 1)
+            self.emit(f'del _o[_s{n}:]', depth + 1)
+            self.emit(f'_fragments.set(_k{n}, _f{n}, {node.ttl})', depth + 1)
+            self.emit(f'_a(_f{n})', depth)
+
+
+def _lookup(ctx, parts):
+    """
+    Résout une clé pointée (objet.attribut).
+    Supporte dict et objet avec attributs.
+    """
+    val = ctx.get(parts[0])
+    for part in parts[1:]:
+        if val is None:
+            break
+        if isinstance(val, dict):
+            val = val.get(part)
+        else:
+            val = getattr(val, part, None)
+    return val
+
+
+# ── Cache des templates ────────────────────────────────────────────────────────
+
+class _Entry:
+    """Template compilé : source, fonction render et fichiers dont il dépend."""
+
+    __slots__ = ('source', 'render', 'deps')
+
+    def __init__(self, source, render, deps):
+        self.source = source
+        self.render = render
+        self.deps   = deps         # { chemin: mtime_ns } (template, parents, includes)
+
+
+class TemplateCache:
+    """
+    Cache partagé par tous les TemplateEngine du processus :
+    { (dossier, nom): _Entry }. Le template est chargé, son héritage
+    extends/include fusionné et compilé une seule fois.
+    - production : aucun accès disque après le premier rendu ;
+    - développement (TEMPLATE_AUTO_RELOAD=1) : les mtime des fichiers
+      dépendants sont vérifiées à chaque rendu → recompilation si modifiés.
+    """
+
+    def __init__(self):
+        self._entries    = {}
+        self._lock       = threading.Lock()
+        self.auto_reload = None    # lu au premier rendu (après le chargement du .env)
+
+    def get(self, engine, name):
+        if self.auto_reload is None:
+            self.auto_reload = os.getenv('TEMPLATE_AUTO_RELOAD', '0').lower() in ('1', 'true', 'yes')
+        key   = (engine.templates_dir, name)
+        entry = self._entries.get(key)
+        if entry is not None and (not self.auto_reload or self._fresh(entry)):
+            return entry
+        if entry is not None:
+            fragment_cache.invalidate()    # template modifié : fragments périmés
+        entry = engine.compile_entry(name)
+        with self._lock:
+            self._entries[key] = entry
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _fresh(entry):
+        try:
+            return all(os.stat(path).st_mtime_ns == mtime for path, mtime in entry.deps.items())
+        except OSError:
+            return False
+
+
+template_cache = TemplateCache()
+
+
+# ── Moteur ─────────────────────────────────────────────────────────────────────
+
+def _default_asset_tag(name):
+    url = '/assets/' + name
+    if name.endswith('.css'):
+        return f'<link rel="stylesheet" href="{url}" />'
+    return f'<script src="{url}"></script>'
 
 
 class TemplateEngine:
 
-    def __init__(self, templates_dir=None):
+    def __init__(self, templates_dir=None, asset_tag=None):
         if templates_dir is None:
             # Toujours relatif à l'emplacement de template_engine.py
             base = os.path.dirname(os.path.abspath(__file__))
             self.templates_dir = os.path.join(base, 'templates')
         else:
             self.templates_dir = templates_dir
+        self.templates_dir = os.path.abspath(self.templates_dir)
+        # {% asset "nom" %} → HTML (ex: asset_bundles.asset_manifest.tag)
+        self.asset_tag     = asset_tag or _default_asset_tag
 
     # ── API publique ───────────────────────────────────────────────────────────
 
     def render(self, template_name, context=None):
-        """Point d'entrée : charge et rend un template."""
+        """Point d'entrée : rend un template (compilé une seule fois)."""
+        return ''.join(self.render_stream(template_name, context))
+
+    def render_stream(self, template_name, context=None):
+        """Comme render, mais retourne un générateur de morceaux de page."""
         if context is None:
             context = {}
-        content = self._load(template_name)
-        content = self._process_extends(content, context)
-        content = self._process_includes(content, context)
-        content = self._process_blocks(content, context)
-        content = self._render_loops(content, context)
-        content = self._render_conditionals(content, context)
-        content = self._render_variables(content, context)
-
-        import re
-        remaining = re.findall(r'\{%.*?%\}', content)
-        if remaining:
-            print(f"  [TEMPLATE] Balises non traitées : {remaining}")
-
-        return content
+        return template_cache.get(self, template_name).render(context)
+
+    def compile(self, template_name):
+        """Analyse le template, résout l'héritage et retourne le générateur render."""
+        return self.compile_entry(template_name).render
+
+    def compile_entry(self, template_name):
+        deps   = {}
+        nodes  = self._tree(template_name, (), deps)
+        source = _CodeGen().generate(nodes)
+        scope  = {
+            'ChainMap': ChainMap,
+            '_lookup':    _lookup,
+            '_fragments': fragment_cache,
+            '_asset':     self.asset_tag,
+        }
+        exec(compile(source, f'<template {template_name}>', 'exec'), scope)
+        return _Entry(source, scope['render'], deps)
+
+    def warm_up(self):
+        """
+        Précompile tous les templates du dossier (à appeler au démarrage).
+        Retourne le nombre de templates compilés.
+        """
+        count = 0
+        for folder, _, files in os.walk(self.templates_dir):
+            for filename in sorted(files):
+                if not filename.endswith('.html'):
+                    continue
+                name = os.path.relpath(os.path.join(folder, filename), self.templates_dir)
+                template_cache.get(self, name.replace(os.sep, '/'))
+                count += 1
+        return count
 
     # ── Chargement ─────────────────────────────────────────────────────────────
 
-    def _load(self, name):
+    def _load(self, name, deps):
         path = os.path.join(self.templates_dir, name)
         with open(path, 'r', encoding='utf-8') as f:
+            deps[path] = os.fstat(f.fileno()).st_mtime_ns
             return f.read()
 
-    # ── Héritage ───────────────────────────────────────────────────────────────
-
-    def _process_extends(self, content, context):
-        """Gère {% extends "layouts/base.html" %}"""
-        match = re.search(r'\{%\s*extends\s+"([^"]+)"\s*%\}', content)
-        if not match:
-            return content
-
-        parent_name = match.group(1)
-        parent = self._load(parent_name)
-
-        # Extraire les blocs de l'enfant
-        child_blocks = self._extract_blocks(content)
-
-        # Injecter les blocs de l'enfant dans le parent
-        def replace_block(m):
-            block_name = m.group(1)
-            return child_blocks.get(block_name, m.group(2))
-
-        result = re.sub(
-            r'\{%\s*block\s+(\w+)\s*%\}(.*?)\{%\s*endblock\s*%\}',
-            replace_block,
-            parent,
-            flags=re.DOTALL
-        )
-        return result
-
-    def _extract_blocks(self, content):
-        """Retourne un dict {nom_bloc: contenu} pour un template enfant."""
-        blocks = {}
-        for m in re.finditer(
-            r'\{%\s*block\s+(\w+)\s*%\}(.*?)\{%\s*endblock\s*%\}',
-            content, re.DOTALL
-        ):
-            blocks[m.group(1)] = m.group(2).strip()
-        return blocks
-
-    def _process_blocks(self, content, context):
-        """Supprime les balises block restantes (template sans extends)."""
-        return re.sub(
-            r'\{%\s*block\s+\w+\s*%\}(.*?)\{%\s*endblock\s*%\}',
-            r'\1',
-            content,
-            flags=re.DOTALL
-        )
-
-    # ── Includes ───────────────────────────────────────────────────────────────
-
-    def _process_includes(self, content, context):
-        """Gère {% include "partials/nav.html" %}"""
-        def replacer(m):
-            return self.render(m.group(1), context)
-        return re.sub(
-            r'\{%\s*include\s+"([^"]+)"\s*%\}',
-            replacer,
-            content
-        )
-
-    # ── Boucles ────────────────────────────────────────────────────────────────
-
-    def _render_loops(self, content, context):
-        """Gère {% for item in liste %}...{% endfor %}"""
-        pattern = r'\{%\s*for\s+(\w+)\s+in\s+(\w+)\s*%\}(.*?)\{%\s*endfor\s*%\}'
-
-        def replacer(m):
-            item_name = m.group(1)
-            list_name = m.group(2)
-            block     = m.group(3)
-            items = self._resolve(list_name, context) or []
-            result = ''
-            for i, item in enumerate(items):
-                loop_ctx = {
-                    **context,
-                    item_name: item,
-                    'loop_index': i + 1,
-                    'loop_first': i == 0,
-                    'loop_last':  i == len(items) - 1,
-                }
-                rendered = self._render_loops(block, loop_ctx)
-                rendered = self._render_conditionals(rendered, loop_ctx)
-                rendered = self._render_variables(rendered, loop_ctx)
-                result += rendered
-            return result
-
-        return re.sub(pattern, replacer, content, flags=re.DOTALL)
-
-    # ── Conditionnels ──────────────────────────────────────────────────────────
-
-    def _render_conditionals(self, content, context):
-        """
-        Gère les {% if %} imbriqués en traitant de l'intérieur vers l'extérieur.
-        """
-        pattern = (
-            r'\{%\s*if\s+'
-            r'([\w.]+)'
-            r'(?:\s*(==|!=)\s*([\w.]+))?'
-            r'\s*%\}'
-            r'(.*?)'
-            r'(?:\{%\s*else\s*%\}(.*?))?'
-            r'\{%\s*endif\s*%\}'
-        )
-
-        def replacer(m):
-            variable   = m.group(1)
-            operator   = m.group(2)   # == ou != ou None
-            comparator = m.group(3)   # valeur comparée ou None
-            if_block   = m.group(4)
-            else_block = m.group(5) or ''
-
-            value = self._resolve(variable, context)
-
-            if operator is None:
-                # {% if variable %} — vérifie si truthy
-                result = bool(value)
-            elif operator == '==':
-                result = str(value) == str(comparator)
-            elif operator == '!=':
-                result = str(value) != str(comparator)
-            else:
-                result = False
-
-            return if_block if result else else_block
-        
-        # ── Appliquer le regex en boucle jusqu'à ce qu'il n'y ait plus rien ───
-        # Chaque passage traite les {% if %} les plus internes
-        previous = None
-        while previous != content:
-            previous = content
-            content  = re.sub(pattern, replacer, content, flags=re.DOTALL)
-
-        return content
-        # return re.sub(pattern, replacer, content, flags=re.DOTALL)
+    # ── Héritage et includes ───────────────────────────────────────────────────
 
-    # ── Variables ──────────────────────────────────────────────────────────────
-
-    def _render_variables(self, content, context):
-        """Gère {{ variable }} et {{ objet.attribut }}"""
-        def replacer(m):
-            key = m.group(1).strip()
-            val = self._resolve(key, context)
-            return str(val) if val is not None else ''
-        return re.sub(r'\{\{\s*([\w.]+)\s*\}\}', replacer, content)
-
-    # ── Résolution de variables ────────────────────────────────────────────────
-
-    def _resolve(self, key, context):
+    def _tree(self, name, chain, deps):
         """
-        Résout une clé simple ou pointée (objet.attribut).
-        Supporte dict, objet avec attributs, et index de liste.
+        Arbre du template avec {% extends %} résolu (sur plusieurs niveaux)
+        et les {% include %} remplacés par l'arbre du template inclus.
         """
-        parts = key.split('.')
-        val = context.get(parts[0])
-        for part in parts[1:]:
-            if val is None:
-                break
-            if isinstance(val, dict):
-                val = val.get(part)
-            else:
-                val = getattr(val, part, None)
-        return val
\ No newline at end of file
+        if name in chain:
+            raise TemplateError(f"Héritage / include circulaire : {' → '.join(chain + (name,))}")
+        chain = chain + (name,)
+        nodes = parse(self._load(name, deps), name)
+
+        parent = next((n for n in nodes if isinstance(n, Extends)), None)
+        if parent is not None:
+            child_blocks = _collect_blocks(nodes, {})
+            nodes = _replace_blocks(self._tree(parent.name, chain, deps), child_blocks)
+
+        self._inline_includes(nodes, chain, deps)
+        return nodes
+
+    def _inline_includes(self, nodes, chain, deps):
+        """{% include "partials/nav.html" %} — rendu avec le contexte courant."""
+        for i, node in enumerate(nodes):
+            if isinstance(node, Include):
+                # Nom non valide pour un {% block %} : jamais remplacé par un enfant
+                nodes[i] = Block(f'include:{node.name}', self._tree(node.name, chain, deps))
+            elif isinstance(node, (Block, For, Cache)):
+                self._inline_includes(node.body, chain, deps)
+            elif isinstance(node, If):
+                self._inline_includes(node.body, chain, deps)
+                self._inline_includes(node.else_body, chain, deps)
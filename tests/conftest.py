@@ -0,0 +1,33 @@
+"""
+tests/conftest.py — Fixtures partagées
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from app_async import AsyncServer
+
+
+@pytest.fixture
+def async_port():
+    """Port d'un AsyncServer (app_async) lancé dans sa propre boucle, arrêté après le test."""
+    loop   = asyncio.new_event_loop()
+    server = loop.run_until_complete(
+        asyncio.start_server(AsyncServer(workers=2).handle_connection, '127.0.0.1', 0))
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield server.sockets[0].getsockname()[1]
+
+    async def stop():
+        server.close()
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    asyncio.run_coroutine_threadsafe(stop(), loop).result(timeout=5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(timeout=5)
+    loop.close()
@@ -0,0 +1,65 @@
+"""
+tests/test_async_server.py — Lecture des requêtes par app_async
+Content-Length invalide → 400 ; corps non lu par le controller vidé avant
+la requête suivante. Seules des URL /assets/ sont demandées (ni
+authentification ni MySQL).
+"""
+
+import socket
+
+import pytest
+
+
+ASSET = '/assets/css/adminlte.css'
+
+
+@pytest.fixture
+def port(async_port):
+    return async_port
+
+
+def _exchange(port, raw):
+    """Envoie raw, retourne tout ce que le serveur répond avant de fermer."""
+    with socket.create_connection(('127.0.0.1', port), timeout=5) as sock:
+        sock.sendall(raw)
+        data = b''
+        while chunk := sock.recv(65536):
+            data += chunk
+    return data
+
+
+@pytest.mark.parametrize('length', [b'abc', b'-1', b'+5', b'1e3'])
+def test_invalid_content_length(port, length):
+    response = _exchange(port, b"POST /books/import HTTP/1.1\r\nHost: x\r\n"
+                               b"Content-Length: " + length + b"\r\n\r\n")
+    assert response.startswith(b"HTTP/1.1 400 ")
+
+
+def test_unread_body_is_drained(port):
+    body     = b"x" * 5000
+    response = _exchange(port,
+        f"POST {ASSET} HTTP/1.1\r\nHost: x\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body
+        + f"GET {ASSET} HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n".encode())
+    assert response.count(b"HTTP/1.1 200 ") == 2
+
+
+def test_body_streamed_to_controller(port, monkeypatch):
+    import app_async
+    received = []
+
+    def fake_dispatch(req, path, query_string):
+        # Lecture par morceaux comme import_books, depuis le thread de l'executor
+        total = 0
+        while chunk := req.rfile.read(8192):
+            total += len(chunk)
+        received.append(total)
+        req.send_response(204)
+        req.send_header('Content-Length', '0')
+        req.end_headers()
+
+    monkeypatch.setattr(app_async, 'dispatch', fake_dispatch)
+    body     = b"a,b,c\r\n" * 200_000
+    response = _exchange(port, f"POST /books/import HTTP/1.1\r\nHost: x\r\nConnection: close\r\n"
+                               f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    assert response.startswith(b"HTTP/1.1 204 ")
+    assert received == [len(body)]
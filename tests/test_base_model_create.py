@@ -0,0 +1,40 @@
+"""
+tests/test_base_model_create.py — Allers-retours de BaseModel.create
+Hors transaction, un INSERT part seul (autocommit) ; dans une transaction
+ouverte, il passe par un SAVEPOINT. Aucune base nécessaire.
+"""
+
+from contextlib import contextmanager
+
+from models.base_model import BaseModel, db
+
+
+class Item(BaseModel):
+    table  = 'items'
+    fields = ['name']
+
+
+def _record(monkeypatch, in_transaction):
+    calls = []
+
+    @contextmanager
+    def transaction():
+        calls.append('transaction')
+        yield
+
+    monkeypatch.setattr(db, 'in_transaction', lambda: in_transaction)
+    monkeypatch.setattr(db, 'transaction', transaction)
+    monkeypatch.setattr(db, 'execute', lambda sql, params=None: calls.append(sql.split()[0]) or 7)
+    return calls
+
+
+def test_standalone_insert_runs_alone(monkeypatch):
+    calls = _record(monkeypatch, in_transaction=False)
+    assert Item().create({'name': 'x', 'ignored': 1}) == 7
+    assert calls == ['INSERT']
+
+
+def test_insert_in_transaction_uses_savepoint(monkeypatch):
+    calls = _record(monkeypatch, in_transaction=True)
+    assert Item().create({'name': 'x'}) == 7
+    assert calls == ['transaction', 'INSERT']
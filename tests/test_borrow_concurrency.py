@@ -0,0 +1,131 @@
+"""
+Emprunts simultanés (BorrowModel.checkout) sur une vraie base MySQL.
+Ignorés si la base de test n'est pas configurée (DB_HOST, DB_NAME... dans .env).
+Chaque test crée ses propres livres / étudiants et les supprime ensuite.
+"""
+
+import os
+import threading
+import uuid
+
+import pytest
+from mysql.connector import Error
+
+from models.borrow import (BorrowModel, MAX_BORROWS, CHECKOUT_OK, CHECKOUT_UNAVAILABLE,
+                           CHECKOUT_LIMIT_REACHED, CHECKOUT_ALREADY_BORROWED)
+from models.database import db
+
+
+def _db_available():
+    if not os.getenv('DB_NAME'):
+        return False
+    try:
+        db.fetch_one("SELECT 1")
+        return True
+    except Error:
+        return False
+
+
+pytestmark = pytest.mark.skipif(not _db_available(), reason="base MySQL de test non configurée")
+
+
+@pytest.fixture
+def fixtures():
+    created = {"books": [], "users": []}
+    tag     = uuid.uuid4().hex[:10]
+
+    def book(copies):
+        book_id = db.execute("""
+            INSERT INTO books (title, author, isbn, copies, available_copies)
+            VALUES (%s, 'Test', %s, %s, %s)
+        """, (f"Concurrence {tag}", f"T{tag}{len(created['books'])}", copies, copies))
+        created["books"].append(book_id)
+        return book_id
+
+    def student():
+        user_id = db.execute("""
+            INSERT INTO users (firstname, lastname, email, password, role)
+            VALUES ('Test', 'Concurrence', %s, 'x', 'student')
+        """, (f"{tag}.{len(created['users'])}@test.local",))
+        created["users"].append(user_id)
+        return user_id
+
+    yield book, student
+
+    for book_id in created["books"]:
+        db.execute("DELETE FROM borrows WHERE book_id = %s", (book_id,))
+        db.execute("DELETE FROM books WHERE id = %s", (book_id,))
+    for user_id in created["users"]:
+        db.execute("DELETE FROM users WHERE id = %s", (user_id,))
+
+
+def _run_concurrently(pairs):
+    """checkout() de chaque (user_id, book_id) dans un thread, départ simultané."""
+    barrier = threading.Barrier(len(pairs))
+    results = [None] * len(pairs)
+
+    def worker(i, user_id, book_id):
+        barrier.wait()
+        try:
+            results[i] = BorrowModel().checkout(user_id, book_id).status
+        except Error as e:          # deadlock (1213), délai de verrou... : échec du test
+            results[i] = f"erreur {e.errno}"
+
+    threads = [threading.Thread(target=worker, args=(i, u, b)) for i, (u, b) in enumerate(pairs)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_last_copy_goes_to_a_single_student(fixtures):
+    book, student = fixtures
+    book_id  = book(copies=1)
+    students = [student() for _ in range(8)]
+
+    results = _run_concurrently([(user_id, book_id) for user_id in students])
+
+    assert results.count(CHECKOUT_OK) == 1
+    assert results.count(CHECKOUT_UNAVAILABLE) == 7
+    row = db.fetch_one("SELECT available_copies FROM books WHERE id = %s", (book_id,))
+    assert row['available_copies'] == 0
+
+
+def test_borrow_limit_holds_under_concurrency(fixtures):
+    book, student = fixtures
+    user_id  = student()
+    book_ids = [book(copies=5) for _ in range(MAX_BORROWS + 3)]
+
+    results = _run_concurrently([(user_id, book_id) for book_id in book_ids])
+
+    assert results.count(CHECKOUT_OK) == MAX_BORROWS
+    assert results.count(CHECKOUT_LIMIT_REACHED) == 3
+    active = db.fetch_one("SELECT COUNT(*) AS n FROM borrows WHERE user_id = %s AND returned_at IS NULL",
+                          (user_id,))
+    assert active['n'] == MAX_BORROWS
+
+
+def test_same_book_borrowed_once(fixtures):
+    book, student = fixtures
+    user_id = student()
+    book_id = book(copies=5)
+
+    results = _run_concurrently([(user_id, book_id)] * 6)
+
+    assert results.count(CHECKOUT_OK) == 1
+    assert results.count(CHECKOUT_ALREADY_BORROWED) == 5
+
+
+def test_different_students_and_books_do_not_deadlock(fixtures):
+    # Étudiants sans emprunt en cours, voisins dans l'index de borrows
+    # (début d'année) : leurs INSERT ne doivent pas se bloquer mutuellement
+    book, student = fixtures
+    pairs = [(student(), book(copies=1)) for _ in range(12)]
+
+    results = _run_concurrently(pairs)
+
+    assert results == [CHECKOUT_OK] * len(pairs)
+    for user_id, book_id in pairs:
+        row = db.fetch_one("SELECT available_copies FROM books WHERE id = %s", (book_id,))
+        assert row['available_copies'] == 0
@@ -0,0 +1,109 @@
+"""
+tests/test_borrows_query_count.py — Nombre de requêtes de la page /borrows
+La page ne doit pas faire une requête par livre (N+1) : le nombre de
+requêtes est le même pour 10 ou 5 000 livres au catalogue.
+Aucune base nécessaire : db.fetch_one / db.fetch_all sont remplacés par des
+fonctions qui comptent les appels et renvoient des lignes factices.
+"""
+
+import io
+import pytest
+from models.database import Database
+from controllers.borrow_controller import BorrowController
+from models.borrow import CheckoutResult, CHECKOUT_UNAVAILABLE
+
+db = Database()
+
+
+class FakeRequest:
+    """Interface minimale d'un MainHandler pour BaseController.render."""
+    command          = 'GET'
+    path             = '/borrows'
+    request_version  = 'HTTP/1.1'
+    close_connection = False
+
+    def __init__(self):
+        self.session = {'role': 'admin', 'firstname': 'Admin', 'lastname': 'Test', 'user_id': 1}
+        self.headers = {}
+        self.wfile   = io.BytesIO()
+        self.status  = None
+
+    def send_response(self, code, message=None):
+        self.status = code
+
+    def send_header(self, keyword, value):
+        pass
+
+    def end_headers(self):
+        pass
+
+
+def _book(i):
+    return {'id': i, 'title': f"Livre {i}", 'author': "Auteur", 'copies': 3,
+            'available_copies': 2, 'available': 2}
+
+
+def _student(i):
+    return {'id': i, 'firstname': "Étudiant", 'lastname': str(i), 'matricule': f"M{i}"}
+
+
+def _borrow(i):
+    return {'id': i, 'book_title': f"Livre {i}", 'firstname': "Étudiant", 'lastname': str(i),
+            'matricule': f"M{i}", 'borrowed_at': '2026-01-01', 'due_date': '2026-01-15',
+            'days_remaining': 3, 'days_late': None}
+
+
+@pytest.fixture
+def count_queries(monkeypatch):
+    """Remplace les lectures SQL ; retourne (set_catalogue, queries)."""
+    queries = []
+    size    = {'books': 0}
+
+    def fake_fetch_all(query, params=None):
+        queries.append(query)
+        if 'FROM borrows b' in query:
+            return [_borrow(i) for i in range(1, 51)]
+        if 'FROM users' in query:
+            return [_student(i) for i in range(1, 201)]
+        if 'FROM books' in query:
+            return [_book(i) for i in range(1, size['books'] + 1)]
+        return []
+
+    def fake_fetch_one(query, params=None):
+        queries.append(query)
+        return {'total': 0}
+
+    monkeypatch.setattr(db, 'fetch_all', fake_fetch_all)
+    monkeypatch.setattr(db, 'fetch_one', fake_fetch_one)
+
+    def set_catalogue(n):
+        size['books'] = n
+        queries.clear()
+
+    return set_catalogue, queries
+
+
+@pytest.mark.parametrize('books', [10, 5000])
+def test_borrows_index_constant_queries(count_queries, books):
+    set_catalogue, queries = count_queries
+    set_catalogue(books)
+    req = FakeRequest()
+    BorrowController().index(req, {}, '')
+    assert req.status == 200
+    assert f"Livre {books}".encode() in req.wfile.getvalue()
+    assert len(queries) == 3
+
+
+@pytest.mark.parametrize('books', [10, 5000])
+def test_borrows_create_error_constant_queries(count_queries, monkeypatch, books):
+    set_catalogue, queries = count_queries
+    controller = BorrowController()
+    monkeypatch.setattr(controller, 'get_body', lambda req: {'user_id': '1', 'book_id': '1'})
+    monkeypatch.setattr(controller.model, 'checkout',
+                        lambda user_id, book_id: CheckoutResult(CHECKOUT_UNAVAILABLE, None, _book(1)))
+    set_catalogue(books)
+    req = FakeRequest()
+    req.command = 'POST'
+    controller.create(req, {}, '')
+    assert req.status == 200
+    assert len(queries) == 3
@@ -0,0 +1,50 @@
+"""
+tests/test_head_requests.py — HEAD servi comme GET, sans corps
+Pages (/login, 404) et assets, avec app.py et app_async.py ; la connexion
+keep-alive reste utilisable après une réponse à HEAD.
+"""
+
+import http.client
+import threading
+
+import pytest
+
+from app import MainHandler
+from server import ThreadPoolHTTPServer
+
+
+@pytest.fixture(params=['threads', 'asyncio'])
+def port(request):
+    if request.param == 'threads':
+        srv = ThreadPoolHTTPServer(('127.0.0.1', 0), MainHandler, workers=2)
+        threading.Thread(target=srv.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+        yield srv.server_address[1]
+        srv.shutdown()
+        srv.server_close()
+        return
+
+    yield request.getfixturevalue('async_port')
+
+
+@pytest.mark.parametrize('path', ['/login', '/page-inexistante', '/assets/css/adminlte.css'])
+def test_head_matches_get_without_body(port, path):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+
+    conn.request('GET', path)
+    get = conn.getresponse()
+    body = get.read()
+
+    conn.request('HEAD', path)
+    head = conn.getresponse()
+    assert head.read() == b''
+    assert head.status == get.status
+    assert head.getheader('Content-Type') == get.getheader('Content-Type')
+    if get.getheader('Content-Length') is not None:
+        assert int(head.getheader('Content-Length')) == len(body)
+
+    # Même connexion : la requête suivante n'est pas polluée par un corps
+    conn.request('GET', path)
+    again = conn.getresponse()
+    assert again.status == get.status
+    assert again.read() == body
+    conn.close()
@@ -0,0 +1,93 @@
+"""
+tests/test_keepalive.py — Connexions keep-alive et pool de threads
+Des connexions persistantes inactives ne doivent pas occuper les workers :
+avec plus de connexions inactives que de threads, un nouveau client est
+servi tout de suite. Aucune base nécessaire : seules des URL /assets/ sont
+demandées (elles ne passent ni par l'authentification ni par MySQL).
+"""
+
+import http.client
+import socket
+import threading
+import time
+
+import pytest
+
+from app import MainHandler
+from server import ThreadPoolHTTPServer
+
+ASSET = '/assets/css/adminlte.css'
+
+
+@pytest.fixture
+def server():
+    servers = []
+
+    def start(workers=2, keepalive_timeout=5.0):
+        srv = ThreadPoolHTTPServer(('127.0.0.1', 0), MainHandler, workers=workers,
+                                   queue_size=8, keepalive_timeout=keepalive_timeout)
+        threading.Thread(target=srv.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+        servers.append(srv)
+        return srv
+
+    yield start
+    for srv in servers:
+        srv.shutdown()
+        srv.server_close()
+
+
+def _get(conn):
+    conn.request('GET', ASSET)
+    response = conn.getresponse()
+    response.read()
+    return response
+
+
+def test_idle_connections_do_not_block_workers(server):
+    srv  = server(workers=2)
+    port = srv.server_address[1]
+
+    # 6 connexions servies puis laissées ouvertes (comme un navigateur)
+    idle = [http.client.HTTPConnection('127.0.0.1', port, timeout=5) for _ in range(6)]
+    for conn in idle:
+        assert _get(conn).status == 200
+
+    start  = time.monotonic()
+    client = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+    assert _get(client).status == 200
+    assert time.monotonic() - start < 1.0
+    assert srv.stats["rejected"] == 0
+
+    # Les connexions inactives restent utilisables
+    for conn in idle:
+        assert _get(conn).status == 200
+        conn.close()
+    client.close()
+
+
+def test_connections_without_request_do_not_block_workers(server):
+    srv  = server(workers=2)
+    port = srv.server_address[1]
+
+    # Connexions ouvertes sans rien envoyer (préconnexion du navigateur)
+    silent = [socket.create_connection(('127.0.0.1', port)) for _ in range(4)]
+
+    start  = time.monotonic()
+    client = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+    assert _get(client).status == 200
+    assert time.monotonic() - start < 1.0
+    client.close()
+    for sock in silent:
+        sock.close()
+
+
+def test_idle_connection_closed_after_timeout(server):
+    srv  = server(workers=1, keepalive_timeout=0.3)
+    conn = http.client.HTTPConnection('127.0.0.1', srv.server_address[1], timeout=5)
+    assert _get(conn).status == 200
+
+    time.sleep(0.6)
+    conn.sock.settimeout(2)
+    assert conn.sock.recv(1) == b''     # fermée par le serveur
+    assert srv.stats["idle"] == 0
+    conn.close()
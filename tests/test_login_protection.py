@@ -0,0 +1,46 @@
+"""
+tests/test_login_protection.py — Limitation des échecs de login et pool bcrypt
+"""
+
+import os
+import signal
+import time
+
+import bcrypt
+
+from services import crypto_pool
+from services.throttle import Throttle
+
+
+def test_throttle_keys_are_bounded():
+    throttle = Throttle(max_failures=3, max_keys=100)
+    for i in range(1000):
+        throttle.failure(f"inconnu{i}@example.com")
+    assert throttle.stats()["keys"] == 100
+    assert throttle.stats()["evicted"] == 900
+
+
+def test_throttle_evicts_least_recent_failure():
+    throttle = Throttle(max_failures=2, max_keys=3)
+    for key in ('a', 'b', 'a', 'c', 'a', 'd'):
+        throttle.failure(key)
+    # 'b' : dernier échec le plus ancien → oublié ; 'a' reste bloquée
+    assert set(throttle._failures) == {'a', 'c', 'd'}
+    assert throttle.retry_after('a') > 0
+
+
+def test_login_pool_rebuilt_after_worker_crash():
+    hashed = bcrypt.hashpw(b'secret', bcrypt.gensalt(4)).decode()
+    try:
+        assert crypto_pool.verify_password('secret', hashed)
+        pool = crypto_pool.get_pool('login', crypto_pool.LOGIN_WORKERS)
+        for pid in list(pool._processes):
+            os.kill(pid, signal.SIGKILL)
+        time.sleep(0.5)
+
+        assert crypto_pool.verify_password('secret', hashed)
+        assert not crypto_pool.verify_password('autre', hashed)
+        assert crypto_pool.get_pool('login', crypto_pool.LOGIN_WORKERS) is not pool
+        assert crypto_pool.login_stats()["in_flight"] == 0
+    finally:
+        crypto_pool.shutdown()
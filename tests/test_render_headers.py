@@ -0,0 +1,39 @@
+"""
+tests/test_render_headers.py — En-têtes supplémentaires de BaseController.render
+"""
+
+import io
+
+import pytest
+
+from controllers.base_controller import BaseController
+
+
+class FakeRequest:
+    request_version  = 'HTTP/1.1'
+    close_connection = False
+
+    def __init__(self):
+        self.wfile   = io.BytesIO()
+        self.headers = []
+
+    def send_response(self, code, message=None):
+        self.status = code
+
+    def send_header(self, keyword, value):
+        self.headers.append((keyword, str(value)))
+
+    def end_headers(self):
+        self.headers.append(None)
+
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_extra_headers_are_sent(stream):
+    req = FakeRequest()
+    BaseController().render(req, 'errors/404.html', {"path": "/x"}, status=503,
+                            stream=stream, headers={'Retry-After': 60})
+    assert req.status == 503
+    assert ('Retry-After', '60') in req.headers
+    assert req.headers.index(('Retry-After', '60')) < req.headers.index(None)
+    if stream:
+        assert ('Transfer-Encoding', 'chunked') in req.headers
@@ -0,0 +1,60 @@
+"""
+tests/test_session_revocation.py — Révocation des cookies signés (logout)
+"""
+
+import time
+
+import pytest
+
+import session
+from session import SignedCookieSessions
+
+KEYS = [('k1', 'secret')]
+
+
+def _jti(signer, token):
+    return signer._verify(token)["jti"]
+
+
+def test_expired_revocations_are_pruned_without_file():
+    signer = SignedCookieSessions(KEYS)
+    for _ in range(100):
+        signer.revoke(signer.encode({"expires_at": time.time() + 0.1}))
+    assert len(signer._revoked) == 100
+
+    time.sleep(0.2)
+    signer.revoke(signer.encode({"expires_at": time.time() + 60}))
+    assert len(signer._revoked) == 1
+
+
+def test_revocation_shared_and_file_compacted(tmp_path):
+    path = str(tmp_path / 'revoked.log')
+    a, b = SignedCookieSessions(KEYS, path), SignedCookieSessions(KEYS, path)
+    a.COMPACT_MIN = b.COMPACT_MIN = 10
+
+    for _ in range(50):
+        a.revoke(a.encode({"expires_at": time.time() + 0.1}))
+    token = a.encode({"expires_at": time.time() + 60})
+    jti   = _jti(a, token)
+    a.revoke(token)
+    assert b.decode(token) is None                   # révoqué aussi dans l'autre processus
+
+    time.sleep(0.2)
+    a._next_refresh = 0
+    a.is_revoked(jti)                                # relecture : entrées expirées → compactage
+    with open(path) as f:
+        assert [line.split()[0] for line in f] == [jti]
+
+    # Fichier remplacé : l'autre processus le relit depuis le début
+    late = a.encode({"expires_at": time.time() + 60})
+    a.revoke(late)
+    b._next_refresh = 0
+    assert b.decode(late) is None
+    assert b.is_revoked(jti)
+
+
+def test_cookie_mode_with_processes_requires_revocation_file(monkeypatch):
+    monkeypatch.setattr(session, 'SESSION_BACKEND', 'cookie')
+    monkeypatch.setattr(session, 'SESSION_REVOCATION_FILE', '')
+    with pytest.raises(ValueError):
+        session.configure_store(processes=4)